@@ -0,0 +1,189 @@
+"""
+Admission Control - Rate limiting and in-flight caps for the public API
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from config import ADMISSION_CONFIG
+from error_handling import AdmissionError, ConfigurationError, logger
+from politeness import TokenBucket
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+
+
+class LocalRateLimiter:
+    """In-process token buckets keyed by client identity"""
+
+    def __init__(self, max_tracked_clients: int):
+        self.max_tracked_clients = max_tracked_clients
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        """Take one token for ``key``; return 0 or the seconds until one is free"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            while len(self._buckets) > self.max_tracked_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+
+class RedisRateLimiter:
+    """Token buckets stored in Redis so every worker shares one budget per client"""
+
+    # Refill and take a token atomically; returns the wait time as a string
+    _SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+    def __init__(self, url: str, key_prefix: str, fallback: LocalRateLimiter):
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+        self.key_prefix = key_prefix
+        self.fallback = fallback
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        try:
+            wait = await self._script(keys=[self.key_prefix + key], args=[rate, burst, time.time()])
+            return float(wait)
+        except Exception as e:
+            # Redis outage must not take the API down - limit per worker instead
+            logger.warning(f"Redis rate limiter unavailable, using local buckets: {e}")
+            return await self.fallback.acquire(key, rate, burst)
+
+
+class AdmissionController:
+    """Per-client token buckets plus global and per-lane in-flight caps.
+
+    Rate limits reject with 429, capacity limits with 503; both carry a
+    Retry-After hint. Lanes have their own in-flight caps so batch traffic
+    cannot occupy the capacity reserved for interactive checks.
+
+    Only API keys registered in ``api_keys`` get their own bucket, and their
+    tier decides the lane; any other caller is limited per client IP, so a
+    made-up key per request does not escape the anonymous limit.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = {**ADMISSION_CONFIG, **(config or {})}
+        local = LocalRateLimiter(self.config['max_tracked_clients'])
+        if self.config['redis_url'] and REDIS_AVAILABLE:
+            self.limiter = RedisRateLimiter(
+                self.config['redis_url'], self.config['redis_key_prefix'], local
+            )
+        else:
+            self.limiter = local
+
+        self._in_flight = 0
+        self._lane_in_flight: Dict[str, int] = {lane: 0 for lane in self.config['lanes']}
+        self._api_keys = self._parse_api_keys(self.config['api_keys'])
+
+    def _parse_api_keys(self, spec: str) -> Dict[str, str]:
+        """SHA-256 of each registered key -> tier"""
+        keys = {}
+        for entry in filter(None, (part.strip() for part in (spec or '').split(','))):
+            key, _, tier = entry.rpartition(':')
+            if not key or tier not in self.config['tiers']:
+                raise ConfigurationError(f"Invalid API_KEYS entry (expected key:tier): ...{entry[-4:]}")
+            keys[self._digest(key)] = tier
+        return keys
+
+    @staticmethod
+    def _digest(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
+    def authenticate(self, api_key: Optional[str]) -> Optional[str]:
+        """Tier of a registered API key, None for missing or unknown keys"""
+        if not api_key:
+            return None
+        return self._api_keys.get(self._digest(api_key))
+
+    def tenant_id(self, api_key: Optional[str]) -> Optional[str]:
+        """Stable owner id of a registered API key (its digest, never the key itself); None otherwise"""
+        if not self.authenticate(api_key):
+            return None
+        return self._digest(api_key)
+
+    def client_key(self, api_key: Optional[str], client_ip: Optional[str]) -> str:
+        """Identify the caller by registered API key, falling back to the client IP"""
+        tier = self.authenticate(api_key)
+        if tier:
+            # The digest, not the key itself, ends up in limiter state (Redis)
+            return f"key:{tier}:{self._digest(api_key)[:32]}"
+        return f"ip:{client_ip or 'unknown'}"
+
+    def resolve_lane(self, api_key: Optional[str]) -> str:
+        """Lane of the key's tier; anonymous and unknown callers get the default lane"""
+        tier = self.authenticate(api_key)
+        if tier:
+            return self.config['tiers'][tier]['lane']
+        return self.config['default_lane']
+
+    async def _check_rate(self, client_key: str) -> None:
+        if client_key.startswith('key:'):
+            tier = self.config['tiers'][client_key.split(':')[1]]
+            rate, burst = tier['rate'], tier['burst']
+        else:
+            rate, burst = self.config['ip_rate'], self.config['ip_burst']
+
+        wait = await self.limiter.acquire(client_key, rate, burst)
+        if wait > 0:
+            raise AdmissionError(
+                "요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요.",
+                status_code=429, retry_after=wait, error_code="RATE_LIMITED"
+            )
+
+    def _check_capacity(self, lane: str) -> None:
+        lane_limit = self.config['lanes'][lane]['max_in_flight']
+        if self._in_flight >= self.config['max_in_flight'] or self._lane_in_flight[lane] >= lane_limit:
+            raise AdmissionError(
+                "서버가 혼잡합니다. 잠시 후 다시 시도해주세요.",
+                status_code=503, retry_after=self.config['capacity_retry_after'],
+                error_code="CAPACITY_EXCEEDED"
+            )
+
+    @asynccontextmanager
+    async def admit(self, client_key: str, lane: str):
+        """Hold an in-flight slot for the duration of one analysis"""
+        # Capacity is checked first so a rejected request does not burn a token
+        self._check_capacity(lane)
+        await self._check_rate(client_key)
+        # Re-check: other requests may have been admitted while awaiting Redis
+        self._check_capacity(lane)
+
+        self._in_flight += 1
+        self._lane_in_flight[lane] += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._lane_in_flight[lane] -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {'in_flight': self._in_flight, **{f"{lane}_in_flight": n for lane, n in self._lane_in_flight.items()}}
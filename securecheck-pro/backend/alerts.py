@@ -0,0 +1,523 @@
+"""
+Alerts - Certificate expiry digests per tenant, delivered from an outbox
+
+Each round of the dispatcher:
+
+1. sweeps the portfolio expiry index (``PortfolioStore.expiring``, a range
+   scan over the latest analysed certificate of every domain) and records
+   one alert per tenant, domain, certificate expiry date and level
+   (expired / critical / warning / renewal, per CERTIFICATE_THRESHOLDS);
+   the unique key deduplicates repeat sweeps and domains shared by several
+   portfolios, and a renewed certificate (new expiry date) starts over;
+2. folds each tenant's new alerts into one digest and writes it to the
+   outbox once per tenant channel, in the same transaction that marks the
+   alerts digested;
+3. delivers due outbox rows over webhook, Slack-compatible incoming webhook
+   or SMTP, retrying failures with exponential backoff up to
+   ``max_attempts``.
+
+The outbox lives in SQLite, so digests survive restarts; delivery is at
+least once (a crash between sending and marking a row resends it).
+Tenants without a channel keep their alerts until one is added. Webhook
+and Slack targets must resolve to public addresses, checked when the
+channel is registered and again on every delivery.
+
+The iCal feed of upcoming expiries is built from the same expiry index.
+
+Usage::
+
+    python alerts.py run-once            # sweep, build digests and deliver once
+    python alerts.py outbox              # delivery status
+    python alerts.py calendar <portfolio_id>
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import random
+import smtplib
+import socket
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+import aiohttp.abc
+
+from config import ALERT_CONFIG, CERTIFICATE_THRESHOLDS
+from error_handling import URLValidator, ValidationError, logger
+from portfolios import PortfolioStore
+
+# Most severe first; a certificate alerts once per level it reaches
+LEVELS = ['expired', 'critical', 'warning', 'renewal']
+LEVEL_LABELS = {'expired': '만료됨', 'critical': '긴급', 'warning': '경고', 'renewal': '갱신 권장'}
+_LEVEL_DAYS = [('critical', 'critical_expiry_days'), ('warning', 'warning_expiry_days'),
+               ('renewal', 'renewal_recommendation_days')]
+
+PENDING, SENT, FAILED = 'pending', 'sent', 'failed'
+
+
+def expiry_level(expires_on: date, today: date) -> Optional[str]:
+    days = (expires_on - today).days
+    if days < 0:
+        return 'expired'
+    for level, threshold in _LEVEL_DAYS:
+        if days <= CERTIFICATE_THRESHOLDS[threshold]:
+            return level
+    return None
+
+
+def digest_text(digest: Dict[str, Any]) -> Tuple[str, str]:
+    """(subject, body) of a digest for Slack and email"""
+    alerts = digest['alerts']
+    subject = f"[원클릭 SSL체크] 인증서 만료 알림 {len(alerts)}건"
+    lines = []
+    for alert in alerts:
+        days = alert['days_until_expiry']
+        remaining = f"{-days}일 지남" if days < 0 else f"{days}일 남음"
+        lines.append(f"- [{LEVEL_LABELS[alert['level']]}] {alert['domain']}: "
+                     f"{alert['expires_on']} 만료 ({remaining})")
+    return subject, '\n'.join(lines)
+
+
+# -- channels --------------------------------------------------------------
+
+def _require_public(host: str, addresses: List[str]) -> None:
+    """Webhook targets must not reach loopback, private or link-local networks (SSRF)"""
+    if ALERT_CONFIG['allow_private_targets']:
+        return
+    if not addresses or not all(URLValidator.is_public_address(address) for address in addresses):
+        raise ValidationError(f"내부 네트워크 주소로는 알림을 보낼 수 없습니다: {host}")
+
+
+def _check_target_host(target: str, resolve: bool) -> None:
+    """Reject IP literal targets outside public address space; with ``resolve``, check a host name's addresses too"""
+    host = (urlparse(target).hostname or '').rstrip('.')
+    try:
+        ipaddress.ip_address(host.split('%')[0])
+    except ValueError:
+        if not resolve:
+            return  # host names are checked by _PublicResolver when connecting
+        try:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except OSError:
+            raise ValidationError(f"알림 대상 호스트를 찾을 수 없습니다: {host}")
+        _require_public(host, [info[4][0] for info in infos])
+        return
+    _require_public(host, [host])
+
+
+class _PublicResolver(aiohttp.abc.AbstractResolver):
+    """Resolver for deliveries that drops non-public addresses, so a target re-pointed
+    at an internal address after registration (DNS rebinding) cannot be reached"""
+
+    def __init__(self):
+        self._resolver = aiohttp.DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET):
+        hosts = await self._resolver.resolve(host, port, family)
+        _require_public(host, [entry['host'] for entry in hosts])
+        return hosts
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+async def _post(session: aiohttp.ClientSession, target: str, payload: Dict[str, Any]) -> None:
+    _check_target_host(target, resolve=False)
+    # Redirects are not followed: they could point the request at an internal address
+    async with session.post(target, json=payload, allow_redirects=False) as response:
+        response.raise_for_status()
+
+
+async def _send_webhook(session: aiohttp.ClientSession, target: str, digest: Dict[str, Any]) -> None:
+    await _post(session, target, digest)
+
+
+async def _send_slack(session: aiohttp.ClientSession, target: str, digest: Dict[str, Any]) -> None:
+    subject, body = digest_text(digest)
+    await _post(session, target, {'text': f"*{subject}*\n{body}"})
+
+
+def _send_mail(target: str, digest: Dict[str, Any]) -> None:
+    smtp = ALERT_CONFIG['smtp']
+    subject, body = digest_text(digest)
+    message = EmailMessage()
+    message['From'] = smtp['sender']
+    message['To'] = target
+    message['Subject'] = subject
+    message.set_content(body)
+    with smtplib.SMTP(smtp['host'], smtp['port'], timeout=ALERT_CONFIG['request_timeout']) as client:
+        if smtp['starttls']:
+            client.starttls()
+        if smtp['username']:
+            client.login(smtp['username'], smtp['password'])
+        client.send_message(message)
+
+
+async def _send_email(session: aiohttp.ClientSession, target: str, digest: Dict[str, Any]) -> None:
+    await asyncio.to_thread(_send_mail, target, digest)
+
+
+SENDERS: Dict[str, Callable[[aiohttp.ClientSession, str, Dict[str, Any]], Awaitable[None]]] = {
+    'webhook': _send_webhook,
+    'slack': _send_slack,
+    'email': _send_email
+}
+
+
+def validate_channel(kind: str, target: str) -> str:
+    if kind not in SENDERS or kind not in ALERT_CONFIG['channels']:
+        raise ValidationError(f"지원하지 않는 알림 채널입니다: {kind}")
+    target = (target or '').strip()
+    if kind == 'email':
+        local, _, domain = target.partition('@')
+        if not local or '.' not in domain or any(c in target for c in ' <>,;\r\n'):
+            raise ValidationError("올바른 이메일 주소가 아닙니다")
+    else:
+        URLValidator.validate_url(target)
+        _check_target_host(target, resolve=True)
+    return target
+
+
+# -- storage ---------------------------------------------------------------
+
+class AlertStore:
+    """Channels, deduplicated alerts, digests and the delivery outbox in SQLite (thread-safe)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or ALERT_CONFIG['db_path']
+        self._lock = threading.Lock()
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS alert_channels (id INTEGER PRIMARY KEY, tenant TEXT NOT NULL, "
+                "kind TEXT NOT NULL, target TEXT NOT NULL, created_at TEXT NOT NULL, UNIQUE (tenant, kind, target))"
+            )
+            # digest_id NULL: not yet folded into a digest
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS alerts (id INTEGER PRIMARY KEY, tenant TEXT NOT NULL, "
+                "domain TEXT NOT NULL, expires_on TEXT NOT NULL, level TEXT NOT NULL, created_at TEXT NOT NULL, "
+                "digest_id INTEGER, UNIQUE (tenant, domain, expires_on, level))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_undigested ON alerts (tenant) "
+                               "WHERE digest_id IS NULL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS digests (id INTEGER PRIMARY KEY, tenant TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, alert_count INTEGER NOT NULL)"
+            )
+            # next_attempt_at: epoch seconds; one row per digest and channel
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY, digest_id INTEGER NOT NULL, "
+                "tenant TEXT NOT NULL, channel_id INTEGER NOT NULL, kind TEXT NOT NULL, target TEXT NOT NULL, "
+                "payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, last_error TEXT, created_at TEXT NOT NULL, sent_at TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)")
+
+    # -- channels ----------------------------------------------------------
+
+    def add_channel(self, tenant: str, kind: str, target: str) -> Dict[str, Any]:
+        target = validate_channel(kind, target)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO alert_channels (tenant, kind, target, created_at) VALUES (?, ?, ?, ?)",
+                (tenant, kind, target, datetime.now().isoformat())
+            )
+            row = self._conn.execute(
+                "SELECT id, kind, target, created_at FROM alert_channels WHERE tenant = ? AND kind = ? AND target = ?",
+                (tenant, kind, target)
+            ).fetchone()
+        return dict(zip(('id', 'kind', 'target', 'created_at'), row))
+
+    def channels(self, tenant: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, target, created_at FROM alert_channels WHERE tenant = ? ORDER BY id", (tenant,)
+            ).fetchall()
+        return [dict(zip(('id', 'kind', 'target', 'created_at'), row)) for row in rows]
+
+    def remove_channel(self, tenant: str, channel_id: int) -> bool:
+        """Remove a channel; its undelivered outbox rows are dropped with it"""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM alert_channels WHERE tenant = ? AND id = ?", (tenant, channel_id)
+            ).rowcount
+            if removed:
+                self._conn.execute("DELETE FROM outbox WHERE channel_id = ? AND status = ?", (channel_id, PENDING))
+        return bool(removed)
+
+    # -- alerts and digests ------------------------------------------------
+
+    def record_alerts(self, alerts: List[Tuple[str, str, str, str]]) -> int:
+        """Insert (tenant, domain, expires_on, level) alerts not seen before; returns how many were new"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO alerts (tenant, domain, expires_on, level, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(*alert, now) for alert in alerts]
+            )
+            return self._conn.total_changes - before
+
+    def enqueue_digests(self, today: date, now: Optional[float] = None) -> int:
+        """Fold each tenant's undigested alerts into one digest per channel in the outbox"""
+        now = time.time() if now is None else now
+        created_at = datetime.now().isoformat()
+        digests = 0
+        with self._lock, self._conn:
+            tenants = [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT a.tenant FROM alerts a JOIN alert_channels c ON c.tenant = a.tenant "
+                "WHERE a.digest_id IS NULL"
+            )]
+            for tenant in tenants:
+                rows = self._conn.execute(
+                    "SELECT id, domain, expires_on, level FROM alerts WHERE tenant = ? AND digest_id IS NULL",
+                    (tenant,)
+                ).fetchall()
+                # A certificate that crossed several levels since the last digest is listed once, at its worst
+                worst: Dict[Tuple[str, str], str] = {}
+                for _, domain, expires_on, level in rows:
+                    key = (domain, expires_on)
+                    if key not in worst or LEVELS.index(level) < LEVELS.index(worst[key]):
+                        worst[key] = level
+                digest_id = self._conn.execute(
+                    "INSERT INTO digests (tenant, created_at, alert_count) VALUES (?, ?, ?)",
+                    (tenant, created_at, len(worst))
+                ).lastrowid
+                alerts = [
+                    {'domain': domain, 'expires_on': expires_on, 'level': level,
+                     'days_until_expiry': (date.fromisoformat(expires_on) - today).days}
+                    for (domain, expires_on), level in sorted(worst.items(), key=lambda item: (
+                        LEVELS.index(item[1]), item[0][1], item[0][0]))
+                ]
+                payload = json.dumps({'digest_id': digest_id, 'generated_at': created_at, 'alerts': alerts},
+                                     ensure_ascii=False)
+                self._conn.execute(
+                    "INSERT INTO outbox (digest_id, tenant, channel_id, kind, target, payload, status, "
+                    "next_attempt_at, created_at) "
+                    "SELECT ?, tenant, id, kind, target, ?, ?, ?, ? FROM alert_channels WHERE tenant = ?",
+                    (digest_id, payload, PENDING, now, created_at, tenant)
+                )
+                self._conn.executemany("UPDATE alerts SET digest_id = ? WHERE id = ?",
+                                       [(digest_id, row[0]) for row in rows])
+                digests += 1
+        return digests
+
+    # -- outbox ------------------------------------------------------------
+
+    def due(self, now: float, limit: int) -> List[Tuple[int, str, str, str, int]]:
+        """(id, kind, target, payload, attempts) of pending rows whose next attempt is due"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, kind, target, payload, attempts FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (PENDING, now, limit)
+            ).fetchall()
+
+    def mark_sent(self, outbox_id: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = NULL, sent_at = ? WHERE id = ?",
+                (SENT, datetime.now().isoformat(), outbox_id)
+            )
+
+    def mark_retry(self, outbox_id: int, error: str, next_attempt_at: Optional[float]) -> None:
+        """Record a failed attempt; ``next_attempt_at`` None gives up on the row"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ?, "
+                "next_attempt_at = IFNULL(?, next_attempt_at) WHERE id = ?",
+                (PENDING if next_attempt_at is not None else FAILED, error[:500], next_attempt_at, outbox_id)
+            )
+
+    def outbox(self, tenant: Optional[str] = None, status: Optional[str] = None,
+               limit: int = 100) -> List[Dict[str, Any]]:
+        where, params = [], []
+        for column, value in (('tenant', tenant), ('status', status)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        sql = ("SELECT id, digest_id, kind, target, status, attempts, next_attempt_at, last_error, created_at, "
+               "sent_at FROM outbox")
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id DESC LIMIT ?", [*params, limit]).fetchall()
+        names = ('id', 'digest_id', 'kind', 'target', 'status', 'attempts', 'next_attempt_at', 'last_error',
+                 'created_at', 'sent_at')
+        return [dict(zip(names, row)) for row in rows]
+
+
+# -- dispatcher ------------------------------------------------------------
+
+class AlertDispatcher:
+    """Sweeps expiries into alerts, builds digests and delivers the outbox"""
+
+    def __init__(self, store: AlertStore, portfolios: PortfolioStore):
+        self.store = store
+        self.portfolios = portfolios
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def collect(self, today: date) -> int:
+        """Record alerts for owned portfolio domains expired recently or within the renewal window"""
+        since = today - timedelta(days=ALERT_CONFIG['expired_lookback_days'])
+        until = today + timedelta(days=max(CERTIFICATE_THRESHOLDS[name] for _, name in _LEVEL_DAYS))
+        alerts = []
+        for tenant, domain, expires_on in self.portfolios.expiring(since, until):
+            level = expiry_level(date.fromisoformat(expires_on), today)
+            if tenant is not None and level is not None:
+                alerts.append((tenant, domain, expires_on, level))
+        return self.store.record_alerts(alerts)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(resolver=_PublicResolver()),
+                timeout=aiohttp.ClientTimeout(total=ALERT_CONFIG['request_timeout'])
+            )
+        return self._session
+
+    @staticmethod
+    def backoff(attempts: int) -> float:
+        """Seconds before the next try after ``attempts`` failed ones (exponential, +-20% jitter)"""
+        delay = min(ALERT_CONFIG['backoff_max'], ALERT_CONFIG['backoff_base'] * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _deliver_one(self, session: aiohttp.ClientSession, row: Tuple[int, str, str, str, int],
+                           now: float) -> str:
+        outbox_id, kind, target, payload, attempts = row
+        try:
+            await SENDERS[kind](session, target, json.loads(payload))
+        except Exception as e:
+            attempts += 1
+            final = attempts >= ALERT_CONFIG['max_attempts']
+            logger.warning(f"Alert delivery {outbox_id} via {kind} failed (attempt {attempts}): {e}")
+            self.store.mark_retry(outbox_id, f"{type(e).__name__}: {e}",
+                                  None if final else now + self.backoff(attempts))
+            return FAILED if final else 'retrying'
+        self.store.mark_sent(outbox_id)
+        return SENT
+
+    async def deliver(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Send one batch of due outbox rows concurrently"""
+        now = time.time() if now is None else now
+        rows = self.store.due(now, ALERT_CONFIG['batch_size'])
+        counts = {SENT: 0, 'retrying': 0, FAILED: 0}
+        if rows:
+            session = await self._get_session()
+            for outcome in await asyncio.gather(*(self._deliver_one(session, row, now) for row in rows)):
+                counts[outcome] += 1
+        return counts
+
+    async def run_once(self, today: Optional[date] = None, now: Optional[float] = None) -> Dict[str, int]:
+        today = today or datetime.now(timezone.utc).date()
+        alerts = await asyncio.to_thread(self.collect, today)
+        digests = await asyncio.to_thread(self.store.enqueue_digests, today, now)
+        return {'alerts': alerts, 'digests': digests, **await self.deliver(now)}
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                result = await self.run_once()
+                if any(result.values()):
+                    logger.info(f"Alert round: {result}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Alert round failed: {e}")
+            await asyncio.sleep(ALERT_CONFIG['interval'])
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+# -- iCal ------------------------------------------------------------------
+
+def _ical_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ical_fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 3.1) without splitting UTF-8 characters"""
+    parts, current, size = [], '', 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > 75:
+            parts.append(current)
+            current, size = ' ', 1
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n'.join(parts)
+
+
+def expiry_calendar(expiries: List[Tuple[str, str]], name: str, now: Optional[datetime] = None) -> str:
+    """VCALENDAR with an all-day event (and a reminder) per (domain, expires_on)"""
+    stamp = (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    reminder = CERTIFICATE_THRESHOLDS['critical_expiry_days']
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//OneClick SSL//Expiry Calendar//KO',
+             'CALSCALE:GREGORIAN', 'METHOD:PUBLISH', f"X-WR-CALNAME:{_ical_escape(name)}"]
+    for domain, expires_on in expiries:
+        day = date.fromisoformat(expires_on)
+        summary = _ical_escape(f"SSL 인증서 만료: {domain}")
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:{domain}-{day:%Y%m%d}@oneclick-ssl",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{summary}",
+            f"DESCRIPTION:{_ical_escape(f'{domain} 인증서가 {expires_on}에 만료됩니다. 갱신 후 다시 분석해 주세요.')}",
+            'BEGIN:VALARM', 'ACTION:DISPLAY', f"TRIGGER:-P{reminder}D", f"DESCRIPTION:{summary}", 'END:VALARM',
+            'END:VEVENT'
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_ical_fold(line) for line in lines) + '\r\n'
+
+
+def portfolio_calendar(portfolios: PortfolioStore, portfolio_id: str, name: str,
+                       today: Optional[date] = None) -> str:
+    """Upcoming expiries of a portfolio's domains (expiry index range) as iCal"""
+    today = today or datetime.now(timezone.utc).date()
+    rows = portfolios.expiring(today, today + timedelta(days=ALERT_CONFIG['calendar_days']), portfolio_id)
+    return expiry_calendar([(domain, expires_on) for _, domain, expires_on in rows], name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Certificate expiry alerts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('run-once', help="sweep expiries, build digests and deliver due outbox rows")
+    outbox_parser = subparsers.add_parser('outbox', help="delivery status")
+    outbox_parser.add_argument('--status', choices=[PENDING, SENT, FAILED])
+    calendar_parser = subparsers.add_parser('calendar', help="iCal feed of a portfolio's upcoming expiries")
+    calendar_parser.add_argument('portfolio_id')
+    args = parser.parse_args()
+
+    portfolios = PortfolioStore()
+    store = AlertStore()
+    if args.command == 'run-once':
+        dispatcher = AlertDispatcher(store, portfolios)
+
+        async def _run_once() -> Dict[str, int]:
+            try:
+                return await dispatcher.run_once()
+            finally:
+                await dispatcher.close()
+
+        print(asyncio.run(_run_once()))
+    elif args.command == 'outbox':
+        print(json.dumps(store.outbox(status=args.status), indent=2, ensure_ascii=False))
+    else:
+        print(portfolio_calendar(portfolios, args.portfolio_id, args.portfolio_id), end='')
@@ -0,0 +1,268 @@
+"""
+Analysis Model - Compact typed records for analysis results
+
+SSLAnalyzer builds its result as a dict while the stages run; once finished
+it is converted to an ``AnalysisRecord``: a slotted dataclass with enums for
+status/grade, security headers folded into a bitmask and everything else
+kept in one ``details`` dict. Records serialize to positional msgpack arrays,
+which is what the analysis store and history keep. Stored analyses keep issue
+and recommendation codes rather than their text, which is rendered from the
+grading rule set when read.
+"""
+
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+import msgpack
+
+from config import SECURITY_HEADERS
+
+# First element of every packed record; bump when fields are added, reordered or change meaning
+SCHEMA_VERSION = 3
+
+
+class SSLStatus(str, Enum):
+    VALID = 'valid'
+    EXPIRED = 'expired'
+    NOT_YET_VALID = 'not_yet_valid'
+    SELF_SIGNED = 'self_signed'
+    VERIFY_FAILED = 'verify_failed'
+    CONNECTION_ERROR = 'connection_error'
+    NO_SSL = 'no_ssl'
+
+
+class SSLGrade(str, Enum):
+    A_PLUS = 'A+'
+    A = 'A'
+    A_MINUS = 'A-'
+    B = 'B'
+    C = 'C'
+    D = 'D'
+    F = 'F'
+
+
+# Human-readable status text, derived on demand instead of stored per record
+STATUS_DESCRIPTIONS = {
+    SSLStatus.VALID: '정상적인 SSL 인증서',
+    SSLStatus.EXPIRED: 'SSL 인증서가 만료된 경우',
+    SSLStatus.NOT_YET_VALID: 'SSL 인증서가 아직 유효하지 않은 경우',
+    SSLStatus.SELF_SIGNED: '자체 서명 인증서인 경우',
+    SSLStatus.VERIFY_FAILED: '인증서 검증 실패',
+    SSLStatus.CONNECTION_ERROR: 'SSL 연결 오류',
+    SSLStatus.NO_SSL: 'SSL 인증서가 아예 없는 경우'
+}
+
+
+def header_bitmask(headers: List[str]) -> int:
+    """Bit i set when SECURITY_HEADERS[i] is in ``headers``"""
+    present = set(headers)
+    return sum(1 << i for i, header in enumerate(SECURITY_HEADERS) if header in present)
+
+
+def headers_from_bitmask(mask: int) -> List[str]:
+    return [header for i, header in enumerate(SECURITY_HEADERS) if mask & (1 << i)]
+
+
+def parse_cert_time(value: Optional[str]) -> Optional[datetime]:
+    """'Aug 18 00:00:00 2025 GMT' (getpeercert format) -> naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%b %d %H:%M:%S %Y %Z')
+    except ValueError:
+        return None
+
+
+def _enum(enum_cls, value):
+    if value is None or isinstance(value, enum_cls):
+        return value
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return None
+
+
+# Keys dropped on conversion: redundant copies of other fields, derivable prose and
+# raw response headers (security headers are kept as the bitmask)
+_DROPPED_KEYS = ('subject_dict', 'issuer_dict', 'analysis_result', 'missing_security_headers',
+                 'security_headers_present', 'headers_score', 'response_headers')
+# Redirect chains keep these per-hop fields; the hop's full response headers are dropped
+_REDIRECT_CHAINS = ('http_redirect_chain', 'https_redirect_chain')
+_HOP_FIELDS = ('url', 'status', 'latency_ms', 'location', 'server')
+
+
+def _project_chain(chain: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not chain or not chain.get('chain'):
+        return chain
+    hops = [{name: hop.get(name) for name in _HOP_FIELDS} for hop in chain['chain']]
+    return {**chain, 'chain': hops}
+
+
+@dataclass(slots=True)
+class AnalysisRecord:
+    domain: str
+    port: int = 443
+    analyzed_at: Optional[str] = None
+    ssl_status: Optional[SSLStatus] = None
+    ssl_grade: SSLGrade = SSLGrade.F
+    certificate_valid: bool = False
+    days_until_expiry: int = 0
+    not_before: Optional[str] = None
+    not_after: Optional[str] = None
+    subject_cn: Optional[str] = None
+    issuer_cn: Optional[str] = None
+    is_self_signed: bool = False
+    tls_version: Optional[str] = None
+    # None: headers were not checked (port closed, non-HTTP service)
+    headers_mask: Optional[int] = None
+    hsts_enabled: bool = False
+    target_ip: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> 'AnalysisRecord':
+        data = dict(result)
+        present = data.get('security_headers_present')
+        if present is not None:
+            headers_mask = header_bitmask(present)
+        elif 'missing_security_headers' in data:
+            headers_mask = 0
+        else:
+            headers_mask = None
+        for key in _DROPPED_KEYS:
+            data.pop(key, None)
+        for key in _REDIRECT_CHAINS:
+            if key in data:
+                data[key] = _project_chain(data[key])
+
+        values = {name: data.pop(name) for name in _FIELD_NAMES if name in data}
+        values['ssl_status'] = _enum(SSLStatus, values.get('ssl_status'))
+        values['ssl_grade'] = _enum(SSLGrade, values.get('ssl_grade')) or SSLGrade.F
+        return cls(**values, headers_mask=headers_mask, details=data)
+
+    @property
+    def present_headers(self) -> List[str]:
+        return headers_from_bitmask(self.headers_mask or 0)
+
+    @property
+    def missing_headers(self) -> List[str]:
+        mask = self.headers_mask or 0
+        return [header for i, header in enumerate(SECURITY_HEADERS) if not mask & (1 << i)]
+
+    @property
+    def status_description(self) -> Optional[str]:
+        return STATUS_DESCRIPTIONS.get(self.ssl_status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict in the shape SSLAnalyzer produced (for services and reports)"""
+        result = dict(self.details)
+        for name in _FIELD_NAMES:
+            value = getattr(self, name)
+            result[name] = value.value if isinstance(value, Enum) else value
+        if self.headers_mask is not None:
+            result['security_headers_present'] = self.present_headers
+            result['missing_security_headers'] = self.missing_headers
+            result['headers_score'] = len(result['security_headers_present']) / len(SECURITY_HEADERS) * 100
+        if self.ssl_status is not None:
+            result['analysis_result'] = self.status_description
+        return result
+
+    def to_list(self) -> List[Any]:
+        values = [getattr(self, f.name) for f in fields(self)]
+        return [v.value if isinstance(v, Enum) else v for v in values]
+
+    @classmethod
+    def from_list(cls, values: List[Any]) -> 'AnalysisRecord':
+        record = cls(*values)
+        record.ssl_status = _enum(SSLStatus, record.ssl_status)
+        record.ssl_grade = _enum(SSLGrade, record.ssl_grade) or SSLGrade.F
+        return record
+
+
+_FIELD_NAMES = [f.name for f in fields(AnalysisRecord) if f.name not in ('headers_mask', 'details')]
+
+
+@dataclass(slots=True)
+class StoredAnalysis:
+    """One analysis as kept by the store: API-level fields plus the typed result"""
+    id: str
+    url: str
+    created_at: str
+    ssl_grade: SSLGrade
+    security_score: int
+    # Rule set codes (rules_engine); records packed before schema version 3 hold the text itself
+    issue_codes: List[Any]
+    business_impact: Dict[str, Any]
+    recommendation_codes: List[Any]
+    result: AnalysisRecord
+    rules_version: int = 1  # Grading rule set (rules/v<N>.json) that produced grade/score/issues
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StoredAnalysis':
+        return cls(
+            id=data['id'],
+            url=data['url'],
+            created_at=data['created_at'],
+            ssl_grade=_enum(SSLGrade, data.get('ssl_grade')) or SSLGrade.F,
+            security_score=data.get('security_score', 0),
+            issue_codes=data.get('issues', []),
+            business_impact=data.get('business_impact', {}),
+            recommendation_codes=data.get('recommendations', []),
+            result=AnalysisRecord.from_dict(data.get('ssl_result') or {'domain': ''}),
+            rules_version=data.get('rules_version', 1)
+        )
+
+    def texts(self) -> Tuple[List[Dict[str, str]], List[str]]:
+        """Issues and recommendations rendered by the rule set version that graded the record"""
+        codes = (*self.issue_codes, *self.recommendation_codes)
+        if not any(isinstance(code, list) for code in codes):
+            return list(self.issue_codes), list(self.recommendation_codes)
+        from rules_engine import load_ruleset  # rules_engine imports this module
+        ruleset = load_ruleset(self.rules_version)
+        result = self.result.to_dict()
+        return (ruleset.render_issues(self.issue_codes, result),
+                ruleset.render_recommendations(self.recommendation_codes, result))
+
+    @property
+    def issues(self) -> List[Dict[str, str]]:
+        return self.texts()[0]
+
+    @property
+    def recommendations(self) -> List[str]:
+        return self.texts()[1]
+
+    def to_response(self) -> Dict[str, Any]:
+        """API response fields (AnalyzeResponse) without the raw analysis result"""
+        issues, recommendations = self.texts()
+        return {
+            'id': self.id,
+            'url': self.url,
+            'ssl_grade': self.ssl_grade.value,
+            'security_score': self.security_score,
+            'issues': issues,
+            'business_impact': self.business_impact,
+            'recommendations': recommendations,
+            'created_at': self.created_at
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.to_response(), 'rules_version': self.rules_version, 'ssl_result': self.result.to_dict()}
+
+    def pack(self) -> bytes:
+        return msgpack.packb(
+            [SCHEMA_VERSION, self.id, self.url, self.created_at, self.ssl_grade.value, self.security_score,
+             self.issue_codes, self.business_impact, self.recommendation_codes, self.result.to_list(),
+             self.rules_version],
+            use_bin_type=True, default=str
+        )
+
+    @classmethod
+    def unpack(cls, blob: bytes) -> 'StoredAnalysis':
+        version, id_, url, created_at, grade, score, issue_codes, impact, recommendation_codes, result, *rest = \
+            msgpack.unpackb(blob, raw=False)
+        # Version 1 records predate versioned rule sets and were graded by the v1 rules
+        rules_version = rest[0] if version >= 2 else 1
+        return cls(id_, url, created_at, _enum(SSLGrade, grade) or SSLGrade.F, score,
+                   issue_codes, impact, recommendation_codes, AnalysisRecord.from_list(result), rules_version)
@@ -0,0 +1,425 @@
+"""
+Analysis Store - SQLite persistence for analysis results with columnar export
+
+Each analysis is stored once as a msgpack-packed StoredAnalysis plus a set
+of flat, indexed columns (grade, score, certificate fields, header bitmask,
+timestamps). Exports read only the projected columns and filter by
+``created_at`` in SQL, so the packed records are never decoded for analytics.
+
+Usage::
+
+    python analysis_store.py export --format parquet --columns domain,ssl_grade,not_after \\
+        --since 2026-01-01 --until 2026-02-01 --output grades.parquet
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from analysis_model import StoredAnalysis, parse_cert_time
+from config import ANALYSIS_STORE_CONFIG
+from error_handling import ValidationError
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+
+def _cert_time(value: Optional[str]) -> Optional[str]:
+    """'Aug 18 00:00:00 2025 GMT' (getpeercert format) -> ISO 8601"""
+    parsed = parse_cert_time(value)
+    return parsed.isoformat() if parsed else None
+
+
+def _enum_value(value) -> Optional[str]:
+    return None if value is None else value.value
+
+
+# name -> (SQLite type, Arrow type name, extractor from the stored record)
+COLUMNS: Dict[str, Tuple[str, str, Callable[[StoredAnalysis], Any]]] = {
+    'url': ('TEXT', 'string', lambda r: r.url),
+    'domain': ('TEXT', 'string', lambda r: r.result.domain),
+    'created_at': ('TEXT', 'timestamp', lambda r: r.created_at),
+    'ssl_grade': ('TEXT', 'string', lambda r: r.ssl_grade.value),
+    'security_score': ('INTEGER', 'int', lambda r: r.security_score),
+    'ssl_status': ('TEXT', 'string', lambda r: _enum_value(r.result.ssl_status)),
+    'certificate_valid': ('INTEGER', 'bool', lambda r: r.result.certificate_valid),
+    'days_until_expiry': ('INTEGER', 'int', lambda r: r.result.days_until_expiry),
+    'not_before': ('TEXT', 'timestamp', lambda r: _cert_time(r.result.not_before)),
+    'not_after': ('TEXT', 'timestamp', lambda r: _cert_time(r.result.not_after)),
+    'subject_cn': ('TEXT', 'string', lambda r: r.result.subject_cn),
+    'issuer_cn': ('TEXT', 'string', lambda r: r.result.issuer_cn),
+    'tls_version': ('TEXT', 'string', lambda r: r.result.tls_version),
+    'key_type': ('TEXT', 'string', lambda r: r.result.details.get('key_type')),
+    'key_size': ('INTEGER', 'int', lambda r: r.result.details.get('key_size')),
+    'ct_status': ('TEXT', 'string', lambda r: r.result.details.get('ct_status')),
+    'spki_sha256': ('TEXT', 'string', lambda r: r.result.details.get('spki_sha256')),
+    'cert_sha256': ('TEXT', 'string', lambda r: r.result.details.get('cert_sha256')),
+    'hsts_enabled': ('INTEGER', 'bool', lambda r: r.result.hsts_enabled),
+    'headers_mask': ('INTEGER', 'int', lambda r: r.result.headers_mask),  # NULL: headers not checked
+    'issue_count': ('INTEGER', 'int', lambda r: len(r.issue_codes)),
+    'rules_version': ('INTEGER', 'int', lambda r: r.rules_version),
+}
+
+
+class AnalysisStore:
+    """Dict-like store of analysis records keyed by analysis id (thread-safe).
+
+    Items are set as StoredAnalysis (or the equivalent dict) and read back as
+    plain dicts; ``load`` returns the typed record.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or ANALYSIS_STORE_CONFIG['db_path']
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        with self._lock, self._conn:
+            column_defs = ', '.join(f"{name} {sql_type}" for name, (sql_type, _, _) in COLUMNS.items())
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS analyses (id TEXT PRIMARY KEY, {column_defs}, record BLOB NOT NULL)"
+            )
+            # Columns added after a database was created are filled from the stored records
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(analyses)")}
+            added = [name for name in COLUMNS if name not in existing]
+            for name in added:
+                self._conn.execute(f"ALTER TABLE analyses ADD COLUMN {name} {COLUMNS[name][0]}")
+            if added:
+                self._fill_columns(added)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_created_at ON analyses (created_at)")
+            # Re-grading checkpoints (regrade.py), one row per target rule set version
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS regrade_jobs (rules_version INTEGER PRIMARY KEY, "
+                "last_rowid INTEGER NOT NULL, processed INTEGER NOT NULL, "
+                "started_at TEXT, updated_at TEXT, finished_at TEXT)"
+            )
+
+    def _fill_columns(self, names: List[str]) -> None:
+        """Derive newly added columns for existing rows (caller holds the lock and transaction)"""
+        assignments = ', '.join(f"{name} = ?" for name in names)
+        rows = self._conn.execute("SELECT rowid, record FROM analyses").fetchall()
+        for rowid, blob in rows:
+            record = self.decode(blob)
+            self._conn.execute(
+                f"UPDATE analyses SET {assignments} WHERE rowid = ?",
+                [*(COLUMNS[name][2](record) for name in names), rowid]
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL lets exports read while new analyses are written
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def encode(record: StoredAnalysis) -> Tuple[List[Any], bytes]:
+        """Column values and packed blob for a record (also used by re-grading workers)"""
+        return [extract(record) for _, _, extract in COLUMNS.values()], record.pack()
+
+    def __setitem__(self, analysis_id: str, record: Any) -> None:
+        if not isinstance(record, StoredAnalysis):
+            record = StoredAnalysis.from_dict(record)
+        values, blob = self.encode(record)
+        placeholders = ', '.join('?' * (len(COLUMNS) + 2))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO analyses (id, {', '.join(COLUMNS)}, record) VALUES ({placeholders})",
+                [analysis_id, *values, blob]
+            )
+
+    def load(self, analysis_id: str) -> StoredAnalysis:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        if row is None:
+            raise KeyError(analysis_id)
+        return self.decode(row[0])
+
+    @staticmethod
+    def decode(blob: bytes) -> StoredAnalysis:
+        # Databases written before records were msgpack-packed hold JSON
+        if blob[:1] == b'{':
+            return StoredAnalysis.from_dict(json.loads(blob))
+        return StoredAnalysis.unpack(blob)
+
+    def __getitem__(self, analysis_id: str) -> Dict[str, Any]:
+        return self.load(analysis_id).to_dict()
+
+    def __contains__(self, analysis_id: object) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM analyses WHERE id = ?", (analysis_id,)
+            ).fetchone() is not None
+
+    def existing_ids(self, analysis_ids: List[str]) -> Set[str]:
+        """The subset of ``analysis_ids`` that are stored (one query per 500 ids)"""
+        found: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(analysis_ids), 500):
+                chunk = analysis_ids[start:start + 500]
+                found.update(row[0] for row in self._conn.execute(
+                    f"SELECT id FROM analyses WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        return found
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def get(self, analysis_id: str, default: Any = None) -> Any:
+        try:
+            return self[analysis_id]
+        except KeyError:
+            return default
+
+    @staticmethod
+    def resolve_columns(columns: Optional[List[str]]) -> List[str]:
+        if not columns:
+            return ['id', *COLUMNS]
+        unknown = [c for c in columns if c != 'id' and c not in COLUMNS]
+        if unknown:
+            raise ValidationError(f"알 수 없는 컬럼입니다: {', '.join(unknown)}")
+        return list(dict.fromkeys(columns))
+
+    @staticmethod
+    def _parse_bound(value: Optional[str], name: str) -> Optional[str]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValidationError(f"{name} 날짜 형식이 올바르지 않습니다 (ISO 8601): {value}")
+
+    def iter_rows(self, columns: Optional[List[str]] = None, since: Optional[str] = None,
+                  until: Optional[str] = None, batch_size: Optional[int] = None) -> Iterator[List[tuple]]:
+        """Batches of projected rows with ``since <= created_at < until``, oldest first.
+
+        Reads through its own connection so long exports do not hold the writer lock.
+        """
+        columns = self.resolve_columns(columns)
+        where, params = [], []
+        for op, bound, name in (('>=', since, 'since'), ('<', until, 'until')):
+            parsed = self._parse_bound(bound, name)
+            if parsed:
+                where.append(f"created_at {op} ?")
+                params.append(parsed)
+        sql = f"SELECT {', '.join(columns)} FROM analyses"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        sql += " ORDER BY created_at"
+        # Arguments are validated above, before the first batch is requested
+        return self._fetch(sql, params, batch_size or ANALYSIS_STORE_CONFIG['batch_size'])
+
+    def iter_records(self, limit: Optional[int] = None,
+                     batch_size: Optional[int] = None) -> Iterator[List[StoredAnalysis]]:
+        """Batches of decoded records, oldest first (rule set comparisons)"""
+        sql = "SELECT record FROM analyses ORDER BY created_at"
+        params: List[Any] = []
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for rows in self._fetch(sql, params, batch_size or ANALYSIS_STORE_CONFIG['batch_size']):
+            yield [self.decode(row[0]) for row in rows]
+
+    def iter_fingerprints(self, batch_size: Optional[int] = None) -> Iterator[List[Tuple[str, str, str]]]:
+        """Batches of (domain, spki_sha256, cert_sha256), oldest first (key reuse index backfill)"""
+        sql = ("SELECT domain, spki_sha256, cert_sha256 FROM analyses "
+               "WHERE spki_sha256 IS NOT NULL ORDER BY created_at")
+        return self._fetch(sql, [], batch_size or ANALYSIS_STORE_CONFIG['batch_size'])
+
+    def stale_page(self, rules_version: int, after_rowid: int, limit: int) -> List[Tuple[int, bytes]]:
+        """Next (rowid, record) rows after ``after_rowid`` not yet graded by ``rules_version``.
+
+        Keyset pagination on rowid: new analyses get larger rowids, so a running
+        job also picks up analyses saved after it started. Rows predating
+        versioned rule sets have a NULL rules_version and count as version 1.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT rowid, record FROM analyses WHERE rowid > ? AND IFNULL(rules_version, 1) != ? "
+                "ORDER BY rowid LIMIT ?",
+                (after_rowid, rules_version, limit)
+            ).fetchall()
+
+    def regrade_state(self, rules_version: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM regrade_jobs WHERE rules_version = ?", (rules_version,))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def start_regrade(self, rules_version: int, restart: bool = False) -> Dict[str, Any]:
+        """Checkpoint to continue from (a new one, or reset with ``restart``)"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            if restart:
+                self._conn.execute("DELETE FROM regrade_jobs WHERE rules_version = ?", (rules_version,))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO regrade_jobs VALUES (?, 0, 0, ?, ?, NULL)", (rules_version, now, now)
+            )
+            self._conn.execute(
+                "UPDATE regrade_jobs SET finished_at = NULL, updated_at = ? WHERE rules_version = ?",
+                (now, rules_version)
+            )
+        return self.regrade_state(rules_version)
+
+    def save_regraded(self, rules_version: int, rows: List[Tuple[str, List[Any], bytes]],
+                      last_rowid: int) -> None:
+        """Write re-graded (id, column values, blob) rows and advance the checkpoint atomically"""
+        assignments = ', '.join(f"{name} = ?" for name in COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"UPDATE analyses SET {assignments}, record = ? WHERE id = ?",
+                [[*values, blob, analysis_id] for analysis_id, values, blob in rows]
+            )
+            self._conn.execute(
+                "UPDATE regrade_jobs SET last_rowid = ?, processed = processed + ?, updated_at = ? "
+                "WHERE rules_version = ?",
+                (last_rowid, len(rows), datetime.now().isoformat(), rules_version)
+            )
+
+    def finish_regrade(self, rules_version: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE regrade_jobs SET finished_at = ? WHERE rules_version = ?",
+                (datetime.now().isoformat(), rules_version)
+            )
+
+    def _fetch(self, sql: str, params: List[str], batch_size: int) -> Iterator[List[tuple]]:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only sink whose contents are drained after each record batch"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(columns: List[str]):
+    types = {'string': pa.string(), 'int': pa.int64(), 'bool': pa.bool_(), 'timestamp': pa.timestamp('us')}
+    return pa.schema([
+        pa.field(name, pa.string() if name == 'id' else types[COLUMNS[name][1]]) for name in columns
+    ])
+
+
+def _record_batch(schema, rows: List[tuple]):
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_timestamp(field.type):
+            values = [datetime.fromisoformat(v) if v else None for v in values]
+        elif pa.types.is_boolean(field.type):
+            values = [None if v is None else bool(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def export_stream(store: AnalysisStore, fmt: str, columns: Optional[List[str]] = None,
+                  since: Optional[str] = None, until: Optional[str] = None) -> Iterator[bytes]:
+    """Encoded export chunks: one CSV block / Arrow record batch / Parquet row group per row batch.
+
+    Raises ValidationError immediately (not on first iteration) for bad arguments.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValidationError(f"지원하지 않는 형식입니다: {fmt}")
+    if fmt != 'csv' and not PYARROW_AVAILABLE:
+        raise ValidationError("Arrow/Parquet 내보내기에는 pyarrow가 필요합니다")
+    columns = store.resolve_columns(columns)
+    return _encode(fmt, columns, store.iter_rows(columns, since, until))
+
+
+def _encode(fmt: str, columns: List[str], rows: Iterator[List[tuple]]) -> Iterator[bytes]:
+    if fmt == 'csv':
+        text = io.StringIO()
+        writer = csv.writer(text)
+        writer.writerow(columns)
+        for batch in rows:
+            writer.writerows(batch)
+            yield text.getvalue().encode('utf-8')
+            text.seek(0)
+            text.truncate()
+        yield text.getvalue().encode('utf-8')
+        return
+
+    schema = _arrow_schema(columns)
+    sink = _StreamSink()
+    if fmt == 'arrow':
+        writer = pa.ipc.new_stream(sink, schema)
+    else:
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    for batch in rows:
+        record_batch = _record_batch(schema, batch)
+        if fmt == 'arrow':
+            writer.write_batch(record_batch)
+        else:
+            writer.write_table(pa.Table.from_batches([record_batch]))  # one row group per batch
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export stored analyses")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export')
+    export_parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    export_parser.add_argument('--columns', help=f"comma separated, default all: id,{','.join(COLUMNS)}")
+    export_parser.add_argument('--since', help="created_at >= (ISO 8601)")
+    export_parser.add_argument('--until', help="created_at < (ISO 8601)")
+    export_parser.add_argument('--output', help="file path, default stdout")
+    args = parser.parse_args()
+
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for chunk in export_stream(AnalysisStore(), args.format,
+                                   args.columns.split(',') if args.columns else None,
+                                   args.since, args.until):
+            out.write(chunk)
+    except ValidationError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    finally:
+        if args.output:
+            out.close()
@@ -0,0 +1,267 @@
+"""
+Batch Scoring - Vectorized grade, security score and business impact for a rule set
+
+Compiles the grade/score/impact sections of a rules_engine.RuleSet to NumPy
+array operations, so rescoring the stored history (or comparing two rule
+set versions over it) is a handful of array operations instead of millions
+of Python calls. Columns are extracted per the rule set's declared field
+types; a rule that reads an untyped field cannot be vectorized and raises
+RuleError. The scalar RuleSet stays the reference; test_batch_scoring.py
+checks both agree on random inputs.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from rules_engine import GRADES, IMPACT_FIELDS, RuleError, RuleSet, condition_fields
+
+_GRADE_CODES = {grade: code for code, grade in enumerate(GRADES)}
+_GRADE_NAMES = np.array(GRADES)
+_NO_GRADE = -1
+_COMPUTED = 'ssl_grade'  # produced by the grade section, read by score/impact
+
+
+def _tristate(value: Any) -> int:
+    """1 / 0 for True / False, -1 when the check did not run"""
+    if value is None:
+        return -1
+    return int(bool(value))
+
+
+def _scored_fields(ruleset: RuleSet) -> Set[Tuple[str, str]]:
+    """(source, field) pairs the grade/score/impact sections read"""
+    nodes = [node for node, _ in ruleset.grade_rules]
+    nodes += [node for group in ruleset.points_adjustments for node, _ in group]
+    nodes += [node for node, _ in ruleset.score_rules]
+    nodes += [arg for kind, arg, _ in ruleset.penalties if kind == 'when']
+    nodes += [node for node, _ in ruleset.impact_rules]
+    pairs = {pair for node in nodes for pair in condition_fields(node)}
+    pairs |= {('count', arg) for kind, arg, _ in ruleset.penalties if kind == 'per_item'}
+    pairs |= {('field', arg) for kind, arg, _ in ruleset.penalties if kind == 'field'}
+    if ruleset.caps_field:
+        pairs.add(('field', ruleset.caps_field))
+    return {(source, name) for source, name in pairs if name != _COMPUTED}
+
+
+@dataclass(slots=True)
+class ScoringColumns:
+    """Columnar scoring inputs, one element per analysis.
+
+    ``fields`` holds one array per typed field (bool, int64, str, int8
+    tristate, or an int64 bitmask over a set field's ``values``); ``counts``
+    holds len() of the fields the rules count.
+    """
+    size: int
+    fields: Dict[str, np.ndarray]
+    counts: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, Any]], ruleset: RuleSet) -> 'ScoringColumns':
+        """Columns from analyzer result dicts, with the rule set's defaults for missing keys"""
+        results = list(results)
+        fields: Dict[str, np.ndarray] = {}
+        counts: Dict[str, np.ndarray] = {}
+        for source, name in sorted(_scored_fields(ruleset)):
+            spec = ruleset.fields.get(name, {'type': 'any'})
+            default = spec.get('default')
+            values = [result.get(name, default) for result in results]
+            if source == 'count':
+                counts[name] = np.fromiter((len(v or ()) for v in values), dtype=np.int64, count=len(values))
+                continue
+            field_type = spec['type']
+            if field_type == 'bool':
+                fields[name] = np.fromiter((bool(v) for v in values), dtype=np.bool_, count=len(values))
+            elif field_type in ('int', 'float'):
+                dtype = np.int64 if field_type == 'int' else np.float64
+                fields[name] = np.array([(default or 0) if v is None else v for v in values], dtype=dtype)
+            elif field_type == 'str':
+                fields[name] = np.array(['' if v is None else str(v) for v in values], dtype=str)
+            elif field_type == 'tristate':
+                fields[name] = np.fromiter((_tristate(v) for v in values), dtype=np.int8, count=len(values))
+            elif field_type == 'set':
+                bits = {item: 1 << i for i, item in enumerate(spec['values'])}
+                fields[name] = np.fromiter(
+                    (sum(bits.get(item, 0) for item in set(v)) if v else 0 for v in values),
+                    dtype=np.int64, count=len(values)
+                )
+                counts.setdefault(name, np.fromiter((len(v or ()) for v in values), dtype=np.int64,
+                                                    count=len(values)))
+            else:
+                raise RuleError(f"fields.{name}: untyped fields cannot be batch scored")
+        return cls(len(results), fields, counts)
+
+
+@dataclass(slots=True)
+class BatchScores:
+    grade: np.ndarray  # grade codes (index into rules_engine.GRADES)
+    security_score: np.ndarray
+    revenue_loss_annual: np.ndarray
+    seo_impact: np.ndarray
+    user_trust_impact: np.ndarray
+
+    def grades(self) -> List[str]:
+        return [GRADES[code] for code in self.grade]
+
+    def business_impact(self, i: int) -> Dict[str, int]:
+        return {field: int(getattr(self, field)[i]) for field in IMPACT_FIELDS}
+
+
+class _Evaluator:
+    """Evaluates condition ASTs (rules_engine.parse_condition) over ScoringColumns"""
+
+    def __init__(self, ruleset: RuleSet, columns: ScoringColumns):
+        self.ruleset = ruleset
+        self.columns = columns
+        self.size = len(columns)
+
+    def const(self, value: bool) -> np.ndarray:
+        return np.full(self.size, value, dtype=np.bool_)
+
+    def condition(self, node: Optional[tuple]) -> np.ndarray:
+        if node is None:
+            return self.const(True)
+        kind = node[0]
+        if kind == 'all':
+            return np.logical_and.reduce([self.condition(child) for child in node[1]] or [self.const(True)])
+        if kind == 'any':
+            return np.logical_or.reduce([self.condition(child) for child in node[1]] or [self.const(False)])
+        if kind == 'not':
+            return ~self.condition(node[1])
+        (source, name), op, value = node[1], node[2], node[3]
+        if source == 'count':
+            return self._numeric(self.columns.counts[name], op, value, name)
+        field_type = self.ruleset.fields.get(name, {}).get('type', 'str' if name == _COMPUTED else 'any')
+        column = self.columns.fields[name]
+        if field_type == 'bool':
+            return self._boolean(column, op, value, name)
+        if field_type == 'tristate':
+            return self._tristate(column, op, value, name)
+        if field_type == 'set':
+            return self._set(column, self.columns.counts[name], op, value, name)
+        if field_type == 'str':
+            return self._string(column, op, value, name)
+        return self._numeric(column, op, value, name)
+
+    @staticmethod
+    def _unsupported(name: str, op: str) -> RuleError:
+        return RuleError(f"'{op}' on field '{name}' cannot be batch scored")
+
+    def _numeric(self, column: np.ndarray, op: str, value: Any, name: str) -> np.ndarray:
+        if op == 'truthy':
+            return (column != 0) == value
+        if op in ('in', 'not_in'):
+            found = np.isin(column, value)
+            return found if op == 'in' else ~found
+        if op in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+            return getattr(column, f'__{op}__')(value)
+        raise self._unsupported(name, op)
+
+    def _boolean(self, column: np.ndarray, op: str, value: Any, name: str) -> np.ndarray:
+        if op in ('truthy', 'is', 'eq') and value is not None:
+            return column == bool(value)
+        if op == 'ne':
+            return column != bool(value)
+        if op == 'is':
+            return self.const(False)
+        raise self._unsupported(name, op)
+
+    def _tristate(self, column: np.ndarray, op: str, value: Any, name: str) -> np.ndarray:
+        if op == 'truthy':
+            return (column == 1) == value
+        if op in ('is', 'eq', 'ne'):
+            matched = column == (-1 if value is None else int(bool(value)))
+            return ~matched if op == 'ne' else matched
+        raise self._unsupported(name, op)
+
+    def _string(self, column: np.ndarray, op: str, value: Any, name: str) -> np.ndarray:
+        if op == 'truthy':
+            return (column != '') == value
+        if op in ('eq', 'ne', 'in', 'not_in'):
+            found = np.isin(column, value if isinstance(value, list) else [value])
+            return found if op in ('eq', 'in') else ~found
+        raise self._unsupported(name, op)
+
+    def _set(self, column: np.ndarray, count: np.ndarray, op: str, value: Any, name: str) -> np.ndarray:
+        if op == 'truthy':
+            return (count > 0) == value
+        if op == 'contains':
+            values = self.ruleset.fields[name]['values']
+            if value not in values:
+                raise RuleError(f"'{value}' is not one of the declared values of '{name}'")
+            return (column & (1 << values.index(value))) != 0
+        raise self._unsupported(name, op)
+
+    def first_match(self, rules: List[Tuple[Optional[tuple], Any]], choices: List[Any],
+                    default: Any) -> np.ndarray:
+        return np.select([self.condition(node) for node, _ in rules], choices, default)
+
+    # -- sections ----------------------------------------------------------
+
+    def grade(self) -> np.ndarray:
+        ruleset = self.ruleset
+        grade = self.first_match(ruleset.grade_rules,
+                                 [_GRADE_CODES[value] for _, value in ruleset.grade_rules], _NO_GRADE)
+        points = np.full(self.size, ruleset.points_base, dtype=np.int64)
+        for group in ruleset.points_adjustments:
+            points += self.first_match(group, [add for _, add in group], 0)
+        by_points = np.select([points >= limit for limit, _ in ruleset.points_thresholds],
+                              [_GRADE_CODES[value] for _, value in ruleset.points_thresholds],
+                              _GRADE_CODES[ruleset.points_otherwise])
+        grade = np.where(grade == _NO_GRADE, by_points, grade)
+        if ruleset.caps_field:
+            mask = self.columns.fields[ruleset.caps_field]
+            values = ruleset.fields[ruleset.caps_field]['values']
+            for item, cap in ruleset.caps.items():
+                if item in values:
+                    capped = (mask & (1 << values.index(item))) != 0
+                    grade = np.where(capped, np.maximum(grade, _GRADE_CODES[cap]), grade)
+        return grade
+
+    def score(self, grade: np.ndarray) -> np.ndarray:
+        ruleset = self.ruleset
+        grade_scores = np.array([ruleset.grade_scores.get(value, ruleset.grade_score_default) for value in GRADES],
+                                dtype=np.int64)
+        score = grade_scores[grade]
+        for kind, arg, points in ruleset.penalties:
+            if kind == 'per_item':
+                score = score - self.columns.counts[arg] * points
+            elif kind == 'field':
+                score = score - self.columns.fields[arg]
+            else:
+                score = score - np.where(self.condition(arg), points, 0)
+        score = self.first_match(ruleset.score_rules, [value for _, value in ruleset.score_rules], score)
+        return np.maximum(ruleset.score_minimum, score)
+
+    def impact(self, score: np.ndarray) -> Dict[str, np.ndarray]:
+        formula = self.ruleset.impact_formula
+        shortfall = 100 - score
+        loss_rate = np.maximum(0, shortfall / 100 * formula['max_loss_rate'])
+        computed = {
+            'revenue_loss_annual': (formula['base_revenue'] * loss_rate).astype(np.int64),
+            'seo_impact': np.maximum(0, shortfall // formula['seo_divisor']),
+            'user_trust_impact': np.maximum(0, shortfall // formula['trust_divisor'])
+        }
+        conditions = [self.condition(node) for node, _ in self.ruleset.impact_rules]
+        return {
+            field: np.select(conditions, [impact[field] for _, impact in self.ruleset.impact_rules],
+                             computed[field])
+            for field in IMPACT_FIELDS
+        }
+
+
+def extract_columns(results: Iterable[Dict[str, Any]], ruleset: RuleSet) -> ScoringColumns:
+    return ScoringColumns.from_results(results, ruleset)
+
+
+def score_batch(columns: ScoringColumns, ruleset: RuleSet) -> BatchScores:
+    """Grade, security score and business impact for every analysis in ``columns``"""
+    evaluator = _Evaluator(ruleset, columns)
+    grade = evaluator.grade()
+    columns.fields[_COMPUTED] = _GRADE_NAMES[grade]
+    score = evaluator.score(grade)
+    return BatchScores(grade.astype(np.int8), score, **evaluator.impact(score))
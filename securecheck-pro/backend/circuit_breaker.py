@@ -0,0 +1,148 @@
+"""
+Circuit Breaker - Fast answers for unreachable hosts
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import CIRCUIT_BREAKER_CONFIG
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class NegativeCache:
+    """Short-TTL cache of failed analysis outcomes, bounded by LRU"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _Circuit:
+    __slots__ = ('state', 'failures', 'opened_at', 'reset_timeout')
+
+    def __init__(self, reset_timeout: float):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.reset_timeout = reset_timeout
+
+
+class HostCircuitBreaker:
+    """Per-host breaker: closed -> open after N failures -> half-open retry.
+
+    A failed half-open retry re-opens the circuit with a doubled reset
+    timeout (capped), so hosts that stay dead are retried less and less.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 max_reset_timeout: float, max_entries: int):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.max_entries = max_entries
+        self._circuits: 'OrderedDict[str, _Circuit]' = OrderedDict()
+
+    def state(self, key: str) -> str:
+        circuit = self._circuits.get(key)
+        return circuit.state if circuit else CLOSED
+
+    def open_remaining(self, key: str) -> float:
+        """Seconds until an open circuit becomes eligible for a half-open retry"""
+        circuit = self._circuits.get(key)
+        if circuit is None or circuit.state != OPEN:
+            return 0.0
+        return max(0.0, circuit.opened_at + circuit.reset_timeout - time.monotonic())
+
+    def try_half_open(self, key: str) -> bool:
+        """Move an expired open circuit to half-open; True if the caller should retry"""
+        circuit = self._circuits.get(key)
+        if circuit is None or circuit.state != OPEN or self.open_remaining(key) > 0:
+            return False
+        circuit.state = HALF_OPEN
+        return True
+
+    def record_success(self, key: str) -> None:
+        self._circuits.pop(key, None)
+
+    def record_failure(self, key: str) -> None:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit(self.reset_timeout)
+            while len(self._circuits) > self.max_entries:
+                self._circuits.popitem(last=False)
+        else:
+            self._circuits.move_to_end(key)
+
+        if circuit.state == HALF_OPEN:
+            circuit.reset_timeout = min(circuit.reset_timeout * 2, self.max_reset_timeout)
+            circuit.state = OPEN
+            circuit.opened_at = time.monotonic()
+            return
+
+        circuit.failures += 1
+        if circuit.state == CLOSED and circuit.failures >= self.failure_threshold:
+            circuit.state = OPEN
+            circuit.opened_at = time.monotonic()
+
+
+class UnreachableHostGuard:
+    """Combines the circuit breaker and negative cache used by SSLAnalyzer"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = {**CIRCUIT_BREAKER_CONFIG, **(config or {})}
+        self.negative_ttl = config['negative_cache_ttl']
+        self.cache = NegativeCache(config['negative_cache_ttl'], config['max_entries'])
+        self.breaker = HostCircuitBreaker(
+            config['failure_threshold'], config['reset_timeout'],
+            config['max_reset_timeout'], config['max_entries']
+        )
+
+    @staticmethod
+    def is_unreachable(result: Dict[str, Any]) -> bool:
+        """Outcomes worth short-circuiting: closed port or connection failure"""
+        return (
+            not result.get('port_443_open', False)
+            or result.get('ssl_status') == 'connection_error'
+            or 'error' in result
+        )
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(key)
+
+    def record(self, key: str, result: Dict[str, Any]) -> None:
+        if not self.is_unreachable(result):
+            self.breaker.record_success(key)
+            self.cache.invalidate(key)
+            return
+
+        self.breaker.record_failure(key)
+        # Keep serving the cached outcome for as long as the circuit stays open
+        self.cache.put(key, result, self.negative_ttl + self.breaker.open_remaining(key))
@@ -2,65 +2,18 @@
 Configuration constants and settings for SecureCheck Pro
 """
 
+import os
 from typing import Dict, Any
 
-# SSL Grade Scoring
-SSL_GRADE_SCORES: Dict[str, int] = {
-    'A+': 95,
-    'A': 90,
-    'A-': 85,
-    'B': 75,
-    'C': 60,
-    'D': 40,
-    'F': 15
-}
-
-# Business Impact Constants
-BUSINESS_IMPACT_CONFIG = {
-    'base_revenue': 1_000_000_000,  # Base revenue for calculations
-    'monthly_visitors': 10000,
-    'conversion_rate': 0.02,
-    'order_conversion': 0.1,
-    'avg_order_value': 50000000,
-    
-    # SSL Status Impact Multipliers
-    'ssl_impact': {
-        'no_ssl': {
-            'revenue_loss': 1_008_000_000,
-            'seo_impact': 35,
-            'trust_impact': 80
-        },
-        'expired': {
-            'revenue_loss': 600_000_000,
-            'seo_impact': 25,
-            'trust_impact': 70
-        },
-        'self_signed': {
-            'revenue_loss': 400_000_000,
-            'seo_impact': 20,
-            'trust_impact': 60
-        },
-        'connection_error': {
-            'revenue_loss': 800_000_000,
-            'seo_impact': 30,
-            'trust_impact': 75
-        }
-    }
-}
-
-# Security Scoring
-SECURITY_SCORING = {
-    'ssl_status_scores': {
-        'no_ssl': 0,
-        'expired': 10,
-        'self_signed': 25,
-        'verify_failed': 30,
-        'connection_error': 0
-    },
-    'header_penalty': 3,  # Points deducted per missing header
-    'expiry_penalty': 10,  # Points deducted when cert expires in < 30 days
-    'max_loss_rate': 0.15  # Maximum 15% revenue loss
-}
+# Security headers checked on HTTPS responses (order defines the stored header bitmask)
+SECURITY_HEADERS = [
+    'Strict-Transport-Security',
+    'Content-Security-Policy',
+    'X-Frame-Options',
+    'X-Content-Type-Options',
+    'X-XSS-Protection',
+    'Referrer-Policy'
+]
 
 # Critical Security Headers
 CRITICAL_SECURITY_HEADERS = [
@@ -125,4 +78,296 @@ API_CONFIG = {
     'cors_origins': ["*"],  # In production, restrict this
     'timeout': 30,
     'max_retries': 3
-}
\ No newline at end of file
+}
+
+# API response encoding and compression
+RESPONSE_CONFIG = {
+    'compression_minimum_size': 1024,     # Smaller bodies are sent uncompressed
+    'compression_thread_size': 256 * 1024,  # Bodies this large are compressed off the event loop
+    'gzip_level': 6,
+    'brotli_quality': 5,                  # 0-11; 4-6 is the usual speed/ratio point for dynamic content
+    # Already compressed payloads (reports, ZIP/Parquet exports)
+    'exclude_content_types': (
+        'application/pdf', 'application/zip', 'application/vnd.apache.parquet',
+        'application/gzip', 'image/', 'font/woff'
+    )
+}
+
+# Outbound probe politeness (per resolved target IP and its /24)
+POLITENESS_CONFIG = {
+    'per_ip_rate': 2.0,            # Probes per second against a single IP
+    'per_ip_burst': 4,             # Burst allowance per IP
+    'per_subnet_rate': 10.0,       # Probes per second against a single /24
+    'per_subnet_burst': 20,        # Burst allowance per /24
+    'max_concurrency': 200,        # Total probes in flight
+    'max_per_ip_concurrency': 4,   # Probes in flight against a single IP
+    'max_tracked_targets': 50_000  # LRU bound on remembered buckets
+}
+
+# Admission control for the public analyze API
+ADMISSION_CONFIG = {
+    # Registered API keys as "key:tier" pairs, comma separated; unknown keys are limited per IP
+    'api_keys': os.getenv('API_KEYS', ''),
+    # Per-key rate (requests per second) and burst, and the lane the tier's analyses run in
+    'tiers': {
+        'standard': {'rate': 5.0, 'burst': 20, 'lane': 'interactive'},
+        'batch': {'rate': 5.0, 'burst': 20, 'lane': 'batch'}
+    },
+    'ip_rate': 0.5,               # Requests per second per anonymous client IP
+    'ip_burst': 5,
+    'max_in_flight': 128,         # Analyses holding sockets at once (per worker)
+    'lanes': {
+        # Batch work may never take the slots reserved for interactive checks
+        'interactive': {'max_in_flight': 128},
+        'batch': {'max_in_flight': 64}
+    },
+    'default_lane': 'interactive',
+    'capacity_retry_after': 5,    # Retry-After (seconds) for 503 responses
+    'max_tracked_clients': 100_000,
+    'redis_url': os.getenv('REDIS_URL'),  # Share limiter state across workers
+    'redis_key_prefix': 'securecheck:ratelimit:'
+}
+
+# Circuit breaker / negative cache for unreachable hosts
+CIRCUIT_BREAKER_CONFIG = {
+    'failure_threshold': 2,       # Consecutive failures before the circuit opens
+    'reset_timeout': 60,          # Seconds before a half-open retry
+    'max_reset_timeout': 900,     # Cap for the doubling reset timeout
+    'negative_cache_ttl': 30,     # Seconds a failed outcome is served from cache
+    'max_entries': 50_000
+}
+
+# Per-analysis timeout budget (seconds), split across probe stages by weight
+TIMEOUT_CONFIG = {
+    'default_budget': API_CONFIG['timeout'],
+    'min_budget': 1,
+    'max_budget': 120,
+    'profiles': {
+        'fast': 3,          # Interactive "quick check"
+        'standard': 15,
+        'thorough': 60      # Batch / scheduled scans
+    },
+    'stage_weights': {      # Stage order matters: unused time flows forward
+        'resolve': 1,
+        'port': 2,
+        'handshake': 4,
+        'headers': 3
+    },
+    'min_stage_timeout': 0.5
+}
+
+# TLS services that can be scanned per domain
+SERVICE_SCAN_CONFIG = {
+    'protocols': {
+        'https': {'port': 443, 'starttls': None, 'http_headers': True},
+        'smtp': {'port': 25, 'starttls': 'smtp'},
+        'submission': {'port': 587, 'starttls': 'smtp'},
+        'smtps': {'port': 465, 'starttls': None},
+        'imap': {'port': 143, 'starttls': 'imap'},
+        'imaps': {'port': 993, 'starttls': None}
+    },
+    'default_services': [':443/https', ':25/smtp', ':587/submission', ':993/imaps'],
+    'max_services': 16,
+    'ehlo_name': 'securecheck.local'
+}
+
+# Trust store used for certificate verification
+TLS_CONFIG = {
+    'trust_store': os.getenv('SECURECHECK_TRUST_STORE', 'certifi'),  # certifi | system | /path/to/bundle.pem
+    'reload_check_interval': 30  # Seconds between bundle change checks
+}
+
+# TLS session resumption cache
+TLS_SESSION_CONFIG = {
+    'enabled': os.getenv('TLS_SESSION_CACHE', 'true').lower() == 'true',
+    'max_entries': 10_000,  # LRU bound on cached per-host sessions
+    # Seconds to wait for TLS 1.3 session tickets after a full direct-TLS handshake
+    # (only when the cache is enabled; STARTTLS probes never wait)
+    'ticket_wait': 0.05
+}
+
+# Redirect chain analysis
+REDIRECT_CONFIG = {
+    'max_hops': 10,              # Stop following after this many redirects
+    'recommended_max_hops': 1    # More redirects than this adds avoidable latency
+}
+
+# Shared (pooled) HTTP client used for header and redirect checks
+HTTP_CLIENT_CONFIG = {
+    'pool_size': 100,
+    'per_host_limit': 4,
+    'dns_cache_ttl': 300,
+    'user_agent': 'SecureCheckPro/1.0 (+https://securecheck.pro)'
+}
+
+# Offline HSTS preload list (compiled with `python hsts_preload.py compile <chromium json>`)
+HSTS_PRELOAD_CONFIG = {
+    'index_path': os.getenv(
+        'HSTS_PRELOAD_INDEX',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'hsts_preload.idx')
+    ),
+    'reload_check_interval': 300,  # Seconds between index file change checks
+    'min_max_age': 31_536_000      # One year, required for preload submission
+}
+
+# Deep security-header analysis: score deduction per finding
+HEADER_ANALYSIS_CONFIG = {
+    'weights': {
+        'csp_no_script_restriction': 6,
+        'csp_wildcard_source': 5,
+        'csp_unsafe_inline': 4,
+        'csp_missing_default_src': 2,
+        'csp_unsafe_eval': 2,
+        'csp_object_src': 1,
+        'cookie_missing_secure': 4,
+        'cookie_samesite_none_insecure': 3,
+        'cookie_missing_httponly': 2,
+        'cookie_missing_samesite': 1,
+        'permissions_policy_missing': 1,
+        'permissions_policy_wildcard': 2,
+        'coop_missing': 1,
+        'coep_missing': 0  # Informational: COEP breaks many third-party embeds
+    },
+    'max_penalty': 15  # Cap so policy findings cannot outweigh certificate problems
+}
+
+# Certificate Transparency: offline SCT verification against the Chrome log list
+CT_CONFIG = {
+    'log_list_path': os.getenv(
+        'CT_LOG_LIST',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ct_log_list.json')
+    ),
+    'reload_check_interval': 300,  # Seconds between log list file change checks
+    'qualified_states': ['usable', 'qualified', 'readonly'],
+    'result_cache_size': 4096      # Verified results kept per leaf certificate
+}
+
+# Portfolio-wide key/certificate reuse index
+KEY_REUSE_CONFIG = {
+    # Public suffixes with a second level (labels under them are registrable)
+    'second_level_suffixes': {
+        'co.kr', 'or.kr', 'go.kr', 'ac.kr', 'ne.kr', 're.kr', 'pe.kr',
+        'co.uk', 'org.uk', 'ac.uk', 'co.jp', 'ne.jp', 'or.jp',
+        'com.au', 'net.au', 'com.cn', 'com.br', 'com.tw', 'com.sg'
+    },
+    'max_listed_domains': 20
+}
+
+# Key strength: parameter minimums and the known-bad key blocklist
+KEY_STRENGTH_CONFIG = {
+    'blocklist_path': os.getenv(
+        'KEY_BLOCKLIST',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'key_blocklist.idx')
+    ),
+    'reload_check_interval': 300,
+    'min_rsa_bits': 2048,
+    'allowed_curves': ['secp256r1', 'secp384r1', 'secp521r1'],
+    'weak_signature_hashes': ['md5', 'sha1']
+}
+
+# DNS-side security checks (CAA, DNSSEC, TLSA)
+DNS_CHECK_CONFIG = {
+    # Empty: use the system resolver configuration
+    'nameservers': [ns for ns in os.getenv('DNS_CHECK_NAMESERVERS', '').split(',') if ns],
+    'port': int(os.getenv('DNS_CHECK_PORT', '53')),
+    'cache_size': 10000,
+    'timeout': 3,
+    'max_mx_hosts': 3
+}
+
+# Server-side report rendering (process pool) and on-disk output cache
+REPORT_CACHE_CONFIG = {
+    'cache_dir': os.getenv(
+        'REPORT_CACHE_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'report_cache')
+    ),
+    'max_workers': int(os.getenv('PDF_WORKERS', str(min(4, os.cpu_count() or 1)))),
+    'start_method': 'spawn',
+    'max_entries': 10000,
+    'prune_interval': 100,    # Check the entry limit every N writes
+    'renderer_version': 1     # Bump when report layout changes to invalidate the cache
+}
+
+# Bulk report export (streaming ZIP)
+EXPORT_CONFIG = {
+    'concurrency': 8,        # Reports rendered at once per export
+    'batch_ttl': 3600,       # Seconds an export batch can be downloaded
+    'max_reports': 10000,
+    'formats': ['pdf', 'html']
+}
+
+# Persistent analysis store and columnar export
+ANALYSIS_STORE_CONFIG = {
+    'db_path': os.getenv(
+        'ANALYSIS_DB_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'analyses.db')
+    ),
+    'batch_size': 10000      # Rows per fetch / CSV flush / Arrow record batch (Parquet row group)
+}
+
+# Versioned grading rules (rules/v<N>.json): grade, score, business impact, issues, recommendations
+RULES_CONFIG = {
+    'rules_dir': os.getenv(
+        'RULES_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+    ),
+    'active_version': int(os.getenv('RULES_VERSION', '1'))
+}
+
+# Re-grading stored analyses under a rule set version (regrade.py)
+REGRADE_CONFIG = {
+    'workers': int(os.getenv('REGRADE_WORKERS', str(min(4, os.cpu_count() or 1)))),
+    'start_method': 'spawn',
+    'chunk_size': 2000,        # Records per worker task and per checkpoint
+    'max_pending_chunks': 8    # Chunks read ahead of the writer
+}
+
+# Per-domain security history (delta-encoded time series)
+HISTORY_CONFIG = {
+    'db_path': os.getenv(
+        'HISTORY_DB_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'history.db')
+    ),
+    'block_size': 256,        # Points per delta-encoded block
+    'max_points': 1000,       # resolution=auto picks the finest resolution within this many points
+    # Downsampling bucket sizes in seconds (0: raw points)
+    'resolutions': {'raw': 0, 'hour': 3600, 'day': 86400, 'week': 7 * 86400, 'month': 30 * 86400}
+}
+
+# Portfolio (tenant domain group) rollups for the dashboard summary
+PORTFOLIO_CONFIG = {
+    'db_path': os.getenv(
+        'PORTFOLIO_DB_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'portfolios.db')
+    ),
+    'max_domains': int(os.getenv('PORTFOLIO_MAX_DOMAINS', '5000')),  # Per portfolio
+    'top_missing_headers': 5
+}
+
+# Certificate expiry alerts: per-tenant digests delivered from an outbox
+ALERT_CONFIG = {
+    'db_path': os.getenv(
+        'ALERT_DB_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'alerts.db')
+    ),
+    'enabled': os.getenv('ALERTS_ENABLED', 'true').lower() == 'true',
+    'interval': int(os.getenv('ALERT_INTERVAL', '300')),  # Seconds between sweep/digest/delivery rounds
+    'expired_lookback_days': 30,  # Certificates expired longer ago than this no longer alert
+    'batch_size': 50,             # Outbox rows delivered per round
+    'max_attempts': 8,
+    'backoff_base': 30,           # Seconds before the first retry, doubled per attempt
+    'backoff_max': 3600,
+    'request_timeout': 10,
+    'calendar_days': 365,         # Upcoming expiries in the iCal feed
+    'channels': ['webhook', 'slack', 'email'],
+    # Webhook/Slack targets on loopback, private or link-local addresses are rejected unless enabled
+    'allow_private_targets': os.getenv('ALERT_ALLOW_PRIVATE_TARGETS', 'false').lower() == 'true',
+    'smtp': {
+        'host': os.getenv('SMTP_HOST', 'localhost'),
+        'port': int(os.getenv('SMTP_PORT', '25')),
+        'username': os.getenv('SMTP_USERNAME'),
+        'password': os.getenv('SMTP_PASSWORD'),
+        'starttls': os.getenv('SMTP_STARTTLS', 'false').lower() == 'true',
+        'sender': os.getenv('SMTP_SENDER', 'alerts@oneclick-ssl.local')
+    }
+}
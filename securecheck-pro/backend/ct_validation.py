@@ -0,0 +1,222 @@
+"""
+Certificate Transparency - Offline SCT extraction and signature verification
+
+SCTs embedded in the leaf certificate are verified against a local copy of
+the Chrome CT log list (v3 JSON format), loaded once into a
+log-id -> public-key dict and reloaded when the file changes.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from config import CT_CONFIG
+from error_handling import logger
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    CT_VALIDATION_AVAILABLE = True
+except ImportError:
+    CT_VALIDATION_AVAILABLE = False
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CTLog(NamedTuple):
+    description: str
+    operator: str
+    public_key: Any
+    state: str
+
+
+class CTLogList:
+    """log_id -> CTLog index over the Chrome log list JSON"""
+
+    def __init__(self, path: Optional[str] = None, reload_check_interval: Optional[float] = None):
+        self.path = path or CT_CONFIG['log_list_path']
+        self.reload_check_interval = (
+            CT_CONFIG['reload_check_interval'] if reload_check_interval is None
+            else reload_check_interval
+        )
+        self._lock = threading.Lock()
+        self._logs: Dict[bytes, CTLog] = {}
+        self._signature = None
+        self._checked_at = 0.0
+        self._load()
+
+    @property
+    def available(self) -> bool:
+        return bool(self._logs)
+
+    def _load(self) -> None:
+        self._checked_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._logs, self._signature = {}, None
+            return
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._signature or not CT_VALIDATION_AVAILABLE:
+            return
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            logs = {}
+            for operator in data.get('operators', []):
+                for log in operator.get('logs', []):
+                    state = next(iter(log.get('state') or {}), 'unknown')
+                    logs[base64.b64decode(log['log_id'])] = CTLog(
+                        log.get('description', ''),
+                        operator.get('name', ''),
+                        serialization.load_der_public_key(base64.b64decode(log['key'])),
+                        state
+                    )
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load CT log list {self.path}: {e}")
+            return
+        self._logs, self._signature = logs, signature
+
+    def get(self, log_id: bytes) -> Optional[CTLog]:
+        if time.monotonic() - self._checked_at >= self.reload_check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.reload_check_interval:
+                    self._load()
+        return self._logs.get(log_id)
+
+
+def _signed_data(sct, leaf, issuer_key_hash: bytes) -> bytes:
+    """RFC 6962 digitally-signed struct for a precert_entry SCT"""
+    timestamp_ms = (sct.timestamp - _EPOCH) // timedelta(milliseconds=1)
+    tbs = leaf.tbs_precertificate_bytes
+    return b''.join((
+        struct.pack('>BBQH', 0, 0, timestamp_ms, 1),  # v1, certificate_timestamp, precert_entry
+        issuer_key_hash,
+        len(tbs).to_bytes(3, 'big'), tbs,
+        struct.pack('>H', len(sct.extension_bytes)), sct.extension_bytes
+    ))
+
+
+def _verify_signature(public_key, signature: bytes, data: bytes, hash_algorithm) -> bool:
+    try:
+        if isinstance(public_key, ec.EllipticCurvePublicKey):
+            public_key.verify(signature, data, ec.ECDSA(hash_algorithm))
+        elif isinstance(public_key, rsa.RSAPublicKey):
+            public_key.verify(signature, data, padding.PKCS1v15(), hash_algorithm)
+        else:
+            return False
+        return True
+    except InvalidSignature:
+        return False
+
+
+def required_sct_count(leaf) -> int:
+    """Chrome CT policy: 2 SCTs for certificates valid <= 180 days, else 3"""
+    if hasattr(leaf, 'not_valid_after_utc'):  # cryptography >= 42
+        lifetime = leaf.not_valid_after_utc - leaf.not_valid_before_utc
+    else:
+        lifetime = leaf.not_valid_after - leaf.not_valid_before
+    return 2 if lifetime <= timedelta(days=180) else 3
+
+
+class CTValidator:
+    """Validates embedded SCTs of a leaf certificate against the local log list.
+
+    Results are kept per leaf digest: resumed TLS sessions expose the leaf
+    but not the issuer, so a repeat probe reuses the verified result.
+    """
+
+    def __init__(self, log_list: Optional[CTLogList] = None, max_results: Optional[int] = None):
+        self.log_list = log_list or CTLogList()
+        self.max_results = max_results or CT_CONFIG['result_cache_size']
+        self._lock = threading.Lock()
+        self._results: 'OrderedDict[bytes, Dict[str, Any]]' = OrderedDict()
+
+    def analyze(self, chain_der: List[bytes]) -> Dict[str, Any]:
+        """CT findings for a peer chain (leaf first, issuer second if available)"""
+        if not CT_VALIDATION_AVAILABLE:
+            return {'ct_status': 'unavailable'}
+        if not chain_der:
+            return {'ct_status': 'unknown'}
+
+        digest = hashlib.sha256(chain_der[0]).digest()
+        if len(chain_der) < 2:
+            with self._lock:
+                cached = self._results.get(digest)
+            if cached is not None:
+                return dict(cached)
+
+        result = self._validate(chain_der)
+        if result['ct_status'] != 'unverified':
+            with self._lock:
+                self._results[digest] = result
+                self._results.move_to_end(digest)
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+        return dict(result)
+
+    def _validate(self, chain_der: List[bytes]) -> Dict[str, Any]:
+        leaf = x509.load_der_x509_certificate(chain_der[0])
+        try:
+            scts = list(leaf.extensions.get_extension_for_class(
+                x509.PrecertificateSignedCertificateTimestamps
+            ).value)
+        except x509.ExtensionNotFound:
+            scts = []
+
+        issuer_key_hash = None
+        if len(chain_der) > 1:
+            issuer = x509.load_der_x509_certificate(chain_der[1])
+            issuer_key_hash = hashlib.sha256(issuer.public_key().public_bytes(
+                serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+            )).digest()
+
+        qualified_states = set(CT_CONFIG['qualified_states'])
+        verified_logs, qualified_logs, unknown_logs, invalid = set(), set(), set(), 0
+        for sct in scts:
+            log = self.log_list.get(sct.log_id)
+            if log is None:
+                unknown_logs.add(sct.log_id)
+                continue
+            if issuer_key_hash is None:
+                continue  # Cannot rebuild the signed data without the issuer key
+            data = _signed_data(sct, leaf, issuer_key_hash)
+            if _verify_signature(log.public_key, sct.signature, data, sct.signature_hash_algorithm):
+                verified_logs.add(sct.log_id)
+                if log.state in qualified_states:
+                    qualified_logs.add(sct.log_id)
+            else:
+                invalid += 1
+
+        required = required_sct_count(leaf)
+        if not scts:
+            status = 'missing'
+        elif not self.log_list.available or issuer_key_hash is None:
+            status = 'unverified'
+        elif len(qualified_logs) >= required:
+            status = 'compliant'
+        else:
+            status = 'insufficient'
+
+        return {
+            'ct_status': status,
+            'sct_count': len(scts),
+            'sct_verified_count': len(verified_logs),
+            'sct_invalid_count': invalid,
+            'sct_unknown_log_count': len(unknown_logs),
+            'sct_qualified_logs': len(qualified_logs),
+            'sct_required': required,
+            'sct_log_operators': sorted({
+                self.log_list.get(log_id).operator for log_id in verified_logs
+            })
+        }
@@ -0,0 +1,66 @@
+"""
+Deadline - Per-analysis timeout budget split across probe stages
+"""
+
+import time
+from typing import Dict, Optional
+
+from config import TIMEOUT_CONFIG
+from error_handling import ValidationError
+
+
+class Deadline:
+    """Absolute deadline for one analysis.
+
+    Each stage asks for its timeout just before it starts and receives its
+    weighted share of the *remaining* budget, so time left over by a fast
+    stage flows to the stages after it.
+    """
+
+    def __init__(self, budget: Optional[float] = None,
+                 stage_weights: Optional[Dict[str, float]] = None):
+        self.budget = float(budget if budget is not None else TIMEOUT_CONFIG['default_budget'])
+        self.stage_weights = stage_weights or TIMEOUT_CONFIG['stage_weights']
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + self.budget
+        self.current_stage: Optional[str] = None
+
+    @classmethod
+    def for_request(cls, budget: Optional[float] = None, profile: Optional[str] = None) -> 'Deadline':
+        """Build a deadline from an explicit budget or a named profile"""
+        if budget is None and profile is not None:
+            if profile not in TIMEOUT_CONFIG['profiles']:
+                raise ValidationError(
+                    f"알 수 없는 분석 프로필입니다: {profile} "
+                    f"(사용 가능: {', '.join(TIMEOUT_CONFIG['profiles'])})"
+                )
+            budget = TIMEOUT_CONFIG['profiles'][profile]
+        if budget is not None:
+            budget = min(max(budget, TIMEOUT_CONFIG['min_budget']), TIMEOUT_CONFIG['max_budget'])
+        return cls(budget)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def stage_timeout(self, stage: str) -> float:
+        """Timeout for ``stage``: its weighted share of what is left"""
+        self.current_stage = stage
+        remaining = self.remaining()
+        stages = list(self.stage_weights)
+        later = stages[stages.index(stage):] if stage in self.stage_weights else [stage]
+        total_weight = sum(self.stage_weights.get(s, 1) for s in later)
+        share = remaining * self.stage_weights.get(stage, 1) / total_weight
+        return min(remaining, max(share, TIMEOUT_CONFIG['min_stage_timeout']))
+
+    def stage(self, stage: str) -> 'Deadline':
+        """Child deadline for a stage with several sub-steps (e.g. handshake retries)"""
+        child = Deadline(self.stage_timeout(stage), {stage: 1})
+        child.current_stage = stage
+        return child
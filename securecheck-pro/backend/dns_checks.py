@@ -0,0 +1,153 @@
+"""
+DNS Checks - CAA, DNSSEC and TLSA (DANE) lookups with an async resolver
+
+All record types are queried concurrently and the resolver (with its answer
+cache) is shared by every analysis, so repeat checks of the same zone and
+the MX hosts shared by many domains are answered from memory.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from config import DNS_CHECK_CONFIG
+from key_reuse_index import registrable_domain
+
+try:
+    import dns.asyncresolver
+    import dns.exception
+    import dns.flags
+    import dns.resolver
+    DNS_CHECKS_AVAILABLE = True
+except ImportError:
+    DNS_CHECKS_AVAILABLE = False
+
+
+class DNSSecurityChecker:
+    """Async CAA / DNSSEC / TLSA checks sharing one resolver and cache"""
+
+    def __init__(self, nameservers: Optional[List[str]] = None, port: Optional[int] = None,
+                 cache_size: Optional[int] = None):
+        self.resolver = None
+        if not DNS_CHECKS_AVAILABLE:
+            return
+        nameservers = nameservers or DNS_CHECK_CONFIG['nameservers']
+        try:
+            self.resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+        except dns.resolver.NoResolverConfiguration:
+            self.resolver = dns.asyncresolver.Resolver(configure=False)
+            nameservers = nameservers or ['127.0.0.1']
+        if nameservers:
+            self.resolver.nameservers = nameservers
+        self.resolver.port = port or DNS_CHECK_CONFIG['port']
+        # Ask for the AD bit so a validating resolver reports its DNSSEC verdict
+        self.resolver.flags = dns.flags.RD | dns.flags.AD
+        self.resolver.cache = dns.resolver.LRUCache(cache_size or DNS_CHECK_CONFIG['cache_size'])
+
+    @property
+    def available(self) -> bool:
+        return self.resolver is not None
+
+    async def _query(self, name: str, rdtype: str, timeout: float):
+        """Answer for ``name``/``rdtype`` or None when the name has no such records"""
+        try:
+            return await self.resolver.resolve(name, rdtype, lifetime=timeout, search=False)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            return None
+
+    async def check_caa(self, domain: str, timeout: float) -> Dict[str, Any]:
+        """RFC 8659 relevant CAA set: the closest ancestor (or the name itself) with CAA records"""
+        labels = domain.strip('.').lower().split('.')
+        # Query every ancestor at once and keep the closest answer
+        names = ['.'.join(labels[i:]) for i in range(len(labels) - 1)]
+        answers = await asyncio.gather(*(self._query(name, 'CAA', timeout) for name in names))
+        for name, answer in zip(names, answers):
+            if answer is None:
+                continue
+            records = [
+                {'flags': r.flags, 'tag': r.tag.decode(), 'value': r.value.decode(errors='replace')}
+                for r in answer
+            ]
+            return {
+                'caa_present': True,
+                'caa_domain': name,
+                'caa_records': records,
+                'caa_issuers': sorted({r['value'].split(';')[0].strip() for r in records
+                                       if r['tag'] in ('issue', 'issuewild') and r['value'].strip()}),
+                'caa_iodef': any(r['tag'] == 'iodef' for r in records)
+            }
+        return {'caa_present': False, 'caa_domain': None, 'caa_records': [], 'caa_issuers': [], 'caa_iodef': False}
+
+    async def check_dnssec(self, domain: str, timeout: float) -> Dict[str, Any]:
+        """DS records at the closest signed delegation plus the resolver's AD bit for the name.
+
+        Only delegations at or below the registrable domain count: a DS for a
+        registry zone such as ``co.uk`` says nothing about ``example.co.uk``.
+        """
+        labels = domain.strip('.').lower().split('.')
+        own = registrable_domain(domain)
+        names = [name for name in ('.'.join(labels[i:]) for i in range(len(labels) - 1))
+                 if name == own or name.endswith('.' + own)]
+        ds_answers, address = await asyncio.gather(
+            asyncio.gather(*(self._query(name, 'DS', timeout) for name in names)),
+            self._query(domain, 'A', timeout)
+        )
+        signed_zone = next((name for name, answer in zip(names, ds_answers) if answer is not None), None)
+        return {
+            'dnssec_signed': signed_zone is not None,
+            'dnssec_zone': signed_zone,
+            'dnssec_validated': bool(address is not None and address.response.flags & dns.flags.AD)
+        }
+
+    async def mx_hosts(self, domain: str, timeout: float) -> List[str]:
+        """Most preferred MX host names of the domain's mail domain (up to ``max_mx_hosts``); raises DNSException"""
+        if not self.available:
+            return []
+        # Mail is normally routed for the bare domain, not the www host
+        mail_domain = domain[4:] if domain.lower().startswith('www.') else domain
+        mx = await self._query(mail_domain, 'MX', timeout)
+        records = sorted(
+            (r for r in mx or () if str(r.exchange) != '.'), key=lambda r: r.preference
+        )[:DNS_CHECK_CONFIG['max_mx_hosts']]
+        return [str(r.exchange).rstrip('.').lower() for r in records]
+
+    async def check_tlsa(self, domain: str, ports: List[int], timeout: float) -> Dict[str, Any]:
+        """TLSA for the given service ports and for SMTP on each MX host (DANE for mail)"""
+        mx_names = await self.mx_hosts(domain, timeout)
+
+        names = [f"_{port}._tcp.{domain}" for port in ports] + [f"_25._tcp.{host}" for host in mx_names]
+        answers = await asyncio.gather(*(self._query(name, 'TLSA', timeout) for name in names))
+        tlsa = {
+            name: [
+                {'usage': r.usage, 'selector': r.selector, 'mtype': r.mtype, 'cert': r.cert.hex()}
+                for r in answer
+            ]
+            for name, answer in zip(names, answers) if answer is not None
+        }
+        return {
+            'tlsa_records': tlsa,
+            'mx_hosts': mx_names,
+            'dane_mail': bool(mx_names) and all(f"_25._tcp.{host}" in tlsa for host in mx_names)
+        }
+
+    async def check(self, domain: str, ports: Optional[List[int]] = None,
+                    timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run every DNS check concurrently; a failed check is reported, not raised"""
+        if not self.available:
+            return {'dns_checks_available': False}
+        timeout = timeout or DNS_CHECK_CONFIG['timeout']
+        checks = {
+            'caa': self.check_caa(domain, timeout),
+            'dnssec': self.check_dnssec(domain, timeout),
+            'tlsa': self.check_tlsa(domain, ports or [443], timeout)
+        }
+        outcomes = await asyncio.gather(*checks.values(), return_exceptions=True)
+
+        result: Dict[str, Any] = {'dns_checks_available': True, 'dns_errors': {}}
+        for name, outcome in zip(checks, outcomes):
+            if isinstance(outcome, dns.exception.DNSException):
+                result['dns_errors'][name] = str(outcome) or type(outcome).__name__
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                result.update(outcome)
+        return result
@@ -0,0 +1,309 @@
+"""
+Domain History - Compact per-domain time series of grade, score and expiry
+
+Every analysis appends one point (time, grade, security score, days until
+expiry, SSL status) to its domain's series. Points are kept in append-only
+blocks of up to ``block_size`` points per domain; each point is stored as
+zigzag varint deltas against the previous one (delta-of-delta for the
+timestamp), so a year of daily scans
+for a domain whose grade and certificate rarely change is a few bytes per
+point, and appending only adds the new deltas to the block's bytes (the
+block is never decoded on write).
+
+Queries decode only the blocks overlapping the requested range (NumPy
+cumulative sums) and downsample server side into fixed, epoch-aligned (UTC)
+buckets: worst and last grade, min/avg/max score and the lowest known days
+until expiry per bucket. Timestamps in responses are UTC.
+
+Usage::
+
+    python domain_history.py backfill   # rebuild the history from the analysis store
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import msgpack
+import numpy as np
+
+from analysis_model import SSLGrade, SSLStatus
+from config import HISTORY_CONFIG
+from error_handling import ValidationError
+
+GRADES = [grade.value for grade in SSLGrade]
+STATUSES = [status.value for status in SSLStatus]
+UNKNOWN_STATUS = len(STATUSES)
+# Days until expiry when no certificate date was known (reported as None, never 0)
+UNKNOWN_DAYS = -2 ** 31
+SERIES_FIELDS = ('ts', 'grade', 'score', 'days_until_expiry', 'status')
+_WIDTH = len(SERIES_FIELDS)
+
+
+def _encode_varints(values: Iterable[int]) -> bytes:
+    """Zigzag + LEB128 varints"""
+    out = bytearray()
+    for value in values:
+        value = value << 1 if value >= 0 else (-value << 1) - 1
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    """Zigzag + LEB128 varints, decoded per byte group with NumPy instead of a per-byte loop"""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero((raw & 0x80) == 0)  # last byte of every varint
+    if not len(ends):
+        return np.zeros(0, dtype=np.int64)
+    raw = raw[:ends[-1] + 1]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+    parts = (raw & 0x7F).astype(np.uint64) << (position * 7).astype(np.uint64)
+    zigzag = np.bitwise_or.reduceat(parts, starts)
+    return (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+
+
+def encode_points(points: List[List[int]], state: Optional[List[int]] = None) -> Tuple[bytes, List[int]]:
+    """Delta-encode points after ``state`` (None starts a block); returns the bytes and the new state.
+
+    Timestamps are delta-of-delta encoded (regular scan intervals cost one
+    byte), the other fields plain deltas. The state is the last point plus
+    its timestamp delta.
+    """
+    state = state or [0] * (_WIDTH + 1)
+    previous, previous_interval = state[:_WIDTH], state[_WIDTH]
+    deltas = []
+    for point in points:
+        interval = point[0] - previous[0]
+        deltas.append(interval - previous_interval)
+        deltas.extend(value - before for value, before in zip(point[1:], previous[1:]))
+        previous, previous_interval = point, interval
+    return _encode_varints(deltas), [*previous, previous_interval]
+
+
+def decode_block(data: bytes) -> np.ndarray:
+    """(n, 5) int64 array of the block's points"""
+    points = np.cumsum(_decode_varints(data).reshape(-1, _WIDTH), axis=0)
+    points[:, 0] = np.cumsum(points[:, 0])
+    return points
+
+
+def history_point(created_at: str, ssl_grade: Any, security_score: int, days_until_expiry: Optional[int],
+                  ssl_status: Any) -> List[int]:
+    grade = getattr(ssl_grade, 'value', ssl_grade)
+    status = getattr(ssl_status, 'value', ssl_status)
+    return [
+        int(datetime.fromisoformat(created_at).timestamp()),
+        GRADES.index(grade) if grade in GRADES else GRADES.index('F'),
+        int(security_score or 0),
+        UNKNOWN_DAYS if days_until_expiry is None else int(days_until_expiry),
+        STATUSES.index(status) if status in STATUSES else UNKNOWN_STATUS
+    ]
+
+
+def _parse_time(value: Optional[str], name: str) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        raise ValidationError(f"{name} 날짜 형식이 올바르지 않습니다 (ISO 8601): {value}")
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat()
+
+
+def _days(values: np.ndarray) -> List[Optional[int]]:
+    return [None if value == UNKNOWN_DAYS else int(value) for value in values]
+
+
+class DomainHistory:
+    """Append-only, delta-encoded per-domain series in SQLite (thread-safe)"""
+
+    def __init__(self, db_path: Optional[str] = None, block_size: Optional[int] = None):
+        self.db_path = db_path or HISTORY_CONFIG['db_path']
+        self.block_size = block_size or HISTORY_CONFIG['block_size']
+        self._lock = threading.Lock()
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            # start_ts/end_ts: time range of the block's points, for range queries without decoding;
+            # state: last point and timestamp delta, so appends encode against it directly
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_blocks (domain TEXT NOT NULL, seq INTEGER NOT NULL, "
+                "start_ts INTEGER NOT NULL, end_ts INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "state BLOB NOT NULL, data BLOB NOT NULL, PRIMARY KEY (domain, seq)) WITHOUT ROWID"
+            )
+
+    def append(self, domain: str, point: List[int]) -> None:
+        self.append_many(domain, [point])
+
+    def append_many(self, domain: str, points: List[List[int]]) -> None:
+        """Append points (oldest first) to the domain's open block, starting new blocks as they fill"""
+        domain = domain.lower()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT seq, count, state, data FROM history_blocks WHERE domain = ? "
+                "ORDER BY seq DESC LIMIT 1",
+                (domain,)
+            ).fetchone()
+            if row:
+                seq, count, state, data = row[0], row[1], msgpack.unpackb(row[2]), row[3]
+            else:
+                seq, count, state, data = -1, self.block_size, None, b''
+            while points:
+                if count >= self.block_size:
+                    seq, count, state, data = seq + 1, 0, None, b''
+                take, points = points[:self.block_size - count], points[self.block_size - count:]
+                new_block = state is None
+                encoded, state = encode_points(take, state)
+                data += encoded
+                times = [point[0] for point in take]
+                if new_block:
+                    self._conn.execute(
+                        "INSERT INTO history_blocks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (domain, seq, min(times), max(times), len(take), msgpack.packb(state), data)
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE history_blocks SET data = ?, count = count + ?, "
+                        "start_ts = MIN(start_ts, ?), end_ts = MAX(end_ts, ?), state = ? "
+                        "WHERE domain = ? AND seq = ?",
+                        (data, len(take), min(times), max(times), msgpack.packb(state), domain, seq)
+                    )
+                count += len(take)
+
+    def series(self, domain: str, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """(n, 5) points with ``start <= ts < end``, ordered by time"""
+        start = start if start is not None else -2 ** 62
+        end = end if end is not None else 2 ** 62
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM history_blocks WHERE domain = ? AND end_ts >= ? AND start_ts < ? ORDER BY seq",
+                (domain.lower(), start, end)
+            ).fetchall()
+        if not rows:
+            return np.empty((0, _WIDTH), dtype=np.int64)
+        points = np.concatenate([decode_block(row[0]) for row in rows])
+        points = points[(points[:, 0] >= start) & (points[:, 0] < end)]
+        return points[np.argsort(points[:, 0], kind='stable')]
+
+    def __contains__(self, domain: object) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM history_blocks WHERE domain = ? LIMIT 1", (str(domain).lower(),)
+            ).fetchone() is not None
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history_blocks")
+
+    def storage_stats(self) -> Dict[str, int]:
+        with self._lock:
+            domains, blocks, points, size = self._conn.execute(
+                "SELECT COUNT(DISTINCT domain), COUNT(*), IFNULL(SUM(count), 0), IFNULL(SUM(LENGTH(data)), 0) "
+                "FROM history_blocks"
+            ).fetchone()
+        return {'domains': domains, 'blocks': blocks, 'points': points, 'bytes': size}
+
+    def query(self, domain: str, start: Optional[str] = None, end: Optional[str] = None,
+              resolution: str = 'auto') -> Dict[str, Any]:
+        """History response: raw points or per-bucket aggregates, as parallel arrays"""
+        resolutions = HISTORY_CONFIG['resolutions']
+        if resolution != 'auto' and resolution not in resolutions:
+            raise ValidationError(f"resolution은 auto, {', '.join(resolutions)} 중 하나여야 합니다")
+        start_ts, end_ts = _parse_time(start, 'from'), _parse_time(end, 'to')
+        points = self.series(domain, start_ts, end_ts)
+
+        if resolution == 'auto':
+            resolution = self._auto_resolution(points)
+        response = {'domain': domain.lower(), 'from': start, 'to': end, 'resolution': resolution,
+                    'count': len(points)}
+        if resolutions[resolution] == 0:
+            response['series'] = {
+                't': [_iso(ts) for ts in points[:, 0]],
+                'grade': [GRADES[code] for code in points[:, 1]],
+                'score': points[:, 2].tolist(),
+                'days_until_expiry': _days(points[:, 3]),
+                'ssl_status': [STATUSES[code] if code < UNKNOWN_STATUS else None for code in points[:, 4]]
+            }
+        else:
+            response['series'] = self._downsample(points, resolutions[resolution])
+        return response
+
+    @staticmethod
+    def _auto_resolution(points: np.ndarray) -> str:
+        """Finest resolution that keeps the response within ``max_points``"""
+        max_points = HISTORY_CONFIG['max_points']
+        if len(points) <= max_points:
+            return 'raw'
+        ts = points[:, 0]
+        for name, seconds in sorted(HISTORY_CONFIG['resolutions'].items(), key=lambda item: item[1]):
+            if seconds and len(np.unique(ts // seconds)) <= max_points:
+                return name
+        return max(HISTORY_CONFIG['resolutions'], key=HISTORY_CONFIG['resolutions'].get)
+
+    @staticmethod
+    def _downsample(points: np.ndarray, seconds: int) -> Dict[str, List[Any]]:
+        if not len(points):
+            return {'t': [], 'samples': [], 'grade': [], 'grade_last': [], 'score_min': [], 'score_avg': [],
+                    'score_max': [], 'days_until_expiry': []}
+        buckets = points[:, 0] // seconds
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.append(starts[1:], len(points))
+        grade, score = points[:, 1], points[:, 2]
+        # Unknown expiry must not win the minimum; buckets with no known expiry report None
+        days = np.where(points[:, 3] == UNKNOWN_DAYS, np.iinfo(np.int64).max, points[:, 3])
+        days_min = np.minimum.reduceat(days, starts)
+        return {
+            't': [_iso(bucket * seconds) for bucket in buckets[starts]],
+            'samples': (ends - starts).tolist(),
+            'grade': [GRADES[code] for code in np.maximum.reduceat(grade, starts)],  # worst in bucket
+            'grade_last': [GRADES[code] for code in grade[ends - 1]],
+            'score_min': np.minimum.reduceat(score, starts).tolist(),
+            'score_avg': np.round(np.add.reduceat(score, starts) / (ends - starts), 1).tolist(),
+            'score_max': np.maximum.reduceat(score, starts).tolist(),
+            'days_until_expiry': _days(np.where(days_min == np.iinfo(np.int64).max, UNKNOWN_DAYS, days_min))
+        }
+
+
+def backfill(history: DomainHistory, store) -> int:
+    """Rebuild the history from every stored analysis (oldest first)"""
+    history.clear()
+    total = 0
+    columns = ['domain', 'created_at', 'ssl_grade', 'security_score', 'days_until_expiry', 'ssl_status', 'not_after']
+    for rows in store.iter_rows(columns):
+        by_domain: Dict[str, List[List[int]]] = {}
+        for domain, created_at, grade, score, days, status, not_after in rows:
+            if domain and created_at:
+                by_domain.setdefault(domain, []).append(
+                    history_point(created_at, grade, score, days if not_after else None, status)
+                )
+        for domain, points in by_domain.items():
+            history.append_many(domain, points)
+            total += len(points)
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Per-domain security history")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backfill', help="rebuild the history from the analysis store")
+    subparsers.add_parser('stats', help="storage size")
+    args = parser.parse_args()
+
+    history = DomainHistory()
+    if args.command == 'backfill':
+        from analysis_store import AnalysisStore
+        print(f"{backfill(history, AnalysisStore())} points")
+    print(history.storage_stats())
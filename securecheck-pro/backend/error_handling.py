@@ -2,7 +2,9 @@
 Error handling utilities and custom exceptions
 """
 
+import ipaddress
 import logging
+import math
 import traceback
 from typing import Dict, Any, Optional
 from fastapi import HTTPException
@@ -36,6 +38,15 @@ class ConfigurationError(SecurityAnalysisError):
     pass
 
 
+class AdmissionError(SecurityAnalysisError):
+    """Exception raised when admission control rejects a request"""
+    def __init__(self, message: str, status_code: int = 429, retry_after: float = 1,
+                 error_code: Optional[str] = None):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(message, error_code)
+
+
 class ErrorHandler:
     """Central error handler for the application"""
     
@@ -74,6 +85,16 @@ class ErrorHandler:
                 detail=f"분석 중 예기치 않은 오류가 발생했습니다: {str(error)}"
             )
     
+    @staticmethod
+    def handle_admission_error(error: AdmissionError) -> HTTPException:
+        """Convert an admission rejection into a 429/503 with Retry-After"""
+        logger.warning(f"Request rejected by admission control: {error.error_code} ({error.message})")
+        return HTTPException(
+            status_code=error.status_code,
+            detail=error.message,
+            headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+        )
+    
     @staticmethod
     def handle_pdf_generation_error(error: Exception, report_id: str) -> Dict[str, Any]:
         """Handle PDF generation errors"""
@@ -145,6 +166,17 @@ class URLValidator:
         if any(char in url for char in suspicious_chars):
             raise ValidationError("URL에 허용되지 않는 문자가 포함되어 있습니다")
 
+    @staticmethod
+    def is_public_address(address: str) -> bool:
+        """True for a globally routable IP; False for loopback, private, link-local, reserved or non-IP values"""
+        try:
+            ip = ipaddress.ip_address(address.split('%')[0])
+        except ValueError:
+            return False
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        return ip.is_global and not ip.is_multicast
+
 
 def safe_dict_get(dictionary: Dict[str, Any], key: str, default: Any = None, expected_type: type = None) -> Any:
     """Safely get value from dictionary with type checking"""
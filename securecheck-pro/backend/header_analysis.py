@@ -0,0 +1,245 @@
+"""
+Header Analysis - Deep parsing of HTTP security headers
+
+Builds one case-insensitive index of the response headers in a single pass
+and audits the policies themselves instead of just checking presence:
+CSP directives, Set-Cookie flags, Permissions-Policy and the cross-origin
+isolation headers. Every finding carries a weight from
+``HEADER_ANALYSIS_CONFIG`` that SSLAnalysisService deducts from the score.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import HEADER_ANALYSIS_CONFIG
+
+# Source expressions that let any origin (or inline data) supply script
+_WILDCARD_SOURCES = {'*', 'http:', 'https:', 'data:', 'blob:'}
+_NONCE_OR_HASH = re.compile(r"^'(nonce-|sha256-|sha384-|sha512-)", re.IGNORECASE)
+_POWERFUL_FEATURES = ('camera', 'microphone', 'geolocation', 'payment', 'usb')
+
+
+class HeaderIndex:
+    """Case-insensitive multi-value view of response headers, built in one pass"""
+
+    __slots__ = ('_values',)
+
+    def __init__(self, items: Iterable[Tuple[str, str]]):
+        values: Dict[str, List[str]] = {}
+        for name, value in items:
+            values.setdefault(name.lower(), []).append(value)
+        self._values = values
+
+    @classmethod
+    def from_headers(cls, headers) -> 'HeaderIndex':
+        """Accept a multidict (keeps repeated Set-Cookie) or a plain mapping"""
+        return cls(headers.items())
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._values
+
+    def get(self, name: str, default: str = '') -> str:
+        values = self._values.get(name.lower())
+        return values[0] if values else default
+
+    def get_all(self, name: str) -> List[str]:
+        return self._values.get(name.lower(), [])
+
+
+def _finding(finding_id: str, header: str, severity: str, title: str, description: str) -> Dict[str, Any]:
+    return {
+        'id': finding_id,
+        'header': header,
+        'severity': severity,
+        'weight': HEADER_ANALYSIS_CONFIG['weights'].get(finding_id, 1),
+        'title': title,
+        'description': description
+    }
+
+
+def parse_csp(value: str) -> Dict[str, List[str]]:
+    """Parse a CSP into {directive: [sources]}; the first occurrence of a directive wins"""
+    policy: Dict[str, List[str]] = {}
+    for directive in value.split(';'):
+        tokens = directive.split()
+        if tokens:
+            policy.setdefault(tokens[0].lower(), [token.lower() for token in tokens[1:]])
+    return policy
+
+
+def audit_csp(value: str) -> List[Dict[str, Any]]:
+    """Findings for a Content-Security-Policy value (multiple policies joined by ',')"""
+    findings = []
+    # A response may carry several policies; each is enforced, so audit the weakest
+    policies = [parse_csp(part) for part in value.split(',') if part.strip()]
+    if not policies:
+        return findings
+
+    def effective_script_sources(policy: Dict[str, List[str]]) -> Optional[List[str]]:
+        return policy.get('script-src', policy.get('default-src'))
+
+    if all('default-src' not in p for p in policies):
+        findings.append(_finding(
+            'csp_missing_default_src', 'Content-Security-Policy', 'medium',
+            "CSP default-src 미설정",
+            "default-src가 없어 명시되지 않은 리소스 유형은 제한 없이 로드됩니다."
+        ))
+
+    script_policies = [s for s in (effective_script_sources(p) for p in policies) if s is not None]
+    if not script_policies:
+        findings.append(_finding(
+            'csp_no_script_restriction', 'Content-Security-Policy', 'high',
+            "CSP 스크립트 제한 없음",
+            "script-src와 default-src가 모두 없어 CSP가 XSS를 막지 못합니다."
+        ))
+        return findings
+
+    # Enforced policies intersect, so a restriction in any policy protects the page
+    if all(_WILDCARD_SOURCES & set(sources) for sources in script_policies):
+        findings.append(_finding(
+            'csp_wildcard_source', 'Content-Security-Policy', 'high',
+            "CSP 와일드카드 스크립트 소스",
+            "스크립트 소스에 *, http:, https:, data: 등이 허용되어 임의 출처의 스크립트가 실행될 수 있습니다."
+        ))
+
+    def allows_inline(sources: List[str]) -> bool:
+        # A nonce or hash makes browsers ignore 'unsafe-inline' (CSP Level 2+)
+        return "'unsafe-inline'" in sources and not any(_NONCE_OR_HASH.match(s) for s in sources) \
+            and "'strict-dynamic'" not in sources
+
+    if all(allows_inline(sources) for sources in script_policies):
+        findings.append(_finding(
+            'csp_unsafe_inline', 'Content-Security-Policy', 'medium',
+            "CSP 'unsafe-inline' 허용",
+            "인라인 스크립트가 허용되어 CSP의 XSS 방어 효과가 크게 약화됩니다."
+        ))
+
+    if all("'unsafe-eval'" in sources for sources in script_policies):
+        findings.append(_finding(
+            'csp_unsafe_eval', 'Content-Security-Policy', 'low',
+            "CSP 'unsafe-eval' 허용",
+            "eval() 등 문자열 코드 실행이 허용되어 있습니다."
+        ))
+
+    def object_restricted(policy: Dict[str, List[str]]) -> bool:
+        return policy.get('object-src', policy.get('default-src')) == ["'none'"]
+
+    if not any(object_restricted(p) for p in policies):
+        findings.append(_finding(
+            'csp_object_src', 'Content-Security-Policy', 'low',
+            "CSP object-src 미제한",
+            "object-src 'none'이 설정되지 않아 플러그인 콘텐츠를 통한 스크립트 실행이 가능합니다."
+        ))
+    return findings
+
+
+def audit_cookies(set_cookie_values: List[str], is_https: bool = True) -> List[Dict[str, Any]]:
+    """Findings for Set-Cookie headers: Secure, HttpOnly and SameSite flags"""
+    missing_secure, missing_httponly, missing_samesite, none_without_secure = [], [], [], []
+    for raw in set_cookie_values:
+        name_value, *attributes = raw.split(';')
+        name = name_value.split('=', 1)[0].strip()
+        flags = {}
+        for attribute in attributes:
+            key, _, value = attribute.strip().partition('=')
+            flags[key.strip().lower()] = value.strip().lower()
+
+        secure = 'secure' in flags
+        if is_https and not secure:
+            missing_secure.append(name)
+        if 'httponly' not in flags:
+            missing_httponly.append(name)
+        samesite = flags.get('samesite')
+        if not samesite:
+            missing_samesite.append(name)
+        elif samesite == 'none' and not secure:
+            none_without_secure.append(name)
+
+    findings = []
+    if missing_secure:
+        findings.append(_finding(
+            'cookie_missing_secure', 'Set-Cookie', 'medium',
+            "쿠키 Secure 속성 누락",
+            f"HTTPS 사이트의 쿠키가 평문 HTTP로도 전송될 수 있습니다: {', '.join(missing_secure)}"
+        ))
+    if missing_httponly:
+        findings.append(_finding(
+            'cookie_missing_httponly', 'Set-Cookie', 'low',
+            "쿠키 HttpOnly 속성 누락",
+            f"스크립트에서 쿠키를 읽을 수 있어 XSS 시 세션 탈취 위험이 있습니다: {', '.join(missing_httponly)}"
+        ))
+    if missing_samesite:
+        findings.append(_finding(
+            'cookie_missing_samesite', 'Set-Cookie', 'low',
+            "쿠키 SameSite 속성 누락",
+            f"SameSite가 지정되지 않아 CSRF 방어를 브라우저 기본값에 의존합니다: {', '.join(missing_samesite)}"
+        ))
+    if none_without_secure:
+        findings.append(_finding(
+            'cookie_samesite_none_insecure', 'Set-Cookie', 'medium',
+            "SameSite=None 쿠키에 Secure 누락",
+            f"SameSite=None 쿠키는 Secure가 필요하며 최신 브라우저에서 거부됩니다: {', '.join(none_without_secure)}"
+        ))
+    return findings
+
+
+def audit_permissions_policy(value: str) -> List[Dict[str, Any]]:
+    """Findings for Permissions-Policy (structured-field syntax: feature=(allowlist))"""
+    if not value:
+        return [_finding(
+            'permissions_policy_missing', 'Permissions-Policy', 'low',
+            "Permissions-Policy 헤더 누락",
+            "카메라, 마이크, 위치 정보 등 브라우저 기능 사용을 제한하지 않습니다."
+        )]
+
+    open_features = []
+    for item in value.split(','):
+        feature, _, allowlist = item.strip().partition('=')
+        if feature.strip().lower() in _POWERFUL_FEATURES and allowlist.strip() == '*':
+            open_features.append(feature.strip())
+    if open_features:
+        return [_finding(
+            'permissions_policy_wildcard', 'Permissions-Policy', 'low',
+            "Permissions-Policy 와일드카드 허용",
+            f"모든 출처에 민감한 기능이 허용되어 있습니다: {', '.join(open_features)}"
+        )]
+    return []
+
+
+def audit_cross_origin_isolation(coop: str, coep: str) -> List[Dict[str, Any]]:
+    """Findings for Cross-Origin-Opener-Policy / Cross-Origin-Embedder-Policy"""
+    findings = []
+    if coop.strip().lower() in ('', 'unsafe-none'):
+        findings.append(_finding(
+            'coop_missing', 'Cross-Origin-Opener-Policy', 'low',
+            "Cross-Origin-Opener-Policy 미설정",
+            "다른 출처의 창과 브라우징 컨텍스트를 공유하여 XS-Leaks 공격에 노출될 수 있습니다."
+        ))
+    if coep.strip().lower() in ('', 'unsafe-none'):
+        findings.append(_finding(
+            'coep_missing', 'Cross-Origin-Embedder-Policy', 'low',
+            "Cross-Origin-Embedder-Policy 미설정",
+            "교차 출처 격리가 적용되지 않아 Spectre 계열 부채널 공격 완화가 제한됩니다."
+        ))
+    return findings
+
+
+def analyze_headers(index: HeaderIndex, is_https: bool = True) -> Dict[str, Any]:
+    """Run every policy audit over one header index"""
+    findings: List[Dict[str, Any]] = []
+
+    csp = index.get_all('Content-Security-Policy')
+    if csp:
+        findings.extend(audit_csp(','.join(csp)))
+    findings.extend(audit_cookies(index.get_all('Set-Cookie'), is_https))
+    findings.extend(audit_permissions_policy(index.get('Permissions-Policy')))
+    findings.extend(audit_cross_origin_isolation(
+        index.get('Cross-Origin-Opener-Policy'), index.get('Cross-Origin-Embedder-Policy')
+    ))
+
+    penalty = min(sum(f['weight'] for f in findings), HEADER_ANALYSIS_CONFIG['max_penalty'])
+    return {
+        'header_findings': findings,
+        'header_findings_penalty': penalty,
+        'csp_report_only': 'Content-Security-Policy-Report-Only' in index and not csp
+    }
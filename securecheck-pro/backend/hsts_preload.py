@@ -0,0 +1,213 @@
+"""
+HSTS Preload Index - Offline preload-list lookups from a memory-mapped sorted index
+
+The Chromium preload list is compiled into a flat file of entries sorted by
+their reversed-label key (``www.example.com`` -> ``com.example.www``).
+Lookups binary-search the memory-mapped file for the domain and each parent
+domain, so a check costs a few dozen byte comparisons and no network I/O.
+
+File layout (little endian)::
+
+    b'HSTSIDX1' | uint32 count | uint32 offsets[count] | entries...
+    entry = uint8 flags | uint8 key_length | key bytes
+
+Usage::
+
+    python hsts_preload.py compile transport_security_state_static.json
+    python hsts_preload.py lookup www.example.com
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import HSTS_PRELOAD_CONFIG
+from error_handling import logger
+
+MAGIC = b'HSTSIDX1'
+FLAG_INCLUDE_SUBDOMAINS = 0x01
+_HEADER = struct.Struct('<8sI')
+_OFFSET = struct.Struct('<I')
+
+
+def reversed_key(domain: str) -> bytes:
+    """``www.example.com`` -> ``b'com.example.www'``"""
+    return '.'.join(reversed(domain.strip('.').lower().split('.'))).encode('idna')
+
+
+def compile_index(source_path: str, output_path: str) -> int:
+    """Compile a Chromium ``transport_security_state_static.json`` into an index file"""
+    with open(source_path, encoding='utf-8') as f:
+        # The upstream file contains // comment lines, which JSON does not allow
+        source = ''.join(line for line in f if not line.lstrip().startswith('//'))
+    entries = json.loads(source)['entries']
+
+    records: Dict[bytes, int] = {}
+    for entry in entries:
+        if entry.get('mode') != 'force-https':
+            continue  # pinning-only entries do not enforce HTTPS
+        try:
+            key = reversed_key(entry['name'])
+        except UnicodeError:
+            continue
+        if len(key) > 255:
+            continue
+        records[key] = FLAG_INCLUDE_SUBDOMAINS if entry.get('include_subdomains') else 0
+
+    keys = sorted(records)
+    header_size = _HEADER.size + _OFFSET.size * len(keys)
+    offsets = []
+    body = bytearray()
+    for key in keys:
+        offsets.append(header_size + len(body))
+        body += bytes((records[key], len(key))) + key
+
+    tmp_path = f"{output_path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(tmp_path, 'wb') as out:
+        out.write(_HEADER.pack(MAGIC, len(keys)))
+        out.write(b''.join(_OFFSET.pack(offset) for offset in offsets))
+        out.write(body)
+    # Atomic swap so running workers never read a half-written index
+    os.replace(tmp_path, output_path)
+    return len(keys)
+
+
+class HSTSPreloadIndex:
+    """Read-only view over a compiled index, reloaded when the file changes"""
+
+    def __init__(self, path: Optional[str] = None, reload_check_interval: Optional[float] = None):
+        self.path = path or HSTS_PRELOAD_CONFIG['index_path']
+        self.reload_check_interval = (
+            HSTS_PRELOAD_CONFIG['reload_check_interval'] if reload_check_interval is None
+            else reload_check_interval
+        )
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._signature = None
+        self._checked_at = 0.0
+        self._load()
+
+    @property
+    def available(self) -> bool:
+        return self._mmap is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _load(self) -> None:
+        self._checked_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._mmap, self._count, self._signature = None, 0, None
+            return
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._signature:
+            return
+
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            logger.error(f"Invalid HSTS preload index: {self.path}")
+            return
+        # Old mapping is left to the GC: a concurrent lookup may still hold it
+        self._mmap, self._count, self._signature = mapped, count, signature
+
+    def _maybe_reload(self) -> None:
+        if time.monotonic() - self._checked_at < self.reload_check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.reload_check_interval:
+                self._load()
+
+    def _find(self, mapped: mmap.mmap, count: int, key: bytes) -> Optional[int]:
+        """Binary search for ``key``; returns its flags or None"""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (offset,) = _OFFSET.unpack_from(mapped, _HEADER.size + mid * _OFFSET.size)
+            flags, length = mapped[offset], mapped[offset + 1]
+            candidate = mapped[offset + 2:offset + 2 + length]
+            if candidate == key:
+                return flags
+            if candidate < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup(self, domain: str) -> Tuple[Optional[bool], Optional[str]]:
+        """Return (preloaded, matching entry); (None, None) if no index is loaded.
+
+        A parent entry only covers ``domain`` when it has include_subdomains.
+        """
+        self._maybe_reload()
+        mapped, count = self._mmap, self._count
+        if mapped is None:
+            return None, None
+
+        try:
+            labels = reversed_key(domain).split(b'.')
+        except UnicodeError:
+            return False, None
+        for depth in range(len(labels), 0, -1):
+            key = b'.'.join(labels[:depth])
+            flags = self._find(mapped, count, key)
+            if flags is None:
+                continue
+            if depth == len(labels) or flags & FLAG_INCLUDE_SUBDOMAINS:
+                return True, '.'.join(reversed(key.decode('idna').split('.')))
+        return False, None
+
+
+def parse_hsts_header(value: str) -> Dict[str, Any]:
+    """Parse Strict-Transport-Security directives (case-insensitive, quoted values)"""
+    parsed = {'max_age': 0, 'include_subdomains': False, 'preload': False}
+    for directive in value.split(';'):
+        name, _, argument = directive.strip().partition('=')
+        name = name.strip().lower()
+        if name == 'max-age':
+            try:
+                parsed['max_age'] = int(argument.strip().strip('"'))
+            except ValueError:
+                pass
+        elif name == 'includesubdomains':
+            parsed['include_subdomains'] = True
+        elif name == 'preload':
+            parsed['preload'] = True
+    return parsed
+
+
+def preload_eligibility(max_age: int, include_subdomains: bool, preload: bool,
+                        redirects_to_https: bool) -> List[str]:
+    """Unmet hstspreload.org submission requirements (empty list = eligible)"""
+    missing = []
+    if max_age < HSTS_PRELOAD_CONFIG['min_max_age']:
+        missing.append('max_age')
+    if not include_subdomains:
+        missing.append('include_subdomains')
+    if not preload:
+        missing.append('preload_directive')
+    if not redirects_to_https:
+        missing.append('https_redirect')
+    return missing
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'compile':
+        output = sys.argv[3] if len(sys.argv) > 3 else HSTS_PRELOAD_CONFIG['index_path']
+        print(f"{compile_index(sys.argv[2], output)} entries written to {output}")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'lookup':
+        print(HSTSPreloadIndex().lookup(sys.argv[2]))
+    else:
+        print(__doc__)
+        sys.exit(1)
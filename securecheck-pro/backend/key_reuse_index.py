@@ -0,0 +1,151 @@
+"""
+Key Reuse Index - Portfolio-wide certificate/key sharing lookups
+
+Every analyzed leaf is indexed by its SPKI SHA-256 and certificate SHA-256
+fingerprint. Both maps point to the set of domains currently serving that
+key or certificate, so "who shares this key" is a dict lookup; a domain
+re-analyzed with a new certificate is moved to its new entries.
+"""
+
+import hashlib
+import heapq
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from config import KEY_REUSE_CONFIG
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import serialization
+    KEY_REUSE_AVAILABLE = True
+except ImportError:
+    KEY_REUSE_AVAILABLE = False
+
+
+class LeafFingerprints(NamedTuple):
+    spki_sha256: str
+    cert_sha256: str
+
+
+def leaf_fingerprints(leaf_der: bytes) -> Optional[LeafFingerprints]:
+    """SPKI and certificate SHA-256 (hex) of a DER leaf certificate"""
+    if not leaf_der or not KEY_REUSE_AVAILABLE:
+        return None
+    spki = x509.load_der_x509_certificate(leaf_der).public_key().public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return LeafFingerprints(hashlib.sha256(spki).hexdigest(), hashlib.sha256(leaf_der).hexdigest())
+
+
+def registrable_domain(domain: str) -> str:
+    """Approximate registrable domain (``www.shop.co.kr`` -> ``shop.co.kr``).
+
+    Hosts under the same registrable domain sharing a key is normal
+    (wildcard or SAN certificates), so only sharing across them is reported.
+    """
+    labels = domain.strip('.').lower().split('.')
+    if len(labels) >= 3 and '.'.join(labels[-2:]) in KEY_REUSE_CONFIG['second_level_suffixes']:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+class KeyReuseIndex:
+    """In-memory SPKI/certificate -> domains index (thread-safe).
+
+    The fingerprints are persisted with each analysis (AnalysisStore columns),
+    so the index is rebuilt with ``backfill`` on startup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_spki: Dict[str, Set[str]] = {}
+        self._by_cert: Dict[str, Set[str]] = {}
+        self._domains: Dict[str, LeafFingerprints] = {}
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, domain: str) -> None:
+        domains = index.get(key)
+        if domains is not None:
+            domains.discard(domain)
+            if not domains:
+                del index[key]
+
+    def _index(self, domain: str, fingerprints: LeafFingerprints) -> None:
+        previous = self._domains.get(domain)
+        if previous is not None and previous != fingerprints:
+            self._discard(self._by_spki, previous.spki_sha256, domain)
+            self._discard(self._by_cert, previous.cert_sha256, domain)
+        self._domains[domain] = fingerprints
+        self._by_spki.setdefault(fingerprints.spki_sha256, set()).add(domain)
+        self._by_cert.setdefault(fingerprints.cert_sha256, set()).add(domain)
+
+    def record(self, domain: str, fingerprints: LeafFingerprints) -> Dict[str, Any]:
+        """Index ``domain`` under its current leaf and return its sharing findings"""
+        domain = domain.lower()
+        with self._lock:
+            self._index(domain, fingerprints)
+        return self.findings(domain)
+
+    def backfill(self, batches: Iterable[List[Tuple[str, str, str]]]) -> int:
+        """Rebuild from persisted (domain, spki_sha256, cert_sha256) rows, oldest first.
+
+        Later rows win, so each domain ends up under its latest leaf. Domains
+        already recorded by live analyses are left alone.
+        """
+        loaded: Dict[str, LeafFingerprints] = {}
+        for rows in batches:
+            for domain, spki_sha256, cert_sha256 in rows:
+                if domain and spki_sha256 and cert_sha256:
+                    loaded[domain.lower()] = LeafFingerprints(spki_sha256, cert_sha256)
+        with self._lock:
+            for domain, fingerprints in loaded.items():
+                if domain not in self._domains:
+                    self._index(domain, fingerprints)
+        return len(loaded)
+
+    def findings(self, domain: str) -> Dict[str, Any]:
+        """Domains outside ``domain``'s registrable domain that share its key"""
+        domain = domain.lower()
+        with self._lock:
+            fingerprints = self._domains.get(domain)
+            if fingerprints is None:
+                return {}
+            key_sharers = set(self._by_spki.get(fingerprints.spki_sha256, ()))
+            cert_sharers = len(self._by_cert.get(fingerprints.cert_sha256, ())) - 1
+
+        own = registrable_domain(domain)
+        unrelated = sorted(d for d in key_sharers if registrable_domain(d) != own)
+        limit = KEY_REUSE_CONFIG['max_listed_domains']
+        return {
+            'spki_sha256': fingerprints.spki_sha256,
+            'cert_sha256': fingerprints.cert_sha256,
+            'key_shared_count': len(key_sharers) - 1,
+            'cert_shared_count': cert_sharers,
+            'key_shared_unrelated_count': len(unrelated),
+            'key_shared_unrelated_domains': unrelated[:limit]
+        }
+
+    def domains_for_key(self, spki_sha256: str) -> List[str]:
+        with self._lock:
+            return sorted(self._by_spki.get(spki_sha256.lower(), ()))
+
+    def domains_for_cert(self, cert_sha256: str) -> List[str]:
+        with self._lock:
+            return sorted(self._by_cert.get(cert_sha256.lower(), ()))
+
+    def top_reused_keys(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Keys served by the most domains (only keys shared by 2+ domains)"""
+        with self._lock:
+            top = heapq.nlargest(limit, self._by_spki.items(), key=lambda item: len(item[1]))
+            return [
+                {
+                    'spki_sha256': spki,
+                    'domain_count': len(domains),
+                    'registrable_domain_count': len({registrable_domain(d) for d in domains}),
+                    'sample_domains': sorted(domains)[:KEY_REUSE_CONFIG['max_listed_domains']]
+                }
+                for spki, domains in top if len(domains) > 1
+            ]
@@ -0,0 +1,195 @@
+"""
+Key Strength - Weak key, weak parameter and known-bad key detection
+
+Parameter checks (RSA size, EC curve, signature hash) come straight from the
+leaf certificate. Known-bad keys (Debian OpenSSL PRNG keys, published or
+leaked private keys) are looked up by SPKI SHA-256 in a precompiled
+blocklist that is memory-mapped, so every worker shares one page-cache copy
+and a lookup is a binary search over fixed-width records.
+
+File layout::
+
+    b'KEYBLK01' | uint32 count (little endian) | records...
+    record = 32-byte SPKI SHA-256 | uint8 category      (sorted by digest)
+
+Usage::
+
+    python key_strength.py compile debian_weak:debian.txt compromised:leaked.txt
+    python key_strength.py lookup <spki-sha256-hex>
+
+Input files hold one hex SPKI SHA-256 per line (``#`` starts a comment).
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import KEY_STRENGTH_CONFIG
+from error_handling import logger
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives.asymmetric import dsa, ec, rsa
+    KEY_STRENGTH_AVAILABLE = True
+except ImportError:
+    KEY_STRENGTH_AVAILABLE = False
+
+MAGIC = b'KEYBLK01'
+_HEADER = struct.Struct('<8sI')
+_DIGEST_SIZE = 32
+_RECORD_SIZE = _DIGEST_SIZE + 1
+CATEGORIES = {1: 'debian_weak', 2: 'compromised'}
+_CATEGORY_IDS = {name: category for category, name in CATEGORIES.items()}
+
+
+def compile_blocklist(sources: Dict[str, str], output_path: str) -> int:
+    """Compile ``{category: hex digest file}`` into a sorted blocklist file"""
+    records: Dict[bytes, int] = {}
+    for category, path in sources.items():
+        category_id = _CATEGORY_IDS[category]
+        with open(path, encoding='ascii') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                digest = bytes.fromhex(line)
+                if len(digest) != _DIGEST_SIZE:
+                    raise ValueError(f"{path}: not a SHA-256 digest: {line}")
+                records.setdefault(digest, category_id)
+
+    tmp_path = f"{output_path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(tmp_path, 'wb') as out:
+        out.write(_HEADER.pack(MAGIC, len(records)))
+        out.write(b''.join(digest + bytes((records[digest],)) for digest in sorted(records)))
+    os.replace(tmp_path, output_path)
+    return len(records)
+
+
+class KeyBlocklist:
+    """Read-only view over a compiled blocklist, reloaded when the file changes"""
+
+    def __init__(self, path: Optional[str] = None, reload_check_interval: Optional[float] = None):
+        self.path = path or KEY_STRENGTH_CONFIG['blocklist_path']
+        self.reload_check_interval = (
+            KEY_STRENGTH_CONFIG['reload_check_interval'] if reload_check_interval is None
+            else reload_check_interval
+        )
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._signature = None
+        self._checked_at = 0.0
+        self._load()
+
+    @property
+    def available(self) -> bool:
+        return self._mmap is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _load(self) -> None:
+        self._checked_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._mmap, self._count, self._signature = None, 0, None
+            return
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._signature:
+            return
+
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or len(mapped) != _HEADER.size + count * _RECORD_SIZE:
+            mapped.close()
+            logger.error(f"Invalid key blocklist: {self.path}")
+            return
+        self._mmap, self._count, self._signature = mapped, count, signature
+
+    def lookup(self, digest: bytes) -> Optional[str]:
+        """Category of a blocklisted SPKI SHA-256, or None"""
+        if time.monotonic() - self._checked_at >= self.reload_check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.reload_check_interval:
+                    self._load()
+        mapped, count = self._mmap, self._count
+        if mapped is None:
+            return None
+
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = _HEADER.size + mid * _RECORD_SIZE
+            candidate = mapped[offset:offset + _DIGEST_SIZE]
+            if candidate == digest:
+                return CATEGORIES.get(mapped[offset + _DIGEST_SIZE], 'blocklisted')
+            if candidate < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+
+class KeyStrengthChecker:
+    """Per-certificate key parameter and blocklist checks"""
+
+    def __init__(self, blocklist: Optional[KeyBlocklist] = None):
+        self.blocklist = blocklist or KeyBlocklist()
+
+    def inspect(self, leaf_der: bytes, spki_sha256: Optional[str] = None) -> Dict[str, Any]:
+        if not leaf_der or not KEY_STRENGTH_AVAILABLE:
+            return {}
+
+        try:
+            leaf = x509.load_der_x509_certificate(leaf_der)
+            public_key = leaf.public_key()
+        except (ValueError, TypeError) as e:  # malformed DER or unsupported key algorithm
+            return {'key_weaknesses': [], 'key_check_error': str(e) or type(e).__name__}
+        weaknesses = []
+        info: Dict[str, Any] = {'key_type': type(public_key).__name__.replace('PublicKey', '')}
+
+        if isinstance(public_key, (rsa.RSAPublicKey, dsa.DSAPublicKey)):
+            info['key_size'] = public_key.key_size
+            info['key_type'] = 'RSA' if isinstance(public_key, rsa.RSAPublicKey) else 'DSA'
+            if public_key.key_size < KEY_STRENGTH_CONFIG['min_rsa_bits']:
+                weaknesses.append('rsa_too_small' if info['key_type'] == 'RSA' else 'dsa_too_small')
+        elif isinstance(public_key, ec.EllipticCurvePublicKey):
+            info.update(key_type='EC', key_size=public_key.key_size, key_curve=public_key.curve.name)
+            if public_key.curve.name not in KEY_STRENGTH_CONFIG['allowed_curves']:
+                weaknesses.append('weak_curve')
+
+        try:
+            hash_algorithm = leaf.signature_hash_algorithm
+            info['signature_hash'] = hash_algorithm.name if hash_algorithm else None
+        except Exception:  # unsupported signature algorithm OID
+            info['signature_hash'] = None
+        if info['signature_hash'] in KEY_STRENGTH_CONFIG['weak_signature_hashes']:
+            weaknesses.append('weak_signature_hash')
+
+        if spki_sha256:
+            category = self.blocklist.lookup(bytes.fromhex(spki_sha256))
+            info['key_blocklisted'] = category
+            if category:
+                weaknesses.append(category)
+
+        info['key_weaknesses'] = weaknesses
+        return info
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 3 and sys.argv[1] == 'compile':
+        sources = dict(arg.split(':', 1) for arg in sys.argv[2:])
+        output = KEY_STRENGTH_CONFIG['blocklist_path']
+        print(f"{compile_blocklist(sources, output)} keys written to {output}")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'lookup':
+        print(KeyBlocklist().lookup(bytes.fromhex(sys.argv[2])))
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -1,30 +1,44 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, HttpUrl
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, HttpUrl
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 import asyncio
 from datetime import datetime
 import os
 
 from ssl_analyzer import SSLAnalyzer
-try:
-    from report_generator_tsc import create_tsc_style_pdf_report
-    PDF_GENERATION_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: PDF generation not available: {e}")
-    PDF_GENERATION_AVAILABLE = False
-    def create_tsc_style_pdf_report(data):
-        return b"PDF generation not available - WeasyPrint dependencies missing"
+from report_cache import REPORT_MEDIA_TYPES, ReportCache
+from report_export import ExportBatches, stream_report_zip
+from analysis_store import EXPORT_FORMATS, AnalysisStore, export_stream
+from domain_history import DomainHistory, history_point
+from analysis_model import AnalysisRecord, SSLGrade, StoredAnalysis
+from rules_engine import available_versions, load_ruleset
+from regrade import RegradeJob
+from portfolios import PortfolioStore
+from alerts import AlertDispatcher, AlertStore, portfolio_calendar
 from ssl_analysis_service import SSLAnalysisService
 from business_impact_service import BusinessImpactService
-from error_handling import ErrorHandler, URLValidator, ValidationError
+from error_handling import AdmissionError, ErrorHandler, URLValidator, ValidationError
+from admission import AdmissionController
+from deadline import Deadline
+from service_scanner import ServiceTarget, default_service_targets
+from config import SERVICE_SCAN_CONFIG, EXPORT_CONFIG, ALERT_CONFIG
+from metrics import metrics
+from responses import APIResponse, CompressionMiddleware, ContentNegotiationMiddleware
 from config import API_CONFIG
 
-# 분석 결과를 저장할 메모리 저장소 (실제로는 데이터베이스를 사용해야 함)
-analysis_results = {}
+# 분석 결과 저장소 (SQLite - 재시작 후에도 보고서/내보내기 가능)
+analysis_results = AnalysisStore()
+# 도메인별 등급/점수/만료 시계열 (델타 인코딩, 대시보드 추이 차트용)
+domain_history = DomainHistory()
+# 포트폴리오(테넌트 도메인 그룹)별 대시보드 집계 - 분석 저장 시 증분 갱신
+portfolio_store = PortfolioStore()
+# 인증서 만료 알림 (테넌트별 다이제스트, 아웃박스 기반 재시도 전송)
+alert_store = AlertStore()
+alert_dispatcher = AlertDispatcher(alert_store, portfolio_store)
 
 # Initialize services
 ssl_analysis_service = SSLAnalysisService()
@@ -33,7 +47,9 @@ business_impact_service = BusinessImpactService()
 app = FastAPI(
     title="원클릭 SSL체크 API",
     description="웹사이트 SSL/TLS 보안을 원클릭으로 분석하고 보고서를 생성하는 API",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson 직렬화, Accept: application/msgpack 요청에는 msgpack 응답
+    default_response_class=APIResponse
 )
 
 # CORS 설정
@@ -45,6 +61,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 응답 압축 (Brotli/gzip, 최소 크기 이상만) 및 msgpack 협상
+app.add_middleware(ContentNegotiationMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 # Mount static files
 import os
 if os.path.exists("static"):
@@ -55,6 +75,37 @@ if os.path.exists("public"):
 # 요청/응답 모델
 class AnalyzeRequest(BaseModel):
     url: HttpUrl
+    # 분석 시간 예산(초) 또는 프로필(fast/standard/thorough) - 둘 다 없으면 기본값
+    budget: Optional[float] = Field(None, gt=0)
+    profile: Optional[str] = None
+
+class ServiceScanRequest(BaseModel):
+    domain: str
+    # "host:port/protocol" 목록 (예: "mail.example.com:587/submission"), 없으면 HTTPS + 메일 기본 세트
+    services: Optional[List[str]] = None
+    budget: Optional[float] = Field(None, gt=0)
+    profile: Optional[str] = None
+
+class ExportRequest(BaseModel):
+    report_ids: List[str] = Field(..., min_length=1)
+    formats: List[str] = ["pdf"]
+
+class RegradeRequest(BaseModel):
+    rules_version: int = Field(..., ge=1)
+    # True: 저장된 체크포인트를 무시하고 처음부터 다시 스캔
+    restart: bool = False
+
+class PortfolioRequest(BaseModel):
+    name: str = Field(..., min_length=1)
+    domains: List[str] = []
+
+class PortfolioDomainsRequest(BaseModel):
+    domains: List[str] = Field(..., min_length=1)
+
+class AlertChannelRequest(BaseModel):
+    # webhook / slack (Slack 호환 수신 웹훅) / email
+    kind: str
+    target: str
 
 class SecurityIssue(BaseModel):
     type: str
@@ -79,6 +130,33 @@ class AnalyzeResponse(BaseModel):
 
 # 전역 인스턴스
 ssl_analyzer = SSLAnalyzer()
+admission_controller = AdmissionController()
+# 보고서 렌더링 프로세스 풀 + 디스크 캐시
+report_cache = ReportCache()
+export_batches = ExportBatches()
+# 채점 규칙 버전별 재채점 작업 (백그라운드 스레드 + 프로세스 풀)
+regrade_jobs: Dict[int, Tuple[RegradeJob, asyncio.Task]] = {}
+# 만료 알림 주기 작업 (스윕 -> 다이제스트 -> 아웃박스 전송)
+alert_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def startup():
+    """저장된 분석에서 키 재사용 인덱스 복원, 만료 알림 주기 작업 시작 (미전송 아웃박스는 재시작 후 이어서 전송)"""
+    global alert_task
+    await asyncio.to_thread(ssl_analyzer.key_reuse_index.backfill, analysis_results.iter_fingerprints())
+    if ALERT_CONFIG["enabled"]:
+        alert_task = asyncio.create_task(alert_dispatcher.run_forever())
+
+@app.on_event("shutdown")
+async def shutdown():
+    """공유 HTTP 연결 풀 및 보고서 렌더링 워커 정리, 재채점 작업은 체크포인트에서 중단"""
+    await ssl_analyzer.close()
+    report_cache.shutdown()
+    for job, _ in regrade_jobs.values():
+        job.stop()
+    if alert_task is not None:
+        alert_task.cancel()
+    await alert_dispatcher.close()
 
 @app.get("/")
 async def root():
@@ -87,332 +165,449 @@ async def root():
         return FileResponse("static/index.html")
     return {"message": "원클릭 SSL체크 API", "version": "1.0.0"}
 
-@app.post("/api/v1/analyze", response_model=AnalyzeResponse)
-async def analyze_website(request: AnalyzeRequest):
+# 응답 스키마는 문서에만 사용 (반환 dict를 모델로 다시 검증/직렬화하지 않음)
+@app.post("/api/v1/analyze", responses={200: {"model": AnalyzeResponse}})
+async def analyze_website(
+    request: AnalyzeRequest,
+    http_request: Request,
+    x_api_key: Optional[str] = Header(None)
+):
     """웹사이트 보안 분석을 수행합니다."""
     url = str(request.url)
     analysis_id = str(uuid.uuid4())
     
+    # 요청 한도 및 동시 처리 수 제한 (429/503 + Retry-After), 등록된 API 키만 키별 한도/등급 레인 적용
+    client_key = admission_controller.client_key(
+        x_api_key, http_request.client.host if http_request.client else None
+    )
+    lane = admission_controller.resolve_lane(x_api_key)
+    
+    try:
+        async with admission_controller.admit(client_key, lane):
+            return await _run_analysis(url, analysis_id, request.budget, request.profile)
+    except AdmissionError as e:
+        raise ErrorHandler.handle_admission_error(e)
+
+async def _run_analysis(url: str, analysis_id: str, budget: Optional[float] = None,
+                        profile: Optional[str] = None) -> Dict[str, Any]:
+    """분석 파이프라인 실행 및 결과 저장"""
     try:
         # URL 검증
         URLValidator.validate_url(url)
         
-        # 실제 SSL 분석 수행
-        ssl_result = await ssl_analyzer.analyze(url)
+        # 실제 SSL 분석 수행 (요청별 시간 예산 적용)
+        deadline = Deadline.for_request(budget, profile)
+        ssl_result = await ssl_analyzer.analyze(url, deadline)
         
-        # 보안 점수 계산
-        security_score = ssl_analysis_service.calculate_security_score(ssl_result)
-        
-        # 문제점 추출
-        issues = ssl_analysis_service.extract_security_issues(ssl_result)
-        
-        # 비즈니스 영향 계산
-        business_impact = business_impact_service.calculate_business_impact(
-            security_score, ssl_result, issues
-        )
+        # 등급/보안 점수/문제점/비즈니스 영향/권장사항을 활성 채점 규칙으로 한 번에 계산
+        evaluation = load_ruleset().evaluate(ssl_result)
+        ssl_result["ssl_grade"] = evaluation.ssl_grade
         
-        # 개선 권장사항 생성
-        recommendations = business_impact_service.generate_business_recommendations(
-            ssl_result, issues
+        # 분석 결과를 타입 모델로 변환하여 저장 (PDF 생성을 위한 원본 SSL 결과 포함)
+        stored = StoredAnalysis(
+            id=analysis_id,
+            url=url,
+            created_at=datetime.now().isoformat(),
+            ssl_grade=SSLGrade(evaluation.ssl_grade),
+            security_score=evaluation.security_score,
+            issue_codes=evaluation.issue_codes,
+            business_impact=evaluation.business_impact,
+            recommendation_codes=evaluation.recommendation_codes,
+            result=AnalysisRecord.from_dict(ssl_result),
+            rules_version=evaluation.rules_version
         )
-        
-        # 응답 데이터 구성
-        response_data = {
-            "id": analysis_id,
-            "url": url,
-            "ssl_grade": ssl_result.get("ssl_grade", "F"),
-            "security_score": security_score,
-            "issues": issues,
-            "business_impact": business_impact,
-            "recommendations": recommendations,
-            "created_at": datetime.now().isoformat(),
-            "ssl_result": ssl_result  # PDF 생성을 위한 원본 SSL 결과 포함
-        }
-
-        # 분석 결과를 메모리에 저장 (실제로는 데이터베이스에 저장)
-        analysis_results[analysis_id] = response_data
+        analysis_results[analysis_id] = stored
+        if stored.result.domain:
+            # 인증서 만료일을 모르면 (연결 실패 등) 남은 일수는 0이 아닌 미확인으로 기록
+            domain_history.append(stored.result.domain, history_point(
+                stored.created_at, stored.ssl_grade, stored.security_score,
+                stored.result.days_until_expiry if stored.result.not_after else None, stored.result.ssl_status
+            ))
+            portfolio_store.record_analysis(stored)
         print(f"분석 결과 저장됨: {analysis_id} - {url}")
 
-        return response_data
+        # 응답에는 원본 결과를 싣지 않음 (응답 검증/직렬화 비용 절감)
+        return stored.to_response()
         
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise ErrorHandler.handle_analysis_error(e, analysis_id, url)
 
-@app.get("/api/v1/reports/{report_id}/html")
-async def get_report_html(report_id: str):
-    """분석 결과의 HTML 보고서를 반환합니다."""
-    from fastapi.responses import HTMLResponse
-    from report_generator_tsc import _generate_tsc_html_report, _get_tsc_html_template
+@app.post("/api/v1/analyze/services")
+async def analyze_services(
+    request: ServiceScanRequest,
+    http_request: Request,
+    x_api_key: Optional[str] = Header(None)
+):
+    """도메인의 여러 TLS 서비스(HTTPS, SMTP/IMAP STARTTLS, IMAPS, 사용자 지정 포트)를 동시에 분석합니다."""
+    domain = request.domain.strip().lower()
     
     try:
-        # 저장된 분석 결과 조회
-        if report_id not in analysis_results:
-            raise HTTPException(status_code=404, detail=f"분석 결과가 존재하지 않습니다: {report_id}")
-
-        saved_result = analysis_results[report_id]
-        ssl_result = saved_result.get("ssl_result", {})
-
-        # HTML용 데이터 구성 (템플릿과 키 이름 일치)
-        analysis_data = {
-            "domain": ssl_result.get("domain", saved_result.get("url", "").replace("https://", "").replace("http://", "")),
-            "analysis_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "ssl_grade": ssl_result.get("ssl_grade", "F"),
-            "security_score": saved_result.get("security_score", 0),
-            "certificate_valid": ssl_result.get("certificate_valid", False),
-            "days_until_expiry": ssl_result.get("days_until_expiry", 0),
-            "missing_headers": ssl_result.get("missing_security_headers", []),
-            "annual_revenue_loss": 50000000,  # 기본값
-            "server_info": {"software": "nginx"},  # 기본값
-            "redirects_https": ssl_result.get("ssl_grade", "F") != "F",
-            "response_headers": {}
-        }
-
-        # HTML 생성
-        html_content = _generate_tsc_html_report(analysis_data)
-        
-        return HTMLResponse(content=html_content)
-        
-    except Exception as e:
-        print(f"HTML 생성 오류: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"HTML 생성 중 오류가 발생했습니다: {str(e)}")
-
-@app.get("/api/v1/reports/{report_id}/download")
-async def download_report(report_id: str):
-    """HTML 보고서로 리다이렉트 - 사용자가 브라우저 인쇄 기능으로 PDF 다운로드 가능"""
-    from fastapi.responses import RedirectResponse
-    print(f"HTML 보고서 리다이렉트: {report_id}")
+        URLValidator.validate_url(f"https://{domain}")
+        if request.services:
+            targets = [ServiceTarget.parse(spec, domain) for spec in request.services]
+        else:
+            targets = default_service_targets(domain)
+        targets = list(dict.fromkeys(targets))
+        if len(targets) > SERVICE_SCAN_CONFIG['max_services']:
+            raise ValidationError(f"한 번에 최대 {SERVICE_SCAN_CONFIG['max_services']}개 서비스까지 분석할 수 있습니다")
+        deadline = Deadline.for_request(request.budget, request.profile)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    client_key = admission_controller.client_key(
+        x_api_key, http_request.client.host if http_request.client else None
+    )
+    lane = admission_controller.resolve_lane(x_api_key)
     
-    # HTML 보고서로 리다이렉트
-    return RedirectResponse(url=f"/api/v1/reports/{report_id}/html")
-
-@app.post("/api/v1/reports/generate-pdf")
-async def generate_pdf_report(request: dict):
-    """HTML 보고서 생성 (옵션널 - 서버사이드 PDF 생성용)."""
     try:
-        analysis_data = request.get("analysis_data", {})
-        from report_generator_tsc import _generate_tsc_html_report
-        html_content = _generate_tsc_html_report(analysis_data)
-
-        return {
-            "success": True,
-            "html_size": len(html_content),
-            "message": "HTML 보고서 생성 완료 - 브라우저 인쇄 기능을 사용하세요"
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e)
-        }
-
-def calculate_security_score(ssl_result: dict) -> int:
-    """실제 SSL 분석 결과를 바탕으로 보안 점수를 계산합니다 (TSC 보고서 기준)."""
+        async with admission_controller.admit(client_key, lane):
+            scan = await ssl_analyzer.analyze_services(domain, targets, deadline)
+    except AdmissionError as e:
+        raise ErrorHandler.handle_admission_error(e)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # SSL 상태에 따른 기본 점수
-    ssl_status = ssl_result.get('ssl_status', 'connection_error')
+    # 서비스별 결과는 단일 분석과 같은 형태이므로 동일한 점수/문제점 계산을 적용
+    for service_result in scan['services']:
+        service_result['security_score'] = ssl_analysis_service.calculate_security_score(service_result)
+        service_result['issues'] = ssl_analysis_service.extract_security_issues(service_result)
     
-    if ssl_status == 'no_ssl' or not ssl_result.get('port_443_open', False):
-        # TSC 보고서: SSL 서비스 완전 부재
-        return 0
-    elif ssl_status == 'expired':
-        return 10  # 만료된 인증서
-    elif ssl_status == 'self_signed':
-        return 25  # 자체 서명 인증서
-    elif ssl_status == 'verify_failed':
-        return 30  # 인증서 검증 실패
-    elif ssl_status == 'valid':
-        # 정상 SSL 인증서의 경우 등급에 따른 점수
-        ssl_grade = ssl_result.get("ssl_grade", "B")
-        grade_scores = {"A+": 95, "A": 90, "A-": 85, "B": 75, "C": 60, "D": 40}
-        score = grade_scores.get(ssl_grade, 40)
-        
-        # 보안 헤더 상태 반영
-        missing_headers = ssl_result.get("missing_security_headers", [])
-        score -= len(missing_headers) * 3
-        
-        # 인증서 만료 임박도
-        days_until_expiry = ssl_result.get('days_until_expiry', 0)
-        if days_until_expiry < 30:
-            score -= 10
-        
-        return max(0, score)
-    else:
-        return 0  # 연결 오류
+    return scan
 
-def extract_issues(ssl_result: dict) -> List[dict]:
-    """SSL 분석 결과에서 보안 문제를 추출합니다 (TSC 보고서 기준)."""
-    print(ssl_result)
-    issues = []
-    
-    ssl_status = ssl_result.get('ssl_status', 'connection_error')
-    
-    # 1. SSL 서비스 완전 부재 (TSC 보고서 주요 문제)
-    if ssl_status == 'no_ssl' or not ssl_result.get('port_443_open', False):
-        issues.append({
-            "type": "ssl_service",
-            "severity": "critical",
-            "title": "HTTPS 서비스 완전 부재",
-            "description": "443 포트가 닫혀있어 HTTPS 서비스가 전혀 제공되지 않습니다."
-        })
-        issues.append({
-            "type": "data_encryption",
-            "severity": "critical",
-            "title": "모든 데이터 평문 전송",
-            "description": "암호화 없이 모든 데이터가 평문으로 전송되어 도청 위험에 노출됩니다."
-        })
-        issues.append({
-            "type": "browser_warning",
-            "severity": "high",
-            "title": "브라우저 보안 경고",
-            "description": "모든 브라우저에서 '안전하지 않음' 경고 메시지가 표시됩니다."
-        })
-    
-    # 2. 만료된 인증서
-    if ssl_status == 'expired':
-        issues.append({
-            "type": "certificate",
-            "severity": "critical",
-            "title": "SSL 인증서 만료",
-            "description": "SSL 인증서가 만료되어 브라우저에서 보안 경고를 표시합니다."
-        })
-    
-    # 3. 자체 서명 인증서
-    if ssl_status == 'self_signed':
-        issues.append({
-            "type": "certificate",
-            "severity": "high",
-            "title": "자체 서명 인증서",
-            "description": "신뢰할 수 있는 인증기관에서 발급하지 않은 인증서로, 브라우저에서 경고를 표시합니다."
-        })
-
-    # 4. 인증서 검증 실패
-    if ssl_status == 'verify_failed':
-        issues.append({
-            "type": "certificate",
-            "severity": "critical",
-            "title": "SSL 인증서 검증 실패",
-            "description": "브라우저에서 SSL 인증서를 신뢰할 수 없습니다. 인증 기관이 유효하지 않거나 체인이 불완전합니다."
-        })
-
-    # 5. 보안 헤더 누락 (정상 SSL인 경우에도 체크)
-    missing_headers = ssl_result.get("missing_security_headers", [])
-    for header in missing_headers:
-        issues.append({
-            "type": "security_header",
-            "severity": "medium",
-            "title": f"{header} 헤더 누락",
-            "description": f"{header} 보안 헤더가 설정되지 않았습니다."
-        })
-    
-    # 5. 인증서 만료 임박 (정상 SSL인 경우에만 체크)
-    if ssl_status == 'valid':
-        days_until_expiry = ssl_result.get('days_until_expiry', 0)
-        if 0 < days_until_expiry < 30:
-            issues.append({
-                "type": "certificate",
-                "severity": "medium",
-                "title": "SSL 인증서 만료 임박",
-                "description": f"SSL 인증서가 {days_until_expiry}일 후에 만료됩니다."
-            })
-    
-    return issues
+@app.get("/api/v1/domains/{domain}/history")
+async def get_domain_history(domain: str, from_: Optional[str] = Query(None, alias="from"),
+                             to: Optional[str] = None, resolution: str = "auto"):
+    """도메인의 등급/보안 점수/만료일 추이를 반환합니다 (기간 필터, raw/hour/day/week/month 다운샘플링)."""
+    try:
+        history = domain_history.query(domain, from_, to, resolution)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not history["count"] and domain not in domain_history:
+        raise HTTPException(status_code=404, detail=f"도메인 이력이 존재하지 않습니다: {domain}")
+    return history
 
-def calculate_business_impact(security_score: int, ssl_result: dict, issues: List[dict]) -> dict:
-    """보안 점수와 SSL 분석 결과를 바탕으로 비즈니스 영향을 계산합니다 (TSC 보고서 기준)."""
-    
-    ssl_status = ssl_result.get('ssl_status', 'connection_error')
-    
-    # TSC 보고서를 참고한 비즈니스 영향 계산
-    if ssl_status == 'no_ssl' or not ssl_result.get('port_443_open', False):
-        # SSL 서비스 완전 부재 - TSC 보고서 수치 사용
-        return {
-            "revenue_loss_annual": 1_008_000_000,  # TSC: 10.08억원
-            "seo_impact": 35,  # 30-40% 하락 (보고서 기준)
-            "user_trust_impact": 80  # 70-90% 이탈률 (보고서 기준)
-        }
-    
-    elif ssl_status == 'expired':
-        # 만료된 SSL 인증서
-        return {
-            "revenue_loss_annual": 600_000_000,  # 6억원
-            "seo_impact": 25,
-            "user_trust_impact": 70
-        }
-    
-    elif ssl_status == 'self_signed':
-        # 자체 서명 인증서
-        return {
-            "revenue_loss_annual": 400_000_000,  # 4억원
-            "seo_impact": 20,
-            "user_trust_impact": 60
-        }
+def _regrade_status(rules_version: int) -> Dict[str, Any]:
+    job_task = regrade_jobs.get(rules_version)
+    task = job_task[1] if job_task else None
+    status = {
+        "rules_version": rules_version,
+        "running": task is not None and not task.done(),
+        **(analysis_results.regrade_state(rules_version) or {})
+    }
+    if task is not None and task.done() and not task.cancelled() and task.exception():
+        status["error"] = str(task.exception())
+    return status
+
+def _run_regrade(job: RegradeJob, restart: bool) -> Dict[str, Any]:
+    state = job.run(restart)
+    # 등급이 바뀌었으므로 포트폴리오 집계를 저장소 기준으로 다시 계산
+    if state.get("finished_at"):
+        portfolio_store.rebuild(analysis_results)
+    return state
+
+@app.post("/api/v1/regrade", status_code=202)
+async def start_regrade(request: RegradeRequest, x_api_key: Optional[str] = Header(None)):
+    """저장된 분석 결과를 지정한 채점 규칙 버전으로 재채점합니다 (batch 등급 API 키 필요, 재점검 없음, 중단 시 이어서 진행)."""
+    _require_batch_key(x_api_key)
+    version = request.rules_version
+    if version not in available_versions():
+        raise HTTPException(status_code=404, detail=f"채점 규칙 버전이 존재하지 않습니다: {version}")
+    running = regrade_jobs.get(version)
+    if running and not running[1].done():
+        raise HTTPException(status_code=409, detail=f"규칙 버전 {version} 재채점이 이미 진행 중입니다")
     
-    elif ssl_status == 'valid':
-        # 정상 SSL - 보안 점수에 따른 세분화된 영향
-        base_revenue = 1_000_000_000
-        loss_rate = max(0, (100 - security_score) / 100 * 0.15)  # 최대 15% 손실
-        revenue_loss = int(base_revenue * loss_rate)
-        
-        seo_impact = max(0, (100 - security_score) // 15)  # 최대 6% 하락
-        user_trust_impact = max(0, (100 - security_score) // 3)  # 최대 33% 영향
-        
-        return {
-            "revenue_loss_annual": revenue_loss,
-            "seo_impact": seo_impact,
-            "user_trust_impact": user_trust_impact
-        }
+    job = RegradeJob(analysis_results, version)
+    regrade_jobs[version] = (job, asyncio.create_task(asyncio.to_thread(_run_regrade, job, request.restart)))
+    return _regrade_status(version)
+
+@app.get("/api/v1/regrade/{rules_version}")
+async def get_regrade_status(rules_version: int):
+    """재채점 작업 진행 상황 (체크포인트, 처리 건수, 실행 여부)을 반환합니다."""
+    return _regrade_status(rules_version)
+
+def _tenant(api_key: Optional[str]) -> Optional[str]:
+    """등록된 API 키만 테넌트로 인정 (키 없음: 테넌트 없음, 미등록 키: 401)
     
+    테넌트 ID는 키의 해시이며 키 자체는 저장하지 않습니다.
+    """
+    if not api_key:
+        return None
+    tenant = admission_controller.tenant_id(api_key)
+    if tenant is None:
+        raise HTTPException(status_code=401, detail="등록되지 않은 API 키입니다")
+    return tenant
+
+def _require_tenant(x_api_key: Optional[str]) -> str:
+    tenant = _tenant(x_api_key)
+    if tenant is None:
+        raise HTTPException(status_code=401, detail="등록된 API 키(X-API-Key 헤더)가 필요합니다")
+    return tenant
+
+def _require_batch_key(x_api_key: Optional[str]) -> None:
+    """저장소 전체를 다루는 작업은 batch 등급의 등록된 API 키만 허용"""
+    tier = admission_controller.authenticate(x_api_key)
+    if tier is None:
+        raise HTTPException(status_code=401, detail="등록된 API 키(X-API-Key 헤더)가 필요합니다")
+    if tier != "batch":
+        raise HTTPException(status_code=403, detail="batch 등급 API 키가 필요합니다")
+
+def _get_portfolio(portfolio_id: str, tenant: Optional[str]) -> Dict[str, Any]:
+    portfolio = portfolio_store.get(portfolio_id, tenant)
+    if portfolio is None:
+        raise HTTPException(status_code=404, detail=f"포트폴리오가 존재하지 않습니다: {portfolio_id}")
+    return portfolio
+
+@app.post("/api/v1/portfolios", status_code=201)
+async def create_portfolio(request: PortfolioRequest, x_api_key: Optional[str] = Header(None)):
+    """도메인 포트폴리오를 생성합니다 (등록된 API 키 필요, 해당 테넌트 소유)."""
+    try:
+        portfolio = portfolio_store.create(request.name, request.domains, tenant=_require_tenant(x_api_key))
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**portfolio, "domains": portfolio_store.domains(portfolio["id"])}
+
+@app.get("/api/v1/portfolios/{portfolio_id}")
+async def get_portfolio(portfolio_id: str, x_api_key: Optional[str] = Header(None)):
+    """포트폴리오 정보와 등록된 도메인 목록을 반환합니다."""
+    portfolio = _get_portfolio(portfolio_id, _require_tenant(x_api_key))
+    return {**portfolio, "domains": portfolio_store.domains(portfolio_id)}
+
+@app.post("/api/v1/portfolios/{portfolio_id}/domains")
+async def add_portfolio_domains(portfolio_id: str, request: PortfolioDomainsRequest,
+                                x_api_key: Optional[str] = Header(None)):
+    """포트폴리오에 도메인을 추가합니다 (이미 분석된 도메인은 즉시 집계에 반영)."""
+    _get_portfolio(portfolio_id, _require_tenant(x_api_key))
+    try:
+        added = portfolio_store.add_domains(portfolio_id, request.domains)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"portfolio_id": portfolio_id, "added": added}
+
+@app.delete("/api/v1/portfolios/{portfolio_id}/domains/{domain}")
+async def remove_portfolio_domain(portfolio_id: str, domain: str, x_api_key: Optional[str] = Header(None)):
+    """포트폴리오에서 도메인을 제거합니다."""
+    _get_portfolio(portfolio_id, _require_tenant(x_api_key))
+    try:
+        removed = portfolio_store.remove_domains(portfolio_id, [domain])
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"포트폴리오에 없는 도메인입니다: {domain}")
+    return {"portfolio_id": portfolio_id, "removed": domain}
+
+@app.get("/api/v1/portfolios/{portfolio_id}/summary")
+async def get_portfolio_summary(portfolio_id: str, x_api_key: Optional[str] = Header(None)):
+    """포트폴리오 대시보드 요약 (등급 분포, 만료 임박 인증서, 누락 보안 헤더, 예상 연간 매출 손실)을 반환합니다."""
+    portfolio = _get_portfolio(portfolio_id, _require_tenant(x_api_key))
+    return {"name": portfolio["name"], **portfolio_store.summary(portfolio_id)}
+
+@app.post("/api/v1/portfolios/{portfolio_id}/calendar-token")
+async def issue_calendar_token(portfolio_id: str, x_api_key: Optional[str] = Header(None)):
+    """캘린더 앱용 iCal 피드 토큰을 발급합니다 (이 포트폴리오 피드 읽기 전용, 재발급 시 이전 토큰 무효)."""
+    _get_portfolio(portfolio_id, _require_require_tenant(x_api_key))
+    token = portfolio_store.issue_feed_token(portfolio_id)
+    return {"portfolio_id": portfolio_id, "token": token,
+            "calendar_url": f"/api/v1/portfolios/{portfolio_id}/calendar.ics?token={token}"}
+
+@app.get("/api/v1/portfolios/{portfolio_id}/calendar.ics")
+async def get_portfolio_calendar(portfolio_id: str, token: Optional[str] = None,
+                                 x_api_key: Optional[str] = Header(None)):
+    """포트폴리오 도메인의 인증서 만료 예정일을 iCal 피드로 반환합니다 (캘린더 앱은 피드 토큰 쿼리 파라미터 사용)."""
+    if token is not None:
+        # API 키는 URL에 싣지 않음 - 피드 전용 토큰만 허용
+        portfolio = portfolio_store.feed_portfolio(portfolio_id, token)
+        if portfolio is None:
+            raise HTTPException(status_code=404, detail=f"포트폴리오가 존재하지 않습니다: {portfolio_id}")
     else:
-        # 연결 오류 등
-        return {
-            "revenue_loss_annual": 800_000_000,  # 8억원
-            "seo_impact": 30,
-            "user_trust_impact": 75
-        }
-
-def generate_recommendations(ssl_result: dict, issues: List[dict]) -> List[str]:
-    """분석 결과를 바탕으로 개선 권장사항을 생성합니다 (TSC 보고서 기준)."""
-    recommendations = []
-    
-    ssl_status = ssl_result.get('ssl_status', 'connection_error')
-    
-    if ssl_status == 'no_ssl' or not ssl_result.get('port_443_open', False):
-        # TSC 보고서의 주요 권장사항
-        recommendations.append("긴급: SSL 인증서 설치 및 HTTPS 서비스 활성화 (오늘 실행)")
-        recommendations.append("필수: Let's Encrypt 무료 SSL 적용 (투자 0원)")
-        recommendations.append("권장: HTTP → HTTPS 자동 리다이렉션 설정 (이번 주)")
-        recommendations.append("장기: 보안 모니터링 체계 구축 (1개월)")
+        portfolio = _get_portfolio(portfolio_id, _require_tenant(x_api_key))
+    calendar = portfolio_calendar(portfolio_store, portfolio_id, portfolio["name"])
+    return Response(content=calendar, media_type="text/calendar; charset=utf-8")
+
+@app.post("/api/v1/alerts/channels", status_code=201)
+async def add_alert_channel(request: AlertChannelRequest, x_api_key: Optional[str] = Header(None)):
+    """테넌트의 만료 알림 채널(webhook, Slack 호환 웹훅, 이메일)을 등록합니다."""
+    tenant = _require_tenant(x_api_key)
+    try:
+        # 대상 호스트 주소 확인(DNS 조회)이 포함되므로 이벤트 루프 밖에서 실행
+        return await asyncio.to_thread(alert_store.add_channel, tenant, request.kind, request.target)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/alerts/channels")
+async def list_alert_channels(x_api_key: Optional[str] = Header(None)):
+    """등록된 알림 채널 목록을 반환합니다."""
+    return {"channels": alert_store.channels(_require_tenant(x_api_key))}
+
+@app.delete("/api/v1/alerts/channels/{channel_id}")
+async def remove_alert_channel(channel_id: int, x_api_key: Optional[str] = Header(None)):
+    """알림 채널을 삭제합니다 (해당 채널의 미전송 알림도 함께 삭제)."""
+    if not alert_store.remove_channel(_require_tenant(x_api_key), channel_id):
+        raise HTTPException(status_code=404, detail=f"알림 채널이 존재하지 않습니다: {channel_id}")
+    return {"removed": channel_id}
+
+@app.get("/api/v1/alerts/outbox")
+async def get_alert_outbox(status: Optional[str] = None, limit: int = Query(100, ge=1, le=1000),
+                           x_api_key: Optional[str] = Header(None)):
+    """알림 다이제스트 전송 현황 (대기/완료/실패, 시도 횟수, 마지막 오류)을 반환합니다."""
+    return {"outbox": alert_store.outbox(_require_tenant(x_api_key), status, limit)}
+
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    """운영 지표 (TLS 세션 재개, 스케줄러/동시 처리 현황)를 반환합니다."""
+    return {
+        "counters": metrics.snapshot(),
+        "tls_session_cache_entries": len(ssl_analyzer.session_cache),
+        "scheduler": ssl_analyzer.scheduler.stats(),
+        "admission": admission_controller.stats()
+    }
+
+@app.get("/api/v1/key-reuse/top")
+async def get_top_reused_keys(limit: int = 20):
+    """가장 많은 도메인이 공유하는 공개 키(SPKI) 목록을 반환합니다."""
+    return {
+        "indexed_domains": len(ssl_analyzer.key_reuse_index),
+        "keys": ssl_analyzer.key_reuse_index.top_reused_keys(min(max(limit, 1), 100))
+    }
+
+@app.get("/api/v1/key-reuse/spki/{spki_sha256}")
+async def get_domains_for_key(spki_sha256: str):
+    """주어진 SPKI SHA-256을 사용하는 도메인 목록을 반환합니다."""
+    domains = ssl_analyzer.key_reuse_index.domains_for_key(spki_sha256)
+    if not domains:
+        raise HTTPException(status_code=404, detail="해당 키를 사용하는 도메인이 없습니다")
+    return {"spki_sha256": spki_sha256.lower(), "domains": domains}
+
+@app.get("/api/v1/key-reuse/cert/{cert_sha256}")
+async def get_domains_for_cert(cert_sha256: str):
+    """주어진 인증서 SHA-256 지문을 사용하는 도메인 목록을 반환합니다."""
+    domains = ssl_analyzer.key_reuse_index.domains_for_cert(cert_sha256)
+    if not domains:
+        raise HTTPException(status_code=404, detail="해당 인증서를 사용하는 도메인이 없습니다")
+    return {"cert_sha256": cert_sha256.lower(), "domains": domains}
+
+def _build_report_data(report_id: str) -> Dict[str, Any]:
+    """저장된 분석 결과로 보고서 렌더링 데이터 구성 (템플릿과 키 이름 일치)
     
-    elif ssl_status == 'expired':
-        recommendations.append("새로운 SSL 인증서를 즉시 발급하세요.")
-        recommendations.append("Let's Encrypt 자동 갱신 시스템을 설정하세요.")
+    같은 분석은 항상 같은 데이터가 되도록 분석 시각을 사용합니다 (보고서 캐시 키).
+    """
+    saved_result = analysis_results.get(report_id)
+    if saved_result is None:
+        raise HTTPException(status_code=404, detail=f"분석 결과가 존재하지 않습니다: {report_id}")
+
+    ssl_result = saved_result.get("ssl_result", {})
+    created_at = saved_result.get("created_at")
+    analysis_date = datetime.fromisoformat(created_at) if created_at else datetime.now()
+
+    return {
+        "domain": ssl_result.get("domain", saved_result.get("url", "").replace("https://", "").replace("http://", "")),
+        "analysis_date": analysis_date.strftime('%Y-%m-%d %H:%M:%S'),
+        "ssl_grade": ssl_result.get("ssl_grade", "F"),
+        "security_score": saved_result.get("security_score", 0),
+        "certificate_valid": ssl_result.get("certificate_valid", False),
+        "days_until_expiry": ssl_result.get("days_until_expiry", 0),
+        "missing_headers": ssl_result.get("missing_security_headers", []),
+        "issues": saved_result.get("issues", []),
+        "recommendations": saved_result.get("recommendations", []),
+        "annual_revenue_loss": 50000000,  # 기본값
+        "server_info": {"software": ssl_result.get("server_banner") or "확인 불가"},
+        "redirects_https": ssl_result.get("http_redirects_to_https", False),
+        "redirect_chain": (ssl_result.get("http_redirect_chain") or {}).get("chain", [])
+    }
+
+async def _render_report_file(kind: str, analysis_data: Dict[str, Any], filename: str) -> FileResponse:
+    """보고서 캐시에서 파일을 찾거나 프로세스 풀에서 렌더링 후 파일 그대로 전송"""
+    try:
+        path = await report_cache.get_or_render(kind, analysis_data)
+    except Exception as e:
+        print(f"보고서 생성 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"보고서 생성 중 오류가 발생했습니다: {str(e)}")
+    # PDF는 첨부 파일로, HTML은 브라우저에서 바로 표시
+    disposition = "attachment" if kind == "pdf" else "inline"
+    return FileResponse(path, media_type=REPORT_MEDIA_TYPES[kind], filename=filename,
+                        content_disposition_type=disposition)
+
+@app.get("/api/v1/reports/{report_id}/html")
+async def get_report_html(report_id: str):
+    """분석 결과의 HTML 보고서를 반환합니다."""
+    analysis_data = await asyncio.to_thread(_build_report_data, report_id)
+    return await _render_report_file("html", analysis_data, f"{analysis_data['domain']}_security_report.html")
+
+@app.get("/api/v1/reports/{report_id}/download")
+async def download_report(report_id: str):
+    """분석 결과의 PDF 보고서를 다운로드합니다 (서버 사이드 렌더링, 디스크 캐시)."""
+    analysis_data = await asyncio.to_thread(_build_report_data, report_id)
+    return await _render_report_file("pdf", analysis_data, f"{analysis_data['domain']}_security_report.pdf")
+
+@app.post("/api/v1/reports/generate-pdf")
+async def generate_pdf_report(request: dict):
+    """전달받은 분석 데이터로 PDF 보고서를 생성합니다."""
+    analysis_data = request.get("analysis_data", {})
+    if not isinstance(analysis_data, dict):
+        raise HTTPException(status_code=400, detail="analysis_data는 객체여야 합니다")
+    return await _render_report_file(
+        "pdf", analysis_data, f"{analysis_data.get('domain', 'report')}_security_report.pdf"
+    )
+
+@app.get("/api/v1/analyses/export")
+async def export_analyses(format: str = "csv", columns: Optional[str] = None,
+                          since: Optional[str] = None, until: Optional[str] = None,
+                          x_api_key: Optional[str] = Header(None)):
+    """저장된 분석 결과를 CSV/Arrow/Parquet으로 스트리밍합니다 (batch 등급 API 키 필요, 컬럼 선택, created_at 기간 필터)."""
+    _require_batch_key(x_api_key)
+    try:
+        chunks = export_stream(analysis_results, format, columns.split(",") if columns else None, since, until)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="analyses.{format}"'}
+    )
+
+@app.post("/api/v1/exports")
+async def create_export(request: ExportRequest):
+    """여러 분석 보고서를 한 번에 내려받을 ZIP 내보내기 배치를 생성합니다."""
+    formats = list(dict.fromkeys(request.formats))
+    unknown = [f for f in formats if f not in EXPORT_CONFIG['formats']]
+    if unknown or not formats:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {', '.join(unknown)}")
+    if len(request.report_ids) > EXPORT_CONFIG['max_reports']:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {EXPORT_CONFIG['max_reports']}개까지 내보낼 수 있습니다")
     
-    elif ssl_status == 'self_signed':
-        recommendations.append("신뢰할 수 있는 인증기관(CA)에서 SSL 인증서를 발급받으세요.")
-        recommendations.append("Let's Encrypt를 이용하여 무료로 인증서를 발급받을 수 있습니다.")
+    batch_id = export_batches.create(request.report_ids, formats)
+    return {
+        "batch_id": batch_id,
+        "report_count": len(set(request.report_ids)),
+        "formats": formats,
+        "download_url": f"/api/v1/exports/{batch_id}.zip"
+    }
+
+@app.get("/api/v1/exports/{batch_id}.zip")
+async def download_export(batch_id: str):
+    """내보내기 배치의 보고서들을 렌더링하며 ZIP으로 스트리밍합니다 (캐시된 보고서 재사용)."""
+    batch = export_batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"내보내기 배치가 존재하지 않거나 만료되었습니다: {batch_id}")
     
-    elif ssl_status == 'valid':
-        # 정상 SSL인 경우 세부 개선사항
-        missing_headers = ssl_result.get("missing_security_headers", [])
-        if missing_headers:
-            recommendations.append("누락된 보안 헤더들을 웹서버 설정에 추가하세요.")
-        
-        ssl_grade = ssl_result.get("ssl_grade", "B")
-        if ssl_grade in ["B", "C", "D"]:
-            recommendations.append("SSL 등급 A 이상 달성을 위해 TLS 1.3 지원 및 보안 설정을 강화하세요.")
-        
-        days_until_expiry = ssl_result.get('days_until_expiry', 0)
-        if 0 < days_until_expiry < 30:
-            recommendations.append("인증서 만료가 임박했습니다. 자동 갱신 시스템을 확인하세요.")
-        
-        if not missing_headers and ssl_grade in ['A+', 'A', 'A-']:
-            recommendations.append("현재 보안 설정이 우수합니다. 지속적인 모니터링을 권장합니다.")
+    # 존재 여부는 한 번의 쿼리로, 보고서 데이터(SQLite 조회 + 디코딩)는 이벤트 루프 밖에서 구성
+    stored = await asyncio.to_thread(analysis_results.existing_ids, batch['report_ids'])
+    found = [report_id for report_id in batch['report_ids'] if report_id in stored]
+    missing = [report_id for report_id in batch['report_ids'] if report_id not in stored]
     
-    else:
-        recommendations.append("서버 연결 문제를 해결한 후 SSL 인증서를 설치하세요.")
+    async def reports():
+        # 보고서 데이터는 스트리밍하면서 하나씩 구성
+        for report_id in found:
+            data = await asyncio.to_thread(_build_report_data, report_id)
+            safe_domain = "".join(c if c.isalnum() or c in ".-" else "_" for c in data["domain"]) or "report"
+            yield f"{safe_domain}_{report_id}", data
     
-    return recommendations
+    return StreamingResponse(
+        stream_report_zip(report_cache, reports(), batch['formats'], missing),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="securecheck_export_{batch_id}.zip"'}
+    )
 
 # PDF generation is handled by report_generator_tsc.py
 
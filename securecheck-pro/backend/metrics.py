@@ -0,0 +1,31 @@
+"""
+Metrics - Lightweight in-process counters for operational monitoring
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class MetricsRegistry:
+    """Thread-safe named counters (probes run in worker threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(value, 6) for name, value in sorted(self._counters.items())}
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,204 @@
+"""
+Politeness Scheduler - Per-target rate limiting for outbound probes
+"""
+
+import asyncio
+import ipaddress
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from config import POLITENESS_CONFIG
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, now: Optional[float] = None, tokens: float = 1.0) -> float:
+        """Return seconds until ``tokens`` are available (0 if available now)"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def consume(self, tokens: float = 1.0) -> None:
+        self.tokens -= tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Consume ``tokens`` if available; otherwise return seconds to wait"""
+        wait = self.wait_time(tokens=tokens)
+        if wait == 0.0:
+            self.consume(tokens)
+        return wait
+
+
+def subnet_key(ip: str) -> str:
+    """Group an address into its /24 (IPv4) or /48 (IPv6) network"""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    prefix = 24 if address.version == 4 else 48
+    return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+
+
+class PolitenessScheduler:
+    """Fair scheduler that limits how hard we hit any single IP or /24.
+
+    Every probe first acquires a slot for its resolved IP. A slot is granted
+    only when the per-IP and per-subnet token buckets both have a token and
+    the concurrency caps allow it. Waiting probes are queued per IP and
+    granted round-robin across IPs, so one large hosting provider cannot
+    starve probes for other targets.
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        config = {**POLITENESS_CONFIG, **(config or {})}
+        self.per_ip_rate = config['per_ip_rate']
+        self.per_ip_burst = config['per_ip_burst']
+        self.per_subnet_rate = config['per_subnet_rate']
+        self.per_subnet_burst = config['per_subnet_burst']
+        self.max_concurrency = config['max_concurrency']
+        self.max_per_ip_concurrency = config['max_per_ip_concurrency']
+        self.max_tracked_targets = config['max_tracked_targets']
+
+        self._ip_buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._subnet_buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._queues: 'OrderedDict[str, Deque[asyncio.Future]]' = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+        self._total_in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _bucket(self, buckets: 'OrderedDict[str, TokenBucket]', key: str,
+                rate: float, capacity: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, capacity)
+            # Idle buckets are full again after capacity/rate seconds, so
+            # evicting the least recently used ones loses no politeness.
+            while len(buckets) > self.max_tracked_targets:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def _try_grant(self, ip: str) -> float:
+        """Grant a slot for ``ip`` if possible; otherwise return seconds to wait"""
+        if self._in_flight.get(ip, 0) >= self.max_per_ip_concurrency:
+            return float('inf')  # released slots trigger a new dispatch
+
+        ip_bucket = self._bucket(self._ip_buckets, ip, self.per_ip_rate, self.per_ip_burst)
+        subnet_bucket = self._bucket(self._subnet_buckets, subnet_key(ip),
+                                     self.per_subnet_rate, self.per_subnet_burst)
+        now = time.monotonic()
+        wait = max(ip_bucket.wait_time(now), subnet_bucket.wait_time(now))
+        if wait > 0:
+            return wait
+
+        ip_bucket.consume()
+        subnet_bucket.consume()
+        self._in_flight[ip] = self._in_flight.get(ip, 0) + 1
+        self._total_in_flight += 1
+        return 0.0
+
+    def _dispatch(self) -> None:
+        """Hand out slots round-robin across IPs with queued probes"""
+        self._timer = None
+        next_wait = float('inf')
+
+        progressed = True
+        while progressed and self._queues and self._total_in_flight < self.max_concurrency:
+            progressed = False
+            for ip in list(self._queues):
+                if self._total_in_flight >= self.max_concurrency:
+                    break
+                queue = self._queues[ip]
+                while queue and queue[0].done():
+                    queue.popleft()  # cancelled waiter
+                if not queue:
+                    del self._queues[ip]
+                    continue
+
+                wait = self._try_grant(ip)
+                if wait > 0:
+                    next_wait = min(next_wait, wait)
+                    continue
+
+                queue.popleft().set_result(None)
+                progressed = True
+                # Move this IP to the back of the rotation
+                if queue:
+                    self._queues.move_to_end(ip)
+                else:
+                    del self._queues[ip]
+
+        if self._queues and next_wait != float('inf'):
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(next_wait, self._dispatch)
+
+    def _schedule_dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+    async def acquire(self, ip: str) -> None:
+        """Wait until a probe against ``ip`` may start"""
+        if not self._queues and self._total_in_flight < self.max_concurrency:
+            if self._try_grant(ip) == 0.0:
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(ip, deque()).append(future)
+        self._schedule_dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before cancellation - give the slot back
+                self.release(ip)
+            raise
+
+    def release(self, ip: str) -> None:
+        """Return a slot acquired with :meth:`acquire`"""
+        remaining = self._in_flight.get(ip, 0) - 1
+        if remaining > 0:
+            self._in_flight[ip] = remaining
+        else:
+            self._in_flight.pop(ip, None)
+        self._total_in_flight = max(0, self._total_in_flight - 1)
+        if self._queues:
+            self._schedule_dispatch()
+
+    @asynccontextmanager
+    async def slot(self, ip: str):
+        """Async context manager around :meth:`acquire`/:meth:`release`"""
+        await self.acquire(ip)
+        try:
+            yield
+        finally:
+            self.release(ip)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of scheduler load for monitoring"""
+        return {
+            'in_flight': self._total_in_flight,
+            'queued_targets': len(self._queues),
+            'queued_probes': sum(len(q) for q in self._queues.values()),
+            'tracked_ips': len(self._ip_buckets),
+            'tracked_subnets': len(self._subnet_buckets)
+        }
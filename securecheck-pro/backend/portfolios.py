@@ -0,0 +1,388 @@
+"""
+Portfolios - Tenant domain groups with incrementally maintained rollups
+
+A portfolio is a named set of domains owned by a tenant (the digest of the
+registered API key that created it; keys themselves are never stored). Its
+iCal feed is read with a separate per-portfolio token. The dashboard summary (grade distribution, certificates
+expiring within the CERTIFICATE_THRESHOLDS windows, most common missing
+security headers, total estimated annual revenue loss) is served from
+per-portfolio counters instead of scanning analyses per request:
+
+- ``domain_latest`` keeps the latest analysed state of every domain
+  (grade, certificate expiry date, security headers, revenue loss), indexed
+  by expiry date;
+- ``portfolio_rollups`` keeps (metric, key) -> value counters per portfolio.
+
+When an analysis lands, the domain's previous state is subtracted from and
+the new one added to the counters of every portfolio containing it; adding
+or removing a domain applies its latest state the same way. Expiry is
+counted per expiry *date*, so the 7/30/60 day buckets are summed at request
+time and stay correct as days pass without new analyses.
+
+Counters follow the stored grades; after a regrade rebuild them from the
+analysis store.
+
+Usage::
+
+    python portfolios.py rebuild   # recompute latest states and rollups from the analysis store
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from analysis_model import SSLGrade, StoredAnalysis, parse_cert_time
+from config import CERTIFICATE_THRESHOLDS, PORTFOLIO_CONFIG, SECURITY_HEADERS
+from error_handling import URLValidator, ValidationError
+
+GRADES = [grade.value for grade in SSLGrade]
+
+# (ssl_grade, expires_on, headers_mask, revenue_loss_annual): what a domain contributes to rollups
+DomainState = Tuple[str, Optional[str], Optional[int], int]
+
+_STATE_COLUMNS = "ssl_grade, expires_on, headers_mask, revenue_loss_annual"
+
+
+def normalize_domain(value: str) -> str:
+    """Lowercase host name from a domain or URL; raises ValidationError"""
+    domain = (value or '').strip().lower()
+    if '://' in domain:
+        domain = urlparse(domain).hostname or ''
+    domain = domain.split('/')[0].rstrip('.')
+    URLValidator.validate_url(f"https://{domain}")
+    return domain
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def domain_state(record: StoredAnalysis) -> DomainState:
+    expires = parse_cert_time(record.result.not_after)
+    return (
+        record.ssl_grade.value,
+        expires.date().isoformat() if expires else None,
+        record.result.headers_mask,
+        int(record.business_impact.get('revenue_loss_annual') or 0)
+    )
+
+
+def _contribution(state: Optional[DomainState]) -> Counter:
+    """Rollup counters one analysed domain adds to each portfolio containing it"""
+    counters: Counter = Counter()
+    if state is None:
+        return counters
+    grade, expires_on, headers_mask, revenue_loss = state
+    counters[('analyzed', '')] = 1
+    counters[('grade', grade)] = 1
+    if expires_on:
+        counters[('expiry', expires_on)] = 1
+    if headers_mask is not None:  # None: headers were not checked
+        for i, header in enumerate(SECURITY_HEADERS):
+            if not headers_mask & (1 << i):
+                counters[('missing_header', header)] = 1
+    counters[('revenue_loss_annual', '')] = revenue_loss
+    return counters
+
+
+class PortfolioStore:
+    """Portfolios, their domains and rollup counters in SQLite (thread-safe)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or PORTFOLIO_CONFIG['db_path']
+        self._lock = threading.Lock()
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS portfolios (id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+                "tenant TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            # SHA-256 of the portfolio's iCal feed token (read-only, separate from the owner's API key)
+            if 'feed_token_hash' not in {row[1] for row in self._conn.execute("PRAGMA table_info(portfolios)")}:
+                self._conn.execute("ALTER TABLE portfolios ADD COLUMN feed_token_hash TEXT")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS portfolio_domains (portfolio_id TEXT NOT NULL, domain TEXT NOT NULL, "
+                "PRIMARY KEY (portfolio_id, domain)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_domains_domain ON portfolio_domains (domain)")
+            # expires_on: certificate expiry date (UTC), NULL when no certificate was read
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS domain_latest (domain TEXT PRIMARY KEY, analysis_id TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, ssl_grade TEXT NOT NULL, expires_on TEXT, headers_mask INTEGER, "
+                "revenue_loss_annual INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_domain_latest_expires ON domain_latest (expires_on)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS portfolio_rollups (portfolio_id TEXT NOT NULL, metric TEXT NOT NULL, "
+                "key TEXT NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (portfolio_id, metric, key)) WITHOUT ROWID"
+            )
+
+    # -- portfolios --------------------------------------------------------
+
+    def create(self, name: str, domains: Iterable[str] = (), tenant: Optional[str] = None) -> Dict[str, Any]:
+        name = (name or '').strip()
+        if not name:
+            raise ValidationError("포트폴리오 이름이 비어있습니다")
+        domains = [normalize_domain(domain) for domain in domains]  # reject before anything is written
+        portfolio_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO portfolios (id, name, tenant, created_at, updated_at) "
+                               "VALUES (?, ?, ?, ?, ?)", (portfolio_id, name, tenant, now, now))
+        self.add_domains(portfolio_id, domains)
+        return self.get(portfolio_id, tenant)
+
+    def get(self, portfolio_id: str, tenant: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The portfolio, or None if it does not exist or belongs to another tenant"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, tenant, created_at, updated_at FROM portfolios WHERE id = ?", (portfolio_id,)
+            ).fetchone()
+        if row is None or row[2] != tenant:
+            return None
+        return {'id': row[0], 'name': row[1], 'created_at': row[3], 'updated_at': row[4]}
+
+    def issue_feed_token(self, portfolio_id: str) -> str:
+        """New iCal feed token for the portfolio (replaces the previous one); only its hash is stored"""
+        token = secrets.token_urlsafe(32)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE portfolios SET feed_token_hash = ? WHERE id = ?",
+                               (_token_hash(token), portfolio_id))
+        return token
+
+    def feed_portfolio(self, portfolio_id: str, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The portfolio if ``token`` is its current feed token, else None"""
+        if not token:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, created_at, updated_at, feed_token_hash FROM portfolios WHERE id = ?",
+                (portfolio_id,)
+            ).fetchone()
+        if row is None or row[4] is None or not hmac.compare_digest(row[4], _token_hash(token)):
+            return None
+        return {'id': row[0], 'name': row[1], 'created_at': row[2], 'updated_at': row[3]}
+
+    def domains(self, portfolio_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT domain FROM portfolio_domains WHERE portfolio_id = ? ORDER BY domain", (portfolio_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, portfolio_id: str) -> bool:
+        with self._lock, self._conn:
+            for table, column in (('portfolio_rollups', 'portfolio_id'), ('portfolio_domains', 'portfolio_id'),
+                                  ('portfolios', 'id')):
+                cursor = self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (portfolio_id,))
+        return cursor.rowcount > 0
+
+    def add_domains(self, portfolio_id: str, domains: Iterable[str]) -> int:
+        """Add domains (already analysed ones count immediately); returns how many were new"""
+        domains = list(dict.fromkeys(normalize_domain(domain) for domain in domains))
+        with self._lock, self._conn:
+            members = self._member_count(portfolio_id)
+            added = [domain for domain in domains if not self._conn.execute(
+                "SELECT 1 FROM portfolio_domains WHERE portfolio_id = ? AND domain = ?", (portfolio_id, domain)
+            ).fetchone()]
+            if members + len(added) > PORTFOLIO_CONFIG['max_domains']:
+                raise ValidationError(f"포트폴리오에는 최대 {PORTFOLIO_CONFIG['max_domains']}개 도메인까지 등록할 수 있습니다")
+            self._conn.executemany("INSERT INTO portfolio_domains VALUES (?, ?)",
+                                   [(portfolio_id, domain) for domain in added])
+            delta: Counter = Counter({('members', ''): len(added)})
+            for state in self._states(added).values():
+                delta.update(_contribution(state))
+            self._apply([portfolio_id], delta)
+        return len(added)
+
+    def remove_domains(self, portfolio_id: str, domains: Iterable[str]) -> int:
+        domains = list(dict.fromkeys(normalize_domain(domain) for domain in domains))
+        with self._lock, self._conn:
+            removed = [domain for domain in domains if self._conn.execute(
+                "DELETE FROM portfolio_domains WHERE portfolio_id = ? AND domain = ?", (portfolio_id, domain)
+            ).rowcount]
+            delta: Counter = Counter({('members', ''): -len(removed)})
+            for state in self._states(removed).values():
+                delta.subtract(_contribution(state))
+            self._apply([portfolio_id], delta)
+        return len(removed)
+
+    # -- rollups -----------------------------------------------------------
+
+    def record_analysis(self, record: StoredAnalysis) -> None:
+        """Make ``record`` its domain's latest state and move the rollups of its portfolios"""
+        domain = (record.result.domain or '').lower()
+        if not domain:
+            return
+        new = domain_state(record)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT created_at, {_STATE_COLUMNS} FROM domain_latest WHERE domain = ?", (domain,)
+            ).fetchone()
+            if row and row[0] > record.created_at:
+                return  # an older analysis finishing late does not replace a newer one
+            self._conn.execute("INSERT OR REPLACE INTO domain_latest VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (domain, record.id, record.created_at, *new))
+            old = tuple(row[1:]) if row else None
+            if old == new:
+                return
+            portfolio_ids = [r[0] for r in self._conn.execute(
+                "SELECT portfolio_id FROM portfolio_domains WHERE domain = ?", (domain,)
+            )]
+            delta = _contribution(new)
+            delta.subtract(_contribution(old))
+            self._apply(portfolio_ids, delta)
+
+    def summary(self, portfolio_id: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Dashboard rollup, read from the portfolio's counters only"""
+        today = today or datetime.now(timezone.utc).date()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT metric, key, value FROM portfolio_rollups WHERE portfolio_id = ?", (portfolio_id,)
+            ).fetchall()
+        totals: Dict[str, int] = {}
+        grades = {grade: 0 for grade in GRADES}
+        missing: Dict[str, int] = {}
+        expiry: List[Tuple[str, int]] = []
+        for metric, key, value in rows:
+            if metric == 'grade':
+                grades[key] = value
+            elif metric == 'missing_header':
+                missing[key] = value
+            elif metric == 'expiry':
+                expiry.append((key, value))
+            else:
+                totals[metric] = value
+
+        windows = sorted({CERTIFICATE_THRESHOLDS[name] for name in
+                          ('critical_expiry_days', 'warning_expiry_days', 'renewal_recommendation_days')})
+        today_iso = today.isoformat()
+        expiring = {'expired': sum(value for key, value in expiry if key < today_iso)}
+        for days in windows:
+            until = (today + timedelta(days=days)).isoformat()
+            expiring[f'within_{days}_days'] = sum(value for key, value in expiry if today_iso <= key <= until)
+
+        top_headers = sorted(missing.items(), key=lambda item: -item[1])
+        return {
+            'portfolio_id': portfolio_id,
+            'domains': totals.get('members', 0),
+            'analyzed': totals.get('analyzed', 0),
+            'grade_distribution': grades,
+            'expiring_certificates': expiring,
+            'top_missing_headers': [{'header': header, 'domains': count}
+                                    for header, count in top_headers[:PORTFOLIO_CONFIG['top_missing_headers']]],
+            'revenue_loss_annual': totals.get('revenue_loss_annual', 0),
+            'as_of': today_iso
+        }
+
+    def expiring(self, since: date, until: date,
+                 portfolio_id: Optional[str] = None) -> List[Tuple[Optional[str], str, str]]:
+        """(tenant, domain, expires_on) of portfolio domains whose certificate expires in [since, until].
+
+        A range scan on the expiry index (for one portfolio, its membership
+        primary key); each domain appears once per tenant.
+        """
+        sql = ("SELECT DISTINCT p.tenant, l.domain, l.expires_on FROM domain_latest l "
+               "JOIN portfolio_domains d ON d.domain = l.domain JOIN portfolios p ON p.id = d.portfolio_id "
+               "WHERE l.expires_on BETWEEN ? AND ?")
+        params = [since.isoformat(), until.isoformat()]
+        if portfolio_id is not None:
+            sql += " AND d.portfolio_id = ?"
+            params.append(portfolio_id)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY l.expires_on, l.domain", params).fetchall()
+
+    def rebuild(self, store) -> int:
+        """Recompute latest states and every portfolio's counters from the analysis store.
+
+        The store is scanned without holding the lock, so analyses recorded
+        meanwhile (``record_analysis`` during live traffic) are merged back in
+        at the swap: a current row newer than the scanned one, or for a domain
+        the scan did not see, is kept.
+        """
+        latest: Dict[str, Tuple[str, str, DomainState]] = {}
+        for records in store.iter_records():
+            for record in records:
+                domain = (record.result.domain or '').lower()
+                if domain and (domain not in latest or latest[domain][1] <= record.created_at):
+                    latest[domain] = (record.id, record.created_at, domain_state(record))
+        with self._lock, self._conn:
+            for domain, analysis_id, created_at, *state in self._conn.execute(
+                f"SELECT domain, analysis_id, created_at, {_STATE_COLUMNS} FROM domain_latest"
+            ).fetchall():
+                if domain not in latest or created_at > latest[domain][1]:
+                    latest[domain] = (analysis_id, created_at, tuple(state))
+            self._conn.execute("DELETE FROM domain_latest")
+            self._conn.executemany(
+                "INSERT INTO domain_latest VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(domain, analysis_id, created_at, *state)
+                 for domain, (analysis_id, created_at, state) in latest.items()]
+            )
+            self._conn.execute("DELETE FROM portfolio_rollups")
+            counters: Dict[str, Counter] = {}
+            for portfolio_id, domain in self._conn.execute("SELECT portfolio_id, domain FROM portfolio_domains"):
+                counter = counters.setdefault(portfolio_id, Counter())
+                counter[('members', '')] += 1
+                if domain in latest:
+                    counter.update(_contribution(latest[domain][2]))
+            for portfolio_id, counter in counters.items():
+                self._apply([portfolio_id], counter)
+        return len(latest)
+
+    def _member_count(self, portfolio_id: str) -> int:
+        row = self._conn.execute(
+            "SELECT value FROM portfolio_rollups WHERE portfolio_id = ? AND metric = 'members' AND key = ''",
+            (portfolio_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _states(self, domains: List[str]) -> Dict[str, DomainState]:
+        states = {}
+        for domain in domains:
+            row = self._conn.execute(
+                f"SELECT {_STATE_COLUMNS} FROM domain_latest WHERE domain = ?", (domain,)
+            ).fetchone()
+            if row:
+                states[domain] = tuple(row)
+        return states
+
+    def _apply(self, portfolio_ids: List[str], delta: Counter) -> None:
+        """Add ``delta`` to the counters of each portfolio (caller holds the lock and transaction)"""
+        changes = [(metric, key, value) for (metric, key), value in delta.items() if value]
+        if not portfolio_ids or not changes:
+            return
+        self._conn.executemany(
+            "INSERT INTO portfolio_rollups VALUES (?, ?, ?, ?) ON CONFLICT (portfolio_id, metric, key) "
+            "DO UPDATE SET value = value + excluded.value",
+            [(portfolio_id, *change) for portfolio_id in portfolio_ids for change in changes]
+        )
+        placeholders = ', '.join('?' * len(portfolio_ids))
+        self._conn.execute(
+            f"DELETE FROM portfolio_rollups WHERE portfolio_id IN ({placeholders}) AND value = 0", portfolio_ids
+        )
+        self._conn.execute(f"UPDATE portfolios SET updated_at = ? WHERE id IN ({placeholders})",
+                           [datetime.now().isoformat(), *portfolio_ids])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Portfolio rollups")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild', help="recompute latest states and rollups from the analysis store")
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        from analysis_store import AnalysisStore
+        print(f"{PortfolioStore().rebuild(AnalysisStore())} domains")
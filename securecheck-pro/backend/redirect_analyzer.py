@@ -0,0 +1,131 @@
+"""
+Redirect Analyzer - Follows HTTP/HTTPS redirect chains hop by hop
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from config import REDIRECT_CONFIG
+from key_reuse_index import registrable_domain
+
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+class RedirectAnalyzer:
+    """Walks a redirect chain manually so every hop can be measured"""
+
+    def __init__(self, max_hops: Optional[int] = None,
+                 recommended_max_hops: Optional[int] = None):
+        self.max_hops = max_hops or REDIRECT_CONFIG['max_hops']
+        self.recommended_max_hops = (
+            REDIRECT_CONFIG['recommended_max_hops'] if recommended_max_hops is None
+            else recommended_max_hops
+        )
+
+    async def follow(self, session: aiohttp.ClientSession, url: str,
+                     timeout: float) -> Tuple[Dict[str, Any], Optional[Any]]:
+        """Follow ``url`` until a non-redirect response, a loop or the hop limit.
+
+        Returns the JSON-friendly chain summary and the raw headers of the
+        final response (a multidict, so repeated headers such as Set-Cookie
+        survive for header analysis).
+        """
+        deadline = time.monotonic() + timeout
+        chain = []
+        seen = set()
+        final_headers = None
+        loop_detected = False
+        current = url
+
+        try:
+            for _ in range(self.max_hops + 1):
+                if current in seen:
+                    loop_detected = True
+                    break
+                seen.add(current)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                started = time.perf_counter()
+                async with session.get(current, ssl=False, allow_redirects=False,
+                                       timeout=aiohttp.ClientTimeout(total=remaining)) as response:
+                    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+                    location = response.headers.get('Location')
+                    chain.append({
+                        'url': current,
+                        'status': response.status,
+                        'latency_ms': latency_ms,
+                        'location': location,
+                        'server': response.headers.get('Server'),
+                        'headers': dict(response.headers)
+                    })
+                    final_headers = response.headers
+
+                if response.status not in REDIRECT_STATUSES or not location:
+                    break
+                current = urljoin(current, location)
+            error = None
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+            error = str(e) or type(e).__name__
+
+        redirect_count = sum(1 for hop in chain if hop['status'] in REDIRECT_STATUSES)
+        hop_limit_reached = (
+            not loop_detected and error is None and bool(chain)
+            and chain[-1]['status'] in REDIRECT_STATUSES and redirect_count > self.max_hops
+        )
+        final = chain[-1] if chain else None
+
+        summary = {
+            'start_url': url,
+            'chain': chain,
+            'redirect_count': redirect_count,
+            'final_url': final['url'] if final else None,
+            'final_status': final['status'] if final else None,
+            'redirect_loop': loop_detected,
+            'hop_limit_reached': hop_limit_reached,
+            'excess_hops': max(0, redirect_count - self.recommended_max_hops),
+            'redirect_latency_ms': round(sum(hop['latency_ms'] for hop in chain[:-1]), 1) if chain else 0,
+            'reaches_https': any(self._same_site_https(url, hop['url']) for hop in chain),
+            'error': error
+        }
+        return summary, final_headers
+
+    @staticmethod
+    def _same_site_https(origin_url: str, hop_url: str) -> bool:
+        """An https hop counts only on the origin host or its registrable domain"""
+        hop = urlparse(hop_url)
+        origin_host = (urlparse(origin_url).hostname or '').rstrip('.')
+        hop_host = (hop.hostname or '').rstrip('.')
+        if hop.scheme != 'https' or not origin_host or not hop_host:
+            return False
+        return hop_host == origin_host or registrable_domain(hop_host) == registrable_domain(origin_host)
+
+    @staticmethod
+    def summarize(http_chain: Optional[Dict[str, Any]],
+                  https_chain: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Flatten the two chains into the fields reports and grading use"""
+        http_redirects_to_https = bool(
+            http_chain and http_chain['redirect_count'] > 0 and http_chain['reaches_https']
+        )
+        server_banner = None
+        for chain in (https_chain, http_chain):
+            if chain and chain['chain']:
+                server_banner = chain['chain'][-1]['server']
+                if server_banner:
+                    break
+
+        return {
+            'http_redirect_chain': http_chain,
+            'https_redirect_chain': https_chain,
+            'http_redirects_to_https': http_redirects_to_https,
+            'redirect_loop': any(c and c['redirect_loop'] for c in (http_chain, https_chain)),
+            'redirect_excess_hops': max((c['excess_hops'] for c in (http_chain, https_chain) if c), default=0),
+            'redirect_latency_ms': max((c['redirect_latency_ms'] for c in (http_chain, https_chain) if c), default=0),
+            'server_banner': server_banner
+        }
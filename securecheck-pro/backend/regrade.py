@@ -0,0 +1,173 @@
+"""
+Regrade - Replays grading over stored analyses under a rule set version
+
+Stored analyses keep the raw probe result, so a new rule set version can be
+applied to the whole history without re-probing a single host: grade,
+security score, issues, business impact and recommendations are recomputed
+from the stored result and written back tagged with the new version.
+
+The store is read in keyset-paginated chunks (by rowid) that a process pool
+re-grades, scoring each chunk with the vectorized batch_scoring engine;
+chunks are written in order, each together with its checkpoint, so an
+interrupted job resumes where it stopped. Analyses already graded by the
+target version are skipped, which also makes re-running a finished job safe
+(it only picks up analyses saved since).
+
+Usage::
+
+    python regrade.py 2 [--workers N] [--chunk-size N] [--restart]
+    python regrade.py 2 --status
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from analysis_model import SSLGrade, StoredAnalysis
+from analysis_store import AnalysisStore
+from batch_scoring import extract_columns, score_batch
+from config import REGRADE_CONFIG
+from error_handling import logger
+from rules_engine import RuleError, RuleSet, load_ruleset
+
+
+def regrade_record(record: StoredAnalysis, ruleset: RuleSet) -> StoredAnalysis:
+    """The same analysis graded by ``ruleset`` from its stored probe result"""
+    evaluation = ruleset.evaluate(record.result.to_dict())
+    grade = SSLGrade(evaluation.ssl_grade)
+    return replace(
+        record,
+        ssl_grade=grade,
+        security_score=evaluation.security_score,
+        issue_codes=evaluation.issue_codes,
+        business_impact=evaluation.business_impact,
+        recommendation_codes=evaluation.recommendation_codes,
+        result=replace(record.result, ssl_grade=grade),
+        rules_version=evaluation.rules_version
+    )
+
+
+def regrade_records(records: List[StoredAnalysis], ruleset: RuleSet) -> List[StoredAnalysis]:
+    """``regrade_record`` over a chunk, with grade/score/impact from batch_scoring.
+
+    Issue and recommendation codes are emitted per matching rule and read
+    the new grade, so they stay on the scalar path (the reference for the
+    batch engine). A rule set the batch engine cannot compile falls back to
+    regrade_record for the whole chunk.
+    """
+    results = [record.result.to_dict() for record in records]
+    try:
+        scores = score_batch(extract_columns(results, ruleset), ruleset)
+    except RuleError:
+        return [regrade_record(record, ruleset) for record in records]
+    regraded = []
+    for i, (record, grade_name) in enumerate(zip(records, scores.grades())):
+        grade = SSLGrade(grade_name)
+        results[i]['ssl_grade'] = grade.value
+        regraded.append(replace(
+            record,
+            ssl_grade=grade,
+            security_score=int(scores.security_score[i]),
+            issue_codes=ruleset.issue_codes(results[i]),
+            business_impact=scores.business_impact(i),
+            recommendation_codes=ruleset.recommendation_codes(results[i]),
+            result=replace(record.result, ssl_grade=grade),
+            rules_version=ruleset.version
+        ))
+    return regraded
+
+
+def _regrade_chunk(rules_version: int, blobs: List[bytes]) -> List[Tuple[str, List[Any], bytes]]:
+    """Worker: decode, re-grade and re-encode one chunk (the writer only runs the UPDATEs)"""
+    ruleset = load_ruleset(rules_version)
+    rows = []
+    for record in regrade_records([AnalysisStore.decode(blob) for blob in blobs], ruleset):
+        values, packed = AnalysisStore.encode(record)
+        rows.append((record.id, values, packed))
+    return rows
+
+
+class RegradeJob:
+    """Re-grades every stored analysis not yet graded by ``rules_version``"""
+
+    def __init__(self, store: AnalysisStore, rules_version: int, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        self.store = store
+        self.rules_version = rules_version
+        self.workers = workers or REGRADE_CONFIG['workers']
+        self.chunk_size = chunk_size or REGRADE_CONFIG['chunk_size']
+        self.max_pending = max(REGRADE_CONFIG['max_pending_chunks'], self.workers)
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop after the chunks in flight are written (the checkpoint stays valid)"""
+        self._stop.set()
+
+    def run(self, restart: bool = False,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        load_ruleset(self.rules_version)  # fail on a missing/invalid rule set before touching the store
+        state = self.store.start_regrade(self.rules_version, restart)
+        after = state['last_rowid']
+        pending: deque = deque()
+        logger.info(f"Regrade to rules v{self.rules_version} from rowid {after} ({state['processed']} done)")
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn: workers must not inherit the event loop or open database handles
+            mp_context=multiprocessing.get_context(REGRADE_CONFIG['start_method'])
+        ) as pool:
+            while True:
+                while not self._stop.is_set() and len(pending) < self.max_pending:
+                    page = self.store.stale_page(self.rules_version, after, self.chunk_size)
+                    if not page:
+                        break
+                    after = page[-1][0]
+                    blobs = [blob for _, blob in page]
+                    pending.append((after, pool.submit(_regrade_chunk, self.rules_version, blobs)))
+                if not pending:
+                    break
+                last_rowid, future = pending.popleft()
+                self.store.save_regraded(self.rules_version, future.result(), last_rowid)
+                if progress:
+                    progress(self.store.regrade_state(self.rules_version))
+
+        if not self._stop.is_set():
+            self.store.finish_regrade(self.rules_version)
+        state = self.store.regrade_state(self.rules_version)
+        logger.info(f"Regrade to rules v{self.rules_version} "
+                    f"{'finished' if state['finished_at'] else 'stopped'}: {state['processed']} analyses")
+        return state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Re-grade stored analyses with a rule set version")
+    parser.add_argument('rules_version', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--chunk-size', type=int)
+    parser.add_argument('--restart', action='store_true', help="ignore the saved checkpoint")
+    parser.add_argument('--status', action='store_true', help="print the checkpoint and exit")
+    args = parser.parse_args()
+
+    store = AnalysisStore()
+    if args.status:
+        print(json.dumps(store.regrade_state(args.rules_version), indent=2))
+        sys.exit(0)
+
+    job = RegradeJob(store, args.rules_version, args.workers, args.chunk_size)
+    try:
+        job.run(args.restart, progress=lambda state: print(
+            f"\r{state['processed']} analyses re-graded (rowid {state['last_rowid']})", end='', flush=True
+        ))
+        print()
+    except RuleError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        print("\nInterrupted; run again to resume from the last checkpoint", file=sys.stderr)
+        sys.exit(130)
@@ -0,0 +1,137 @@
+"""
+Report Cache - Process-pool report rendering with a persistent on-disk cache
+
+Rendered reports are stored under the SHA-256 of their input data, so the
+same analysis is rendered once no matter how often (or by how many workers)
+it is downloaded. PDF rendering is CPU bound and runs in a
+ProcessPoolExecutor whose workers register the Korean fonts at startup.
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from config import REPORT_CACHE_CONFIG
+from error_handling import logger
+from metrics import metrics
+from report_generator_tsc import register_pdf_fonts, render_report
+
+REPORT_MEDIA_TYPES = {'pdf': 'application/pdf', 'html': 'text/html; charset=utf-8'}
+
+
+class ReportCache:
+    """Renders reports in worker processes and keeps the output on disk"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.cache_dir = cache_dir or REPORT_CACHE_CONFIG['cache_dir']
+        self.max_workers = max_workers or REPORT_CACHE_CONFIG['max_workers']
+        self.max_entries = max_entries or REPORT_CACHE_CONFIG['max_entries']
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._writes_since_prune = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # spawn: workers must not inherit the event loop or open sockets
+                mp_context=multiprocessing.get_context(REPORT_CACHE_CONFIG['start_method']),
+                initializer=register_pdf_fonts
+            )
+        return self._executor
+
+    @staticmethod
+    def content_key(kind: str, analysis_data: Dict[str, Any]) -> str:
+        """Stable hash of the renderer version, report kind and input data"""
+        payload = json.dumps(
+            [REPORT_CACHE_CONFIG['renderer_version'], kind, analysis_data],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, kind: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{kind}")
+
+    def cached_path(self, kind: str, analysis_data: Dict[str, Any]) -> Optional[str]:
+        path = self.path_for(kind, self.content_key(kind, analysis_data))
+        return path if os.path.exists(path) else None
+
+    async def get_or_render(self, kind: str, analysis_data: Dict[str, Any]) -> str:
+        """Path of the rendered report, rendering it at most once per content hash"""
+        if kind not in REPORT_MEDIA_TYPES:
+            raise ValueError(f"Unknown report kind: {kind}")
+        key = self.content_key(kind, analysis_data)
+        path = self.path_for(kind, key)
+        if os.path.exists(path):
+            metrics.increment('report_cache_hits')
+            return path
+
+        # Concurrent requests for the same report wait for one render. The render
+        # runs in a task owned by the cache, so a cancelled request only stops
+        # waiting; the render and every other waiter carry on.
+        task = self._inflight.get(path)
+        if task is None:
+            metrics.increment('report_cache_misses')
+            task = asyncio.create_task(self._render(kind, analysis_data, path))
+            self._inflight[path] = task
+            task.add_done_callback(lambda done: self._render_done(path, done))
+        return await asyncio.shield(task)
+
+    async def _render(self, kind: str, analysis_data: Dict[str, Any], path: str) -> str:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            content = await loop.run_in_executor(executor, render_report, kind, analysis_data)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool for the next request
+            if self._executor is executor:
+                self._executor = None
+            raise
+        await asyncio.to_thread(self._write, path, content)
+        return path
+
+    def _render_done(self, path: str, task: asyncio.Task) -> None:
+        if self._inflight.get(path) is task:
+            del self._inflight[path]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when no request was left waiting
+
+    def _write(self, path: str, content: bytes) -> None:
+        # Atomic rename so readers never stream a partially written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= REPORT_CACHE_CONFIG['prune_interval']:
+            self._writes_since_prune = 0
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the least recently written files beyond max_entries"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir)
+                       if entry.is_file() and not entry.name.endswith('.tmp')]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                logger.warning(f"Failed to prune report cache entry {entry.path}: {e}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,148 @@
+"""
+Report Export - Streams a ZIP of rendered reports for a whole portfolio
+
+Reports are rendered through the shared ReportCache with bounded
+concurrency (cached reports are reused as-is) and written into a ZIP that is
+flushed to the client file by file, so the archive is never held in memory.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+import zipfile
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from config import EXPORT_CONFIG
+from report_cache import ReportCache
+
+_COPY_CHUNK = 256 * 1024
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable sink: zipfile falls back to data descriptors"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportBatches:
+    """In-memory export batch definitions (report ids + formats) with a TTL"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl or EXPORT_CONFIG['batch_ttl']
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+    def create(self, report_ids: List[str], formats: List[str]) -> str:
+        self._expire()
+        batch_id = str(uuid.uuid4())
+        self._batches[batch_id] = {
+            'report_ids': list(dict.fromkeys(report_ids)),
+            'formats': formats,
+            'created': time.monotonic()
+        }
+        return batch_id
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        self._expire()
+        return self._batches.get(batch_id)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        for batch_id in [b for b, batch in self._batches.items() if batch['created'] < cutoff]:
+            del self._batches[batch_id]
+
+
+async def _render_in_order(report_cache: ReportCache, jobs: AsyncIterator[Tuple[str, str, Dict[str, Any]]],
+                           concurrency: int) -> AsyncIterator[Tuple[str, Optional[str], Optional[str]]]:
+    """Render (name, kind, data) jobs with at most ``concurrency`` in flight, yielding in input order.
+
+    Closing the stream early only stops waiting: ReportCache finishes the
+    renders it started, so other downloads of the same reports are unaffected.
+    """
+    pending: deque = deque()
+
+    async def start_next() -> bool:
+        job = await anext(jobs, None)
+        if job is None:
+            return False
+        name, kind, data = job
+        pending.append((name, asyncio.ensure_future(report_cache.get_or_render(kind, data))))
+        return True
+
+    try:
+        while len(pending) < concurrency and await start_next():
+            pass
+        while pending:
+            name, task = pending.popleft()
+            await start_next()
+            try:
+                yield name, await task, None
+            except Exception as e:
+                yield name, None, str(e) or type(e).__name__
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+def _add_file(archive: zipfile.ZipFile, name: str, path: str, compress: bool) -> None:
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with open(path, 'rb') as source, archive.open(info, 'w', force_zip64=True) as dest:
+        while True:
+            chunk = source.read(_COPY_CHUNK)
+            if not chunk:
+                break
+            dest.write(chunk)
+
+
+async def stream_report_zip(report_cache: ReportCache,
+                            reports: AsyncIterable[Tuple[str, Dict[str, Any]]],
+                            formats: List[str],
+                            missing: Optional[List[str]] = None) -> AsyncIterator[bytes]:
+    """Yield ZIP bytes for ``(basename, analysis_data)`` reports in each format.
+
+    Only one report's compressed bytes are buffered at a time. A
+    ``manifest.json`` at the end lists failed renders and missing ids.
+    """
+    buffer = _ChunkBuffer()
+    archive = zipfile.ZipFile(buffer, 'w')
+    jobs = (
+        (f"{basename}.{kind}", kind, data) async for basename, data in reports for kind in formats
+    )
+    written, failed = 0, {}
+
+    async for name, path, error in _render_in_order(report_cache, jobs, EXPORT_CONFIG['concurrency']):
+        if error is not None:
+            failed[name] = error
+            continue
+        # PDF is already compressed; deflating it again only costs CPU
+        await asyncio.to_thread(_add_file, archive, name, path, not name.endswith('.pdf'))
+        written += 1
+        yield buffer.drain()
+
+    archive.writestr('manifest.json', json.dumps({
+        'reports_written': written,
+        'failed': failed,
+        'missing_report_ids': missing or []
+    }, ensure_ascii=False, indent=2))
+    archive.close()
+    yield buffer.drain()
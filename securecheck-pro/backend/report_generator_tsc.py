@@ -7,21 +7,151 @@ from typing import Dict, Any, List
 from io import BytesIO
 from datetime import datetime
 from jinja2 import Template
+from xml.sax.saxutils import escape
 import os
 
-# WeasyPrint 제거됨 - 클라이언트 사이드 PDF 생성 사용
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from config import PDF_CONFIG
 
-def convert_html_to_pdf(analysis_data: Dict[str, Any]) -> bytes:
-    """클라이언트 사이드 PDF 생성을 위해 간단한 텍스트 보고서 반환"""  
+# 서버 사이드 PDF는 reportlab으로 직접 렌더링 (WeasyPrint 시스템 의존성 없음)
+# 프로세스별로 한 번만 등록되는 폰트 이름 (regular, bold)
+_PDF_FONTS = None
+
+
+def register_pdf_fonts():
+    """PDF_CONFIG['fonts']의 한글 폰트를 등록 (PDF 워커 프로세스 초기화 시 1회 호출)
+    
+    TTF 파일이 없으면 reportlab 내장 한글 CID 폰트를 사용합니다.
+    """
+    global _PDF_FONTS
+    if _PDF_FONTS is not None:
+        return _PDF_FONTS
+    
+    fonts = PDF_CONFIG['fonts']
     try:
-        # 텍스트 보고서로 대체 (클라이언트에서 HTML->PDF 변환)
-        text_content = _generate_tsc_text_report(analysis_data)
-        return text_content.encode('utf-8')
-            
-    except Exception as e:
-        print(f"보고서 생성 오류: {str(e)}")
-        return "보고서 생성에 실패했습니다.".encode('utf-8')
+        pdfmetrics.registerFont(TTFont('Korean', fonts['korean']))
+        bold = 'Korean'
+        if os.path.exists(fonts.get('korean_bold', '')):
+            pdfmetrics.registerFont(TTFont('Korean-Bold', fonts['korean_bold']))
+            bold = 'Korean-Bold'
+        _PDF_FONTS = ('Korean', bold)
+    except Exception:
+        pdfmetrics.registerFont(UnicodeCIDFont('HYGothic-Medium'))
+        _PDF_FONTS = ('HYGothic-Medium', 'HYGothic-Medium')
+    return _PDF_FONTS
+
+
+def create_tsc_style_pdf_report(analysis_data: Dict[str, Any]) -> bytes:
+    """TSC 형식의 PDF 보고서 생성 (CPU 작업 - 프로세스 풀에서 호출)"""
+    regular, bold = register_pdf_fonts()
+    sizes, margins = PDF_CONFIG['styles'], PDF_CONFIG['margins']
+    
+    title_style = ParagraphStyle('Title', fontName=bold, fontSize=sizes['title_size'],
+                                 leading=sizes['title_size'] * 1.4, spaceAfter=12)
+    heading_style = ParagraphStyle('Heading', fontName=bold, fontSize=sizes['heading_size'],
+                                   leading=sizes['heading_size'] * 1.4, spaceBefore=14, spaceAfter=6,
+                                   textColor=colors.HexColor('#2c3e50'))
+    body_style = ParagraphStyle('Body', fontName=regular, fontSize=sizes['body_size'],
+                                leading=sizes['body_size'] * 1.5)
+    small_style = ParagraphStyle('Small', parent=body_style, fontSize=sizes['code_size'],
+                                 leading=sizes['code_size'] * 1.4)
+    
+    def text(value: Any, style: ParagraphStyle = body_style) -> Paragraph:
+        return Paragraph(escape(str(value)), style)
+    
+    domain = analysis_data.get('domain', 'Unknown')
+    ssl_grade = analysis_data.get('ssl_grade', 'F')
+    security_score = analysis_data.get('security_score', 0)
+    
+    story = [
+        text(f"{domain} 웹사이트 보안 분석 보고서", title_style),
+        text(f"분석 대상: {domain}"),
+        text(f"분석 일시: {analysis_data.get('analysis_date', '')}"),
+        text("분석자: SecureCheck Pro Security Analysis Team"),
+        Spacer(1, 8),
+        text("Executive Summary", heading_style)
+    ]
+    
+    summary = Table([
+        [text('SSL 등급'), text('보안 점수'), text('인증서 유효성'), text('만료까지')],
+        [
+            text(ssl_grade, ParagraphStyle('Grade', parent=body_style, fontName=bold,
+                                           textColor=colors.HexColor(_get_grade_color(ssl_grade)))),
+            text(f"{security_score}/100", ParagraphStyle('Score', parent=body_style, fontName=bold,
+                                                         textColor=colors.HexColor(_get_score_color(security_score)))),
+            text('유효' if analysis_data.get('certificate_valid') else '무효'),
+            text(f"{analysis_data.get('days_until_expiry', 0)}일")
+        ]
+    ], hAlign='LEFT')
+    summary.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ecf0f1')),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+    ]))
+    story.append(summary)
+    
+    issues = analysis_data.get('issues', [])
+    if issues:
+        story.append(text("주요 발견사항", heading_style))
+        severity_labels = {'critical': '심각', 'high': '높음', 'medium': '중간', 'low': '낮음'}
+        rows = [[text('심각도'), text('항목'), text('설명', small_style)]]
+        for issue in issues:
+            rows.append([
+                text(severity_labels.get(issue.get('severity'), issue.get('severity', ''))),
+                text(issue.get('title', '')),
+                text(issue.get('description', ''), small_style)
+            ])
+        table = Table(rows, colWidths=[50, 150, None], repeatRows=1, hAlign='LEFT')
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ecf0f1')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#bdc3c7')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP')
+        ]))
+        story.append(table)
+    
+    missing_headers = analysis_data.get('missing_headers', [])
+    if missing_headers:
+        story.append(text("누락된 보안 헤더", heading_style))
+        story.extend(text(f"• {header}") for header in missing_headers)
+    
+    recommendations = analysis_data.get('recommendations', [])
+    if recommendations:
+        story.append(text("개선 권장사항", heading_style))
+        story.extend(text(f"{i}. {recommendation}") for i, recommendation in enumerate(recommendations, 1))
+    
+    story.append(text("서버 정보", heading_style))
+    story.append(text(f"서버: {(analysis_data.get('server_info') or {}).get('software', '확인 불가')}"))
+    story.append(text(f"HTTP → HTTPS 리다이렉트: {'적용' if analysis_data.get('redirects_https') else '미적용'}"))
+    
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, title=f"{domain} 보안 분석 보고서",
+        topMargin=margins['top'], bottomMargin=margins['bottom'],
+        leftMargin=margins['left'], rightMargin=margins['right']
+    )
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_report(kind: str, analysis_data: Dict[str, Any]) -> bytes:
+    """보고서 렌더링 진입점 ('pdf' 또는 'html') - 프로세스 풀에서 pickle 가능한 최상위 함수"""
+    if kind == 'pdf':
+        return create_tsc_style_pdf_report(analysis_data)
+    if kind == 'html':
+        return _generate_tsc_html_report(analysis_data).encode('utf-8')
+    raise ValueError(f"Unknown report kind: {kind}")
+
+
+def convert_html_to_pdf(analysis_data: Dict[str, Any]) -> bytes:
+    """하위 호환용 - 서버 사이드 PDF 보고서 반환"""
+    return create_tsc_style_pdf_report(analysis_data)
 
 
 def _generate_tsc_html_report(analysis_data: Dict[str, Any]) -> str:
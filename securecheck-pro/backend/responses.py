@@ -0,0 +1,218 @@
+"""
+API Responses - Fast JSON/msgpack encoding and response compression
+
+``APIResponse`` encodes response bodies with orjson, or with msgpack when
+the request's ``Accept`` header asks for it (internal consumers).
+``CompressionMiddleware`` compresses bodies above a size threshold with
+Brotli (when installed) or gzip, streaming chunk by chunk so large exports
+are never buffered.
+"""
+
+import asyncio
+import zlib
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+import msgpack
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import RESPONSE_CONFIG
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+_MSGPACK_ACCEPT = (MSGPACK_MEDIA_TYPE, 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Set per request by ContentNegotiationMiddleware, read when the response body is rendered
+_msgpack_requested: ContextVar[bool] = ContextVar('msgpack_requested', default=False)
+
+
+def _qualities(header: str) -> Dict[str, float]:
+    """``Accept``/``Accept-Encoding`` values -> {token: q}"""
+    qualities = {}
+    for part in header.split(','):
+        token, *params = part.split(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[token] = q
+    return qualities
+
+
+def wants_msgpack(accept: str) -> bool:
+    qualities = _qualities(accept)
+    return any(qualities.get(media_type, 0) > 0 for media_type in _MSGPACK_ACCEPT)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported content coding, Brotli first"""
+    qualities = _qualities(accept_encoding)
+    for encoding in (('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)):
+        if qualities.get(encoding, qualities.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class APIResponse(JSONResponse):
+    """orjson-encoded JSON, or msgpack when negotiated via Accept"""
+
+    def render(self, content: Any) -> bytes:
+        if _msgpack_requested.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(content, use_bin_type=True, default=_default)
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(content)
+
+
+class ContentNegotiationMiddleware:
+    """Records whether the client accepts msgpack and marks API responses ``Vary: Accept``"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_vary(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                content_type = headers.get('content-type', '')
+                if content_type.startswith(('application/json', MSGPACK_MEDIA_TYPE)):
+                    headers.add_vary_header('Accept')
+            await send(message)
+
+        token = _msgpack_requested.set(wants_msgpack(Headers(scope=scope).get('accept', '')))
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _msgpack_requested.reset(token)
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._obj = brotli.Compressor(quality=RESPONSE_CONFIG['brotli_quality'])
+        else:
+            self._obj = zlib.compressobj(RESPONSE_CONFIG['gzip_level'], zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        """Compress a chunk; intermediate chunks are flushed so streams stay incremental"""
+        if self.encoding == 'br':
+            return self._obj.process(data) + (self._obj.finish() if finish else self._obj.flush())
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class _CompressionResponder:
+    """Holds back ``http.response.start`` until the first body chunk decides whether to compress"""
+
+    def __init__(self, middleware: 'CompressionMiddleware', encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.decided = False
+
+    async def __call__(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            return
+        if self.compressor is not None:
+            more_body = message.get('more_body', False)
+            await self._send_compressed(message.get('body', b''), more_body)
+            return
+        if self.decided or message['type'] != 'http.response.body':
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        self.decided = True
+        headers = MutableHeaders(scope=self.start_message)
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if 'content-encoding' in headers or self.middleware.excluded(headers.get('content-type', '')) \
+                or (not more_body and len(body) < self.middleware.minimum_size):
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        self.compressor = _Compressor(self.encoding)
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        if more_body:
+            del headers['Content-Length']
+            await self._flush_start()
+            await self._send_compressed(body, more_body)
+        else:
+            data = await self._compress(body, True)
+            headers['Content-Length'] = str(len(data))
+            await self._flush_start()
+            await self.send({'type': 'http.response.body', 'body': data, 'more_body': False})
+
+    async def _flush_start(self) -> None:
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
+
+    async def _compress(self, data: bytes, finish: bool) -> bytes:
+        if len(data) >= self.middleware.thread_minimum_size:
+            return await asyncio.to_thread(self.compressor.compress, data, finish)
+        return self.compressor.compress(data, finish)
+
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        data = await self._compress(body, not more_body)
+        if data or not more_body:
+            await self.send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+
+class CompressionMiddleware:
+    """Brotli/gzip response compression with a minimum size and excluded content types"""
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None,
+                 thread_minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = minimum_size or RESPONSE_CONFIG['compression_minimum_size']
+        self.thread_minimum_size = thread_minimum_size or RESPONSE_CONFIG['compression_thread_size']
+        self.exclude_content_types = RESPONSE_CONFIG['exclude_content_types']
+
+    def excluded(self, content_type: str) -> bool:
+        return content_type.lower().startswith(self.exclude_content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope['type'] == 'http':
+            encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressionResponder(self, encoding, send))
@@ -0,0 +1,575 @@
+"""
+Rules Engine - Versioned, declarative grading rules compiled to closures
+
+Grade, security score, business impact, issues and recommendations are
+defined as data in ``rules/v<N>.json`` and compiled once into closures. One
+``evaluate`` call walks a result a single time and returns everything the
+API stores. Rule sets are versioned files, so re-grading history with an
+older or candidate version is just loading another file; batch_scoring
+vectorizes the grade/score/impact sections of any rule set with NumPy.
+
+Conditions::
+
+    {"field": "days_until_expiry", "lt": 30}          # eq ne lt le gt ge in not_in contains truthy is
+    {"count": "missing_security_headers", "le": 2}   # len() of a list field
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+
+Issue/recommendation entries (``payload`` is ``issue`` or ``text``; strings
+are templates such as ``"{header} 헤더 누락"`` with the extra format specs
+``join``, ``join<N>`` and ``upper``). Evaluation emits codes, ``[leaf, *bindings]``:
+the payload entry's number in the section plus, per enclosing ``for_each``, the
+item (string items) or its position; stored analyses keep only the codes and
+render the text from the same rule set version when read::
+
+    {"when": cond, "issue": {...}}                   # emit when cond holds (no "when": always)
+    {"when": cond, "then": [entries]}
+    {"first": [{"when": cond, "then": [...]}, ...]}  # first matching branch only
+    {"switch": "ssl_status", "cases": {"expired": [...]}, "default": [...]}
+    {"for_each": "header_findings", "as": "finding", "where": cond, "then": [...]}
+
+Usage::
+
+    python rules_engine.py check rules/v2.json
+    python rules_engine.py compare 1 2 [--limit N]   # grade changes over the analysis store
+"""
+
+import argparse
+import json
+import os
+import string
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from analysis_model import SSLGrade
+from config import RULES_CONFIG
+from error_handling import ConfigurationError
+
+GRADES = [grade.value for grade in SSLGrade]  # best first; a larger index is a worse grade
+FIELD_TYPES = ('any', 'bool', 'tristate', 'int', 'float', 'str', 'set')
+COMPARISONS = ('eq', 'ne', 'lt', 'le', 'gt', 'ge', 'in', 'not_in', 'contains', 'truthy', 'is')
+IMPACT_FIELDS = ('revenue_loss_annual', 'seo_impact', 'user_trust_impact')
+
+Condition = Callable[['_Context'], bool]
+Emitter = Callable[['_Context', List[Any]], None]
+# Payload entries of a section by code: (template renderer, enclosing for_each (list field, variable) pairs)
+Leaf = Tuple[Callable[['_Context'], Any], Tuple[Tuple[str, str], ...]]
+_BINDINGS = '#bindings'  # overlay key with the enclosing loops' code bindings
+
+
+class RuleError(ConfigurationError):
+    """Invalid rule set definition"""
+    pass
+
+
+# Condition AST shared with the NumPy compiler in batch_scoring:
+#   ('all', [node]) | ('any', [node]) | ('not', node) | ('cmp', (source, field), op, value)
+#   source is 'field' or 'count'; None means "always"
+def parse_condition(spec: Any, where: str) -> Optional[tuple]:
+    if spec is None:
+        return None
+    if not isinstance(spec, dict):
+        raise RuleError(f"{where}: condition must be an object")
+    if 'all' in spec or 'any' in spec:
+        kind = 'all' if 'all' in spec else 'any'
+        return (kind, [parse_condition(c, f"{where}.{kind}[{i}]") for i, c in enumerate(spec[kind])])
+    if 'not' in spec:
+        return ('not', parse_condition(spec['not'], f"{where}.not"))
+
+    source = 'count' if 'count' in spec else 'field'
+    if source not in spec:
+        raise RuleError(f"{where}: condition needs field/count/all/any/not")
+    ops = [key for key in spec if key != source]
+    if len(ops) != 1 or ops[0] not in COMPARISONS:
+        raise RuleError(f"{where}: exactly one of {', '.join(COMPARISONS)} expected, got {ops}")
+    op = ops[0]
+    value = spec[op]
+    if op in ('in', 'not_in') and not isinstance(value, list):
+        raise RuleError(f"{where}: '{op}' needs a list")
+    if op in ('truthy',) and not isinstance(value, bool):
+        raise RuleError(f"{where}: 'truthy' needs true/false")
+    if op == 'is' and value not in (True, False, None):
+        raise RuleError(f"{where}: 'is' needs true/false/null")
+    return ('cmp', (source, spec[source]), op, value)
+
+
+def condition_fields(node: Optional[tuple]) -> List[Tuple[str, str]]:
+    """(source, field) pairs a condition reads"""
+    if node is None:
+        return []
+    if node[0] in ('all', 'any'):
+        return [pair for child in node[1] for pair in condition_fields(child)]
+    if node[0] == 'not':
+        return condition_fields(node[1])
+    return [node[1]]
+
+
+_SCALAR_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    'eq': lambda v, x: v == x,
+    'ne': lambda v, x: v != x,
+    'lt': lambda v, x: v < x,
+    'le': lambda v, x: v <= x,
+    'gt': lambda v, x: v > x,
+    'ge': lambda v, x: v >= x,
+    'in': lambda v, x: v in x,
+    'not_in': lambda v, x: v not in x,
+    'contains': lambda v, x: x in (v or ()),
+    'truthy': lambda v, x: bool(v) is x,
+    'is': lambda v, x: v is x,
+}
+
+
+def compile_condition(node: Optional[tuple]) -> Condition:
+    if node is None:
+        return lambda ctx: True
+    kind = node[0]
+    if kind in ('all', 'any'):
+        children = [compile_condition(child) for child in node[1]]
+        combine = all if kind == 'all' else any
+        return lambda ctx: combine(child(ctx) for child in children)
+    if kind == 'not':
+        child = compile_condition(node[1])
+        return lambda ctx: not child(ctx)
+
+    (source, name), op, expected = node[1], node[2], node[3]
+    compare = _SCALAR_OPS[op]
+    if isinstance(expected, list):
+        expected = frozenset(expected) if all(isinstance(x, (str, int)) for x in expected) else expected
+    if source == 'count':
+        return lambda ctx: compare(len(ctx.get(name) or ()), expected)
+    return lambda ctx: compare(ctx.get(name), expected)
+
+
+class _Context:
+    """Field lookup: computed overlay (grade, loop variables) -> result -> rule set defaults"""
+    __slots__ = ('overlay', 'result', 'defaults')
+
+    def __init__(self, result: Dict[str, Any], defaults: Dict[str, Any], overlay: Optional[Dict[str, Any]] = None):
+        self.result = result
+        self.defaults = defaults
+        self.overlay = overlay or {}
+
+    def get(self, name: str) -> Any:
+        head, _, rest = name.partition('.')
+        if head in self.overlay:
+            value = self.overlay[head]
+        else:
+            value = self.result.get(head, self.defaults.get(head))
+        for part in rest.split('.') if rest else ():
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+    def child(self, **values) -> '_Context':
+        return _Context(self.result, self.defaults, {**self.overlay, **values})
+
+
+class _TemplateFormatter(string.Formatter):
+    def format_field(self, value: Any, format_spec: str) -> str:
+        if format_spec.startswith('join'):
+            limit = format_spec[4:]
+            items = list(value or ())
+            return ', '.join(str(item) for item in (items[:int(limit)] if limit else items))
+        if format_spec == 'upper':
+            return str(value).upper()
+        return format(value, format_spec)
+
+
+_FORMATTER = _TemplateFormatter()
+
+
+def compile_template(template: str, where: str) -> Callable[[_Context], str]:
+    try:
+        parts = list(_FORMATTER.parse(template))
+    except ValueError as e:
+        raise RuleError(f"{where}: invalid template: {e}")
+    if all(field is None for _, field, _, _ in parts):
+        return lambda ctx: template
+
+    def render(ctx: _Context) -> str:
+        out = []
+        for literal, field, spec, conversion in parts:
+            out.append(literal)
+            if field is not None:
+                out.append(_FORMATTER.format_field(_FORMATTER.convert_field(ctx.get(field), conversion), spec or ''))
+        return ''.join(out)
+    return render
+
+
+def compile_emitters(entries: List[Dict[str, Any]], payload: str, where: str, leaves: List[Leaf],
+                     loops: Tuple[Tuple[str, str], ...] = ()) -> Emitter:
+    """Compile an issues/recommendations entry list into one code emitter, registering its payload entries"""
+    if not isinstance(entries, list):
+        raise RuleError(f"{where}: list of entries expected")
+    emitters = [_compile_entry(entry, payload, f"{where}[{i}]", leaves, loops) for i, entry in enumerate(entries)]
+
+    def emit(ctx: _Context, out: List[Any]) -> None:
+        for emitter in emitters:
+            emitter(ctx, out)
+    return emit
+
+
+def _compile_payload(spec: Any, payload: str, where: str) -> Callable[[_Context], Any]:
+    if payload == 'text':
+        if not isinstance(spec, str):
+            raise RuleError(f"{where}: text must be a string")
+        return compile_template(spec, where)
+    if not isinstance(spec, dict) or set(spec) != {'type', 'severity', 'title', 'description'}:
+        raise RuleError(f"{where}: issue needs exactly type, severity, title, description")
+    fields = [(key, compile_template(value, f"{where}.{key}")) for key, value in spec.items()]
+    return lambda ctx: {key: render(ctx) for key, render in fields}
+
+
+def _compile_entry(entry: Dict[str, Any], payload: str, where: str, leaves: List[Leaf],
+                   loops: Tuple[Tuple[str, str], ...]) -> Emitter:
+    if not isinstance(entry, dict):
+        raise RuleError(f"{where}: entry must be an object")
+
+    if 'first' in entry:
+        branches = [
+            (compile_condition(parse_condition(branch.get('when'), f"{where}.first[{i}].when")),
+             compile_emitters(branch.get('then', []), payload, f"{where}.first[{i}].then", leaves, loops))
+            for i, branch in enumerate(entry['first'])
+        ]
+
+        def first(ctx: _Context, out: List[Any]) -> None:
+            for when, then in branches:
+                if when(ctx):
+                    then(ctx, out)
+                    return
+        return first
+
+    if 'switch' in entry:
+        name = entry['switch']
+        cases = {value: compile_emitters(body, payload, f"{where}.cases.{value}", leaves, loops)
+                 for value, body in entry.get('cases', {}).items()}
+        default = compile_emitters(entry.get('default', []), payload, f"{where}.default", leaves, loops)
+
+        def switch(ctx: _Context, out: List[Any]) -> None:
+            cases.get(ctx.get(name), default)(ctx, out)
+        return switch
+
+    if 'for_each' in entry:
+        name, var = entry['for_each'], entry.get('as', 'item')
+        where_cond = compile_condition(parse_condition(entry.get('where'), f"{where}.where"))
+        body = compile_emitters(entry.get('then', []), payload, f"{where}.then", leaves, loops + ((name, var),))
+
+        def for_each(ctx: _Context, out: List[Any]) -> None:
+            bindings = ctx.overlay.get(_BINDINGS, ())
+            for i, item in enumerate(ctx.get(name) or ()):
+                binding = item if isinstance(item, str) else i
+                item_ctx = ctx.child(**{var: item, _BINDINGS: (*bindings, binding)})
+                if where_cond(item_ctx):
+                    body(item_ctx, out)
+        return for_each
+
+    when = compile_condition(parse_condition(entry.get('when'), f"{where}.when"))
+    if payload in entry:
+        leaf = len(leaves)
+        leaves.append((_compile_payload(entry[payload], payload, f"{where}.{payload}"), loops))
+
+        def emit(ctx: _Context, out: List[Any]) -> None:
+            if when(ctx):
+                out.append([leaf, *ctx.overlay.get(_BINDINGS, ())])
+        return emit
+    if 'then' in entry:
+        body = compile_emitters(entry['then'], payload, f"{where}.then", leaves, loops)
+
+        def group(ctx: _Context, out: List[Any]) -> None:
+            if when(ctx):
+                body(ctx, out)
+        return group
+    raise RuleError(f"{where}: entry needs {payload}, then, first, switch or for_each")
+
+
+def _grade(value: Any, where: str) -> str:
+    if value not in GRADES:
+        raise RuleError(f"{where}: unknown grade {value!r}")
+    return value
+
+
+@dataclass(slots=True)
+class Evaluation:
+    ssl_grade: str
+    security_score: int
+    business_impact: Dict[str, int]
+    issues: List[Dict[str, str]]
+    recommendations: List[str]
+    rules_version: int
+    issue_codes: List[List[Any]]
+    recommendation_codes: List[List[Any]]
+
+
+class RuleSet:
+    """A compiled rule set; the parsed sections are kept for batch_scoring"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        if not isinstance(spec.get('version'), int):
+            raise RuleError("rule set needs an integer 'version'")
+        self.version = spec['version']
+        self.description = spec.get('description', '')
+        self.fields = self._parse_fields(spec.get('fields', {}))
+        self.defaults = {name: field.get('default') for name, field in self.fields.items()}
+        self._parse_grade(spec.get('grade', {}))
+        self._parse_score(spec.get('score', {}))
+        self._parse_impact(spec.get('impact', {}))
+        self._issue_leaves: List[Leaf] = []
+        self._emit_issues = compile_emitters(spec.get('issues', []), 'issue', 'issues', self._issue_leaves)
+        self._recommendation_leaves: List[Leaf] = []
+        self._emit_recommendations = compile_emitters(
+            spec.get('recommendations', []), 'text', 'recommendations', self._recommendation_leaves
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RuleSet':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+        except (OSError, ValueError) as e:
+            raise RuleError(f"Cannot load rule set {path}: {e}")
+        return cls(spec)
+
+    @staticmethod
+    def _parse_fields(fields: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        for name, field in fields.items():
+            field_type = field.setdefault('type', 'any')
+            if field_type not in FIELD_TYPES:
+                raise RuleError(f"fields.{name}: unknown type {field_type!r}")
+            if field_type == 'set' and not isinstance(field.get('values'), list):
+                raise RuleError(f"fields.{name}: set fields need their possible 'values'")
+            if field_type == 'bool' and not isinstance(field.get('default'), bool):
+                raise RuleError(f"fields.{name}: bool fields need a true/false default (use tristate otherwise)")
+        return fields
+
+    def _parse_grade(self, grade: Dict[str, Any]) -> None:
+        self.grade_rules = [
+            (parse_condition(rule.get('when'), f"grade.rules[{i}].when"), _grade(rule['grade'], f"grade.rules[{i}]"))
+            for i, rule in enumerate(grade.get('rules', []))
+        ]
+        points = grade.get('points', {})
+        self.points_base = points.get('base', 0)
+        self.points_adjustments = [
+            [(parse_condition(step.get('when'), f"grade.points.adjustments[{g}][{i}].when"), step['add'])
+             for i, step in enumerate(group)]
+            for g, group in enumerate(points.get('adjustments', []))
+        ]
+        self.points_thresholds = [(limit, _grade(value, 'grade.points.thresholds'))
+                                  for limit, value in points.get('thresholds', [])]
+        self.points_otherwise = _grade(points.get('otherwise', 'F'), 'grade.points.otherwise')
+        caps = grade.get('caps')
+        self.caps_field = caps['field'] if caps else None
+        self.caps = {item: _grade(value, 'grade.caps') for item, value in (caps or {}).get('grades', {}).items()}
+
+        self._grade_rules = [(compile_condition(node), value) for node, value in self.grade_rules]
+        self._points_adjustments = [[(compile_condition(node), add) for node, add in group]
+                                    for group in self.points_adjustments]
+
+    def _parse_score(self, score: Dict[str, Any]) -> None:
+        self.score_rules = [
+            (parse_condition(rule.get('when'), f"score.rules[{i}].when"), rule['score'])
+            for i, rule in enumerate(score.get('rules', []))
+        ]
+        self.grade_scores = score.get('grade_scores', {})
+        self.grade_score_default = score.get('grade_score_default', 40)
+        self.penalties = []
+        for i, penalty in enumerate(score.get('penalties', [])):
+            if 'per_item' in penalty:
+                self.penalties.append(('per_item', penalty['per_item'], penalty['points']))
+            elif 'field' in penalty:
+                self.penalties.append(('field', penalty['field'], None))
+            elif 'when' in penalty:
+                self.penalties.append(('when', parse_condition(penalty['when'], f"score.penalties[{i}].when"),
+                                       penalty['points']))
+            else:
+                raise RuleError(f"score.penalties[{i}]: needs per_item, field or when")
+        self.score_minimum = score.get('minimum', 0)
+
+        self._score_rules = [(compile_condition(node), value) for node, value in self.score_rules]
+        self._penalties = [
+            (kind, compile_condition(arg) if kind == 'when' else arg, points)
+            for kind, arg, points in self.penalties
+        ]
+
+    def _parse_impact(self, impact: Dict[str, Any]) -> None:
+        self.impact_rules = []
+        for i, rule in enumerate(impact.get('rules', [])):
+            if set(rule['impact']) != set(IMPACT_FIELDS):
+                raise RuleError(f"impact.rules[{i}]: impact needs {', '.join(IMPACT_FIELDS)}")
+            self.impact_rules.append((parse_condition(rule.get('when'), f"impact.rules[{i}].when"), rule['impact']))
+        self.impact_formula = {'base_revenue': 0, 'max_loss_rate': 0.0, 'seo_divisor': 15, 'trust_divisor': 3,
+                               **impact.get('formula', {})}
+        self._impact_rules = [(compile_condition(node), value) for node, value in self.impact_rules]
+
+    # -- scalar evaluation -------------------------------------------------
+
+    def _context(self, result: Dict[str, Any], **overlay) -> _Context:
+        return _Context(result, self.defaults, overlay)
+
+    def _grade_in(self, ctx: _Context) -> str:
+        grade = None
+        for when, value in self._grade_rules:
+            if when(ctx):
+                grade = value
+                break
+        if grade is None:
+            points = self.points_base
+            for group in self._points_adjustments:
+                for when, add in group:
+                    if when(ctx):
+                        points += add
+                        break
+            grade = next((value for limit, value in self.points_thresholds if points >= limit),
+                         self.points_otherwise)
+        if self.caps_field:
+            caps = [GRADES.index(self.caps[item]) for item in ctx.get(self.caps_field) or () if item in self.caps]
+            grade = GRADES[max(caps + [GRADES.index(grade)])]
+        return grade
+
+    def _score_in(self, ctx: _Context) -> int:
+        for when, value in self._score_rules:
+            if when(ctx):
+                return max(self.score_minimum, value)
+        score = self.grade_scores.get(ctx.get('ssl_grade'), self.grade_score_default)
+        for kind, arg, points in self._penalties:
+            if kind == 'per_item':
+                score -= len(ctx.get(arg) or ()) * points
+            elif kind == 'field':
+                score -= ctx.get(arg) or 0
+            elif arg(ctx):
+                score -= points
+        return max(self.score_minimum, score)
+
+    def _impact_in(self, ctx: _Context, security_score: int) -> Dict[str, int]:
+        for when, value in self._impact_rules:
+            if when(ctx):
+                return dict(value)
+        formula = self.impact_formula
+        shortfall = 100 - security_score
+        loss_rate = max(0, shortfall / 100 * formula['max_loss_rate'])
+        return {
+            'revenue_loss_annual': int(formula['base_revenue'] * loss_rate),
+            'seo_impact': max(0, shortfall // formula['seo_divisor']),
+            'user_trust_impact': max(0, shortfall // formula['trust_divisor'])
+        }
+
+    def grade(self, result: Dict[str, Any]) -> str:
+        return self._grade_in(self._context(result))
+
+    def score(self, result: Dict[str, Any]) -> int:
+        """Security score for a result that already carries its ``ssl_grade``"""
+        return self._score_in(self._context(result))
+
+    def business_impact(self, security_score: int, result: Dict[str, Any]) -> Dict[str, int]:
+        return self._impact_in(self._context(result), security_score)
+
+    def issue_codes(self, result: Dict[str, Any]) -> List[List[Any]]:
+        out: List[List[Any]] = []
+        self._emit_issues(self._context(result), out)
+        return out
+
+    def recommendation_codes(self, result: Dict[str, Any]) -> List[List[Any]]:
+        out: List[List[Any]] = []
+        self._emit_recommendations(self._context(result), out)
+        return out
+
+    @staticmethod
+    def _render(leaves: List[Leaf], codes: List[Any], ctx: _Context) -> List[Any]:
+        out = []
+        for code in codes:
+            if not isinstance(code, list):
+                out.append(code)  # text stored before analyses kept codes
+                continue
+            render, loops = leaves[code[0]]
+            item_ctx = ctx
+            for (name, var), binding in zip(loops, code[1:]):
+                item = binding if isinstance(binding, str) else (item_ctx.get(name) or ())[binding]
+                item_ctx = item_ctx.child(**{var: item})
+            out.append(render(item_ctx))
+        return out
+
+    def render_issues(self, codes: List[Any], result: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Issue text for codes emitted over ``result`` by this rule set"""
+        return self._render(self._issue_leaves, codes, self._context(result))
+
+    def render_recommendations(self, codes: List[Any], result: Dict[str, Any]) -> List[str]:
+        """Recommendation text for codes emitted over ``result`` by this rule set"""
+        return self._render(self._recommendation_leaves, codes, self._context(result))
+
+    def issues(self, result: Dict[str, Any]) -> List[Dict[str, str]]:
+        return self.render_issues(self.issue_codes(result), result)
+
+    def recommendations(self, result: Dict[str, Any]) -> List[str]:
+        return self.render_recommendations(self.recommendation_codes(result), result)
+
+    def evaluate(self, result: Dict[str, Any]) -> Evaluation:
+        """Grade, score, impact, issues and recommendations in one pass"""
+        ctx = self._context(result)
+        grade = self._grade_in(ctx)
+        ctx = self._context(result, ssl_grade=grade)
+        score = self._score_in(ctx)
+        issue_codes: List[List[Any]] = []
+        self._emit_issues(ctx, issue_codes)
+        recommendation_codes: List[List[Any]] = []
+        self._emit_recommendations(ctx, recommendation_codes)
+        return Evaluation(
+            grade, score, self._impact_in(ctx, score),
+            self._render(self._issue_leaves, issue_codes, ctx),
+            self._render(self._recommendation_leaves, recommendation_codes, ctx),
+            self.version, issue_codes, recommendation_codes
+        )
+
+
+def rules_path(version: int) -> str:
+    return os.path.join(RULES_CONFIG['rules_dir'], f"v{version}.json")
+
+
+@lru_cache(maxsize=None)
+def load_ruleset(version: Optional[int] = None) -> RuleSet:
+    """Compiled rule set by version (the configured active version by default), compiled once"""
+    return RuleSet.from_file(rules_path(version or RULES_CONFIG['active_version']))
+
+
+def available_versions() -> List[int]:
+    versions = []
+    for name in os.listdir(RULES_CONFIG['rules_dir']):
+        stem, ext = os.path.splitext(name)
+        if ext == '.json' and stem[:1] == 'v' and stem[1:].isdigit():
+            versions.append(int(stem[1:]))
+    return sorted(versions)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Grading rule sets")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_parser = subparsers.add_parser('check', help="validate and compile a rule set file")
+    check_parser.add_argument('path')
+    compare_parser = subparsers.add_parser('compare', help="grade transitions between two versions over stored analyses")
+    compare_parser.add_argument('old', type=int)
+    compare_parser.add_argument('new', type=int)
+    compare_parser.add_argument('--limit', type=int, help="only the first N stored analyses")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'check':
+            ruleset = RuleSet.from_file(args.path)
+            print(f"OK: version {ruleset.version} ({ruleset.description})")
+        else:
+            from analysis_store import AnalysisStore
+            from batch_scoring import extract_columns, score_batch
+
+            old, new = load_ruleset(args.old), load_ruleset(args.new)
+            transitions: Counter = Counter()
+            for records in AnalysisStore().iter_records(limit=args.limit):
+                results = [record.result.to_dict() for record in records]
+                old_grades = score_batch(extract_columns(results, old), old).grades()
+                new_grades = score_batch(extract_columns(results, new), new).grades()
+                transitions.update(zip(old_grades, new_grades))
+            changed = sum(n for (a, b), n in transitions.items() if a != b)
+            print(f"{sum(transitions.values())} analyses, {changed} grade changes (v{args.old} -> v{args.new})")
+            for (a, b), n in sorted(transitions.items(), key=lambda item: -item[1]):
+                if a != b:
+                    print(f"  {a:>2} -> {b:<2} {n}")
+    except RuleError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
@@ -0,0 +1,146 @@
+"""
+Service Scanner - TLS service targets and STARTTLS negotiation
+"""
+
+import ipaddress
+import socket
+from dataclasses import dataclass
+from typing import List, Optional
+
+from config import SERVICE_SCAN_CONFIG
+from error_handling import SSLAnalysisError, URLValidator, ValidationError
+
+
+class StartTLSError(SSLAnalysisError):
+    """Exception raised when a server does not offer or complete STARTTLS"""
+    pass
+
+
+@dataclass(frozen=True)
+class ServiceTarget:
+    """One TLS endpoint to probe: host, port and application protocol"""
+    host: str
+    port: int
+    protocol: str = 'https'
+
+    @property
+    def starttls(self) -> Optional[str]:
+        return SERVICE_SCAN_CONFIG['protocols'][self.protocol].get('starttls')
+
+    @property
+    def key(self) -> str:
+        return f"{self.host}:{self.port}/{self.protocol}"
+
+    @classmethod
+    def parse(cls, spec: str, default_host: str) -> 'ServiceTarget':
+        """Parse ``[host][:port][/protocol]`` (e.g. ``mail.example.com:587/submission``)"""
+        spec = spec.strip()
+        address, _, protocol = spec.partition('/')
+        if address.startswith('['):
+            # Bracketed IPv6 literal: [::1]:443
+            host, closed, rest = address[1:].partition(']')
+            if not closed or (rest and not rest.startswith(':')):
+                raise ValidationError(f"잘못된 서비스 주소입니다: {address}")
+            port_str = rest[1:]
+        elif address.count(':') > 1:
+            raise ValidationError("IPv6 주소는 [주소]:포트 형식으로 입력해야 합니다")
+        else:
+            host, _, port_str = address.partition(':')
+        host = (host or default_host).lower()
+        if not _is_ip_literal(host):
+            URLValidator.validate_url(f"https://{host}")
+        protocols = SERVICE_SCAN_CONFIG['protocols']
+
+        if not protocol:
+            # Infer the protocol from a well-known port, defaulting to HTTPS
+            port = int(port_str) if port_str.isdigit() else protocols['https']['port']
+            protocol = next((name for name, p in protocols.items() if p['port'] == port), 'https')
+        elif protocol not in protocols:
+            raise ValidationError(
+                f"지원하지 않는 프로토콜입니다: {protocol} (사용 가능: {', '.join(protocols)})"
+            )
+
+        if port_str and not port_str.isdigit():
+            raise ValidationError(f"잘못된 포트 번호입니다: {port_str}")
+        port = int(port_str) if port_str else protocols[protocol]['port']
+        if not 0 < port < 65536:
+            raise ValidationError(f"잘못된 포트 번호입니다: {port}")
+        return cls(host, port, protocol)
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def in_scope(host: str, domain: str, mx_hosts: List[str]) -> bool:
+    """A service host may be the requested domain, one of its subdomains or one of its MX hosts"""
+    return host == domain or host.endswith(f".{domain}") or host in mx_hosts
+
+
+def default_service_targets(domain: str) -> List[ServiceTarget]:
+    """HTTPS plus the usual mail services for a domain"""
+    return [ServiceTarget.parse(spec, domain) for spec in SERVICE_SCAN_CONFIG['default_services']]
+
+
+def _read_reply(sock: socket.socket, is_last_line) -> str:
+    """Read protocol lines until ``is_last_line`` matches (blocking)"""
+    buffer = b''
+    while True:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise StartTLSError("서버가 STARTTLS 협상 중 연결을 종료했습니다")
+        buffer += chunk
+        if len(buffer) > 65536:
+            raise StartTLSError("STARTTLS 응답이 너무 깁니다")
+        lines = buffer.split(b'\r\n')
+        complete = [line.decode('latin-1') for line in lines[:-1]]
+        if any(is_last_line(line) for line in complete):
+            return '\n'.join(complete)
+
+
+def _smtp_starttls(sock: socket.socket) -> None:
+    """SMTP (RFC 3207): greeting, EHLO, STARTTLS"""
+    def is_final(line: str) -> bool:
+        return len(line) >= 4 and line[3] == ' '
+
+    greeting = _read_reply(sock, is_final)
+    if not greeting.startswith('220'):
+        raise StartTLSError(f"SMTP 인사 응답 오류: {greeting[:80]}")
+
+    sock.sendall(f"EHLO {SERVICE_SCAN_CONFIG['ehlo_name']}\r\n".encode())
+    ehlo = _read_reply(sock, is_final)
+    if not ehlo.startswith('250') or 'STARTTLS' not in ehlo.upper():
+        raise StartTLSError("서버가 STARTTLS를 지원하지 않습니다")
+
+    sock.sendall(b"STARTTLS\r\n")
+    reply = _read_reply(sock, is_final)
+    if not reply.startswith('220'):
+        raise StartTLSError(f"STARTTLS 거부됨: {reply[:80]}")
+
+
+def _imap_starttls(sock: socket.socket) -> None:
+    """IMAP (RFC 3501): greeting, STARTTLS command"""
+    greeting = _read_reply(sock, lambda line: line.startswith('* '))
+    if not greeting.startswith('* OK'):
+        raise StartTLSError(f"IMAP 인사 응답 오류: {greeting[:80]}")
+
+    sock.sendall(b"a1 STARTTLS\r\n")
+    reply = _read_reply(sock, lambda line: line.startswith('a1 '))
+    if not reply.splitlines()[-1].startswith('a1 OK'):
+        raise StartTLSError("서버가 STARTTLS를 지원하지 않습니다")
+
+
+STARTTLS_NEGOTIATORS = {
+    'smtp': _smtp_starttls,
+    'imap': _imap_starttls
+}
+
+
+def negotiate_starttls(sock: socket.socket, method: Optional[str]) -> None:
+    """Upgrade a plaintext connection so the TLS handshake can start"""
+    if method:
+        STARTTLS_NEGOTIATORS[method](sock)
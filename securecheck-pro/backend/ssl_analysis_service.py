@@ -3,10 +3,8 @@ SSL Analysis Service - Consolidated SSL analysis logic
 """
 
 from typing import Dict, Any, List
-from config import (
-    SSL_GRADE_SCORES, BUSINESS_IMPACT_CONFIG, SECURITY_SCORING,
-    CRITICAL_SECURITY_HEADERS, CERTIFICATE_THRESHOLDS
-)
+from config import CRITICAL_SECURITY_HEADERS, CERTIFICATE_THRESHOLDS
+from rules_engine import load_ruleset
 
 
 class SSLAnalysisService:
@@ -116,103 +114,10 @@ class SSLAnalysisService:
     
     @staticmethod
     def calculate_security_score(ssl_result: Dict[str, Any]) -> int:
-        """Calculate security score based on SSL analysis results"""
-        ssl_status = ssl_result.get('ssl_status', 'connection_error')
-        
-        # Base score from SSL status
-        if ssl_status in SECURITY_SCORING['ssl_status_scores']:
-            score = SECURITY_SCORING['ssl_status_scores'][ssl_status]
-        elif ssl_status == 'valid':
-            # Valid SSL - calculate based on grade
-            ssl_grade = ssl_result.get("ssl_grade", "B")
-            score = SSL_GRADE_SCORES.get(ssl_grade, 40)
-            
-            # Apply penalties
-            missing_headers = ssl_result.get("missing_security_headers", [])
-            score -= len(missing_headers) * SECURITY_SCORING['header_penalty']
-            
-            # Certificate expiry penalty
-            days_until_expiry = ssl_result.get('days_until_expiry', 0)
-            if days_until_expiry < CERTIFICATE_THRESHOLDS['warning_expiry_days']:
-                score -= SECURITY_SCORING['expiry_penalty']
-        else:
-            score = 0
-        
-        return max(0, score)
+        """Calculate security score based on SSL analysis results (active rule set)"""
+        return load_ruleset().score(ssl_result)
     
     @staticmethod
     def extract_security_issues(ssl_result: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Extract security issues from SSL analysis result"""
-        issues = []
-        ssl_status = ssl_result.get('ssl_status', 'connection_error')
-        
-        # SSL service issues
-        if ssl_status == 'no_ssl' or not ssl_result.get('port_443_open', False):
-            issues.extend([
-                {
-                    "type": "ssl_service",
-                    "severity": "critical",
-                    "title": "HTTPS 서비스 완전 부재",
-                    "description": "443 포트가 닫혀있어 HTTPS 서비스가 전혀 제공되지 않습니다."
-                },
-                {
-                    "type": "data_encryption",
-                    "severity": "critical",
-                    "title": "모든 데이터 평문 전송",
-                    "description": "암호화 없이 모든 데이터가 평문으로 전송되어 도청 위험에 노출됩니다."
-                },
-                {
-                    "type": "browser_warning",
-                    "severity": "high",
-                    "title": "브라우저 보안 경고",
-                    "description": "모든 브라우저에서 '안전하지 않음' 경고 메시지가 표시됩니다."
-                }
-            ])
-        
-        # Certificate issues
-        certificate_issues = {
-            'expired': {
-                "type": "certificate",
-                "severity": "critical",
-                "title": "SSL 인증서 만료",
-                "description": "SSL 인증서가 만료되어 브라우저에서 보안 경고를 표시합니다."
-            },
-            'self_signed': {
-                "type": "certificate",
-                "severity": "high",
-                "title": "자체 서명 인증서",
-                "description": "신뢰할 수 있는 인증기관에서 발급하지 않은 인증서로, 브라우저에서 경고를 표시합니다."
-            },
-            'verify_failed': {
-                "type": "certificate",
-                "severity": "critical",
-                "title": "SSL 인증서 검증 실패",
-                "description": "브라우저에서 SSL 인증서를 신뢰할 수 없습니다. 인증 기관이 유효하지 않거나 체인이 불완전합니다."
-            }
-        }
-        
-        if ssl_status in certificate_issues:
-            issues.append(certificate_issues[ssl_status])
-        
-        # Security header issues
-        missing_headers = ssl_result.get("missing_security_headers", [])
-        for header in missing_headers:
-            issues.append({
-                "type": "security_header",
-                "severity": "medium",
-                "title": f"{header} 헤더 누락",
-                "description": f"{header} 보안 헤더가 설정되지 않았습니다."
-            })
-        
-        # Certificate expiry warning
-        if ssl_status == 'valid':
-            days_until_expiry = ssl_result.get('days_until_expiry', 0)
-            if 0 < days_until_expiry < CERTIFICATE_THRESHOLDS['warning_expiry_days']:
-                issues.append({
-                    "type": "certificate",
-                    "severity": "medium",
-                    "title": "SSL 인증서 만료 임박",
-                    "description": f"SSL 인증서가 {days_until_expiry}일 후에 만료됩니다."
-                })
-        
-        return issues
\ No newline at end of file
+        """Extract security issues from SSL analysis result (active rule set)"""
+        return load_ruleset().issues(ssl_result)
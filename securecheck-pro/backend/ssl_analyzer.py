@@ -9,112 +9,381 @@ from typing import Dict, List, Optional
 import subprocess
 import json
 import re
+import ipaddress
+
+from politeness import PolitenessScheduler
+from circuit_breaker import UnreachableHostGuard
+from deadline import Deadline
+from service_scanner import ServiceTarget, StartTLSError, in_scope, negotiate_starttls
+from error_handling import URLValidator, ValidationError, logger
+from tls_context import TLSContextFactory
+from tls_session_cache import TLSSessionCache
+from redirect_analyzer import RedirectAnalyzer
+from header_analysis import HeaderIndex, analyze_headers
+from hsts_preload import HSTSPreloadIndex, parse_hsts_header, preload_eligibility
+from ct_validation import CTValidator
+from key_reuse_index import KeyReuseIndex, LeafFingerprints, leaf_fingerprints
+from key_strength import KeyStrengthChecker
+from dns_checks import DNSSecurityChecker
+from rules_engine import load_ruleset
+from config import SERVICE_SCAN_CONFIG, TLS_SESSION_CONFIG, HTTP_CLIENT_CONFIG, DNS_CHECK_CONFIG, SECURITY_HEADERS
+import time
+
+
+def _is_ip(address: str) -> bool:
+    try:
+        ipaddress.ip_address(address)
+        return True
+    except ValueError:
+        return False
+
 
 class SSLAnalyzer:
     """SSL/TLS 보안 분석 클래스 - SSL_Certificate_Analysis_Guide.md 기반 구현"""
     
-    def __init__(self):
-        self.security_headers = [
-            'Strict-Transport-Security',
-            'Content-Security-Policy', 
-            'X-Frame-Options',
-            'X-Content-Type-Options',
-            'X-XSS-Protection',
-            'Referrer-Policy'
-        ]
+    def __init__(self, scheduler: Optional[PolitenessScheduler] = None,
+                 host_guard: Optional[UnreachableHostGuard] = None,
+                 context_factory: Optional[TLSContextFactory] = None,
+                 session_cache: Optional[TLSSessionCache] = None):
+        # 대상 IP 및 /24 대역별 요청 속도 제한 (대량 스캔 시 방화벽 차단 방지)
+        self.scheduler = scheduler or PolitenessScheduler()
+        # 연결 불가 호스트의 회로 차단기 + 실패 결과 단기 캐시
+        self.host_guard = host_guard or UnreachableHostGuard()
+        self._background_probes: Dict[str, asyncio.Task] = {}
+        # 신뢰 저장소를 시작 시 한 번만 로드하여 모든 핸드셰이크에서 공유 (번들 변경 시 자동 재로드)
+        self.context_factory = context_factory or TLSContextFactory()
+        # 호스트별 TLS 세션 캐시 - 재점검 시 세션 재개로 전체 핸드셰이크 비용 절감
+        self.session_cache = session_cache or TLSSessionCache()
+        # 헤더/리다이렉트 점검용 공유 HTTP 클라이언트 (연결 풀 재사용)
+        self.redirect_analyzer = RedirectAnalyzer()
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        # 오프라인 HSTS 프리로드 목록 (메모리 매핑 인덱스)
+        self.hsts_preload_index = HSTSPreloadIndex()
+        # 로컬 CT 로그 목록으로 인증서 내장 SCT 서명 검증
+        self.ct_validator = CTValidator()
+        # 분석한 모든 인증서의 SPKI/지문 색인 - 서로 다른 도메인 간 키 공유 탐지
+        self.key_reuse_index = KeyReuseIndex()
+        # 키 길이/곡선/서명 해시 및 알려진 취약 키 차단 목록 (메모리 매핑)
+        self.key_checker = KeyStrengthChecker()
+        # CAA/DNSSEC/TLSA 점검 - 비동기 리졸버와 응답 캐시를 모든 분석이 공유
+        self.dns_checker = DNSSecurityChecker()
+        self.security_headers = list(SECURITY_HEADERS)
+    
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """풀링된 aiohttp 세션 (최초 사용 시 생성)"""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_CLIENT_CONFIG['pool_size'],
+                limit_per_host=HTTP_CLIENT_CONFIG['per_host_limit'],
+                ttl_dns_cache=HTTP_CLIENT_CONFIG['dns_cache_ttl']
+            )
+            self._http_session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': HTTP_CLIENT_CONFIG['user_agent']}
+            )
+        return self._http_session
+    
+    async def close(self) -> None:
+        """공유 HTTP 세션 종료 (애플리케이션 종료 시 호출)"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+    
+    async def analyze(self, url: str, deadline: Optional[Deadline] = None) -> Dict:
+        """웹사이트의 전체 SSL 보안 분석을 수행합니다 - SSL_Certificate_Analysis_Guide.md 방법론 적용
+        
+        deadline: 분석 전체 시간 예산 (없으면 TIMEOUT_CONFIG 기본값)
+        """
+        parsed_url = urlparse(url)
+        domain = parsed_url.hostname or parsed_url.path
+        guard_key = f"{domain}:{parsed_url.port or 443}"
+        
+        # 최근 연결 실패한 호스트는 타임아웃을 다시 기다리지 않고 캐시된 결과 반환
+        cached = self.host_guard.lookup(guard_key)
+        if cached is not None:
+            if self.host_guard.breaker.try_half_open(guard_key):
+                self._start_half_open_probe(url, guard_key)
+            return {**cached, 'cached': True, 'circuit_state': self.host_guard.breaker.state(guard_key)}
+        
+        result = await self._analyze_uncached(url, deadline)
+        # 짧은 예산 때문에 시간 초과된 결과는 호스트 장애로 간주하지 않음
+        if not result.get('deadline_exceeded'):
+            self.host_guard.record(guard_key, result)
+        return result
+    
+    def _start_half_open_probe(self, url: str, guard_key: str) -> None:
+        """회로 반개방 상태에서 백그라운드로 재시도하여 캐시 갱신"""
+        if guard_key in self._background_probes:
+            return
+        
+        async def probe():
+            try:
+                result = await self._analyze_uncached(url)
+                self.host_guard.record(guard_key, result)
+            finally:
+                self._background_probes.pop(guard_key, None)
+        
+        self._background_probes[guard_key] = asyncio.create_task(probe())
     
-    async def analyze(self, url: str) -> Dict:
-        """웹사이트의 전체 SSL 보안 분석을 수행합니다 - SSL_Certificate_Analysis_Guide.md 방법론 적용"""
+    async def _analyze_uncached(self, url: str, deadline: Optional[Deadline] = None) -> Dict:
+        """캐시를 거치지 않는 실제 분석 (전체 시간 예산 내에서 수행)"""
         parsed_url = urlparse(url)
-        domain = parsed_url.netloc or parsed_url.path
-        port = 443  # HTTPS 포트 고정
+        domain = parsed_url.hostname or parsed_url.path
+        port = parsed_url.port or 443  # URL에 포트가 없으면 HTTPS 기본 포트
+        deadline = deadline or Deadline()
         
         result = {
             'domain': domain,
             'port': port,
             'analyzed_at': datetime.now().isoformat(),
-            'url_scheme': parsed_url.scheme
+            'url_scheme': parsed_url.scheme,
+            'timeout_budget': deadline.budget
         }
         
         try:
-            # 1. 포트 연결 테스트 (가이드의 nc -z 명령 구현)
-            port_status = await self._test_port_connection(domain, port)
-            result.update(port_status)
-            
-            if not port_status.get('port_443_open', False):
-                # 443 포트가 닫혀있으면 SSL 없음
-                result.update({
-                    'ssl_grade': 'F',
-                    'certificate_valid': False,
-                    'ssl_status': 'no_ssl',
-                    'analysis_result': 'SSL 인증서가 아예 없는 경우'
-                })
-                return result
-            
-            # 2. SSL 인증서 분석 (가이드의 openssl s_client 구현)
-            cert_info = await self._analyze_certificate_real(domain, port)
-            result.update(cert_info)
-            
-            # 3. 보안 헤더 분석  
-            headers_info = await self._analyze_security_headers(url)
-            result.update(headers_info)
-            
-            # 4. 전체 SSL 등급 계산 (가이드 기준)
-            result['ssl_grade'] = self._calculate_ssl_grade_real(result)
-            
+            await asyncio.wait_for(
+                self._run_stages(url, ServiceTarget(domain, port), result, deadline),
+                timeout=deadline.remaining()
+            )
+        except asyncio.TimeoutError:
+            # 예산 초과 - 그때까지 수집한 결과는 유지
+            result['error'] = f"분석 시간 예산({deadline.budget:g}초) 초과"
+            result['deadline_exceeded'] = True
+            result['timed_out_stage'] = deadline.current_stage
+            result['ssl_grade'] = 'F'
+            result['certificate_valid'] = False
         except Exception as e:
             result['error'] = str(e)
             result['ssl_grade'] = 'F'
             result['certificate_valid'] = False
-            
+        
+        result['elapsed_seconds'] = round(deadline.elapsed(), 3)
         return result
     
-    async def _test_port_connection(self, domain: str, port: int) -> Dict:
-        """포트 연결 테스트 (가이드의 nc -z domain 443 구현)"""
+    async def _run_stages(self, url: str, target: ServiceTarget,
+                          result: Dict, deadline: Deadline) -> None:
+        """분석 단계 실행 - 각 단계는 남은 예산 중 자신의 몫만 사용"""
+        # DNS 보안 점검(CAA/DNSSEC/TLSA)은 TLS 점검과 동시에 실행하여 추가 대기 시간 없음
+        dns_task = self._start_dns_checks(target.host, [target.port], deadline)
         try:
+            # 0. DNS 조회 - 모든 단계가 같은 IP를 사용하고 IP 단위로 속도 제한
+            target_ip = await self._resolve_target(target.host, target.port, deadline.stage_timeout('resolve'))
+            result['target_ip'] = target_ip
+            await self._probe_service(target, target_ip, result, deadline, url)
+            if dns_task is not None:
+                result.update(await dns_task)
+        finally:
+            if dns_task is not None and not dns_task.done():
+                dns_task.cancel()
+    
+    def _start_dns_checks(self, host: str, ports: List[int], deadline: Deadline) -> Optional[asyncio.Task]:
+        """도메인 이름인 경우에만 DNS 보안 점검 태스크 시작 (IP 주소/단일 레이블은 제외)"""
+        if not self.dns_checker.available or '.' not in host:
+            return None
+        try:
+            ipaddress.ip_address(host)
+            return None
+        except ValueError:
+            pass
+        timeout = min(DNS_CHECK_CONFIG['timeout'], deadline.remaining())
+        return asyncio.create_task(self.dns_checker.check(host, ports, timeout))
+    
+    async def _probe_service(self, target: ServiceTarget, target_ip: str, result: Dict,
+                             deadline: Deadline, url: Optional[str] = None) -> None:
+        """단일 TLS 서비스(host:port/protocol) 점검 - 결과는 등급 계산과 같은 형태"""
+        # 1. 포트 연결 테스트 (가이드의 nc -z 명령 구현)
+        async with self.scheduler.slot(target_ip):
+            port_status = await self._test_port_connection(
+                target_ip, target.port, deadline.stage_timeout('port')
+            )
+        result.update(port_status)
+        
+        is_http_service = SERVICE_SCAN_CONFIG['protocols'][target.protocol].get('http_headers')
+        
+        if not port_status.get('port_443_open', False):
+            # TLS 포트가 닫혀있으면 SSL 없음
+            result.update({
+                'ssl_grade': 'F',
+                'certificate_valid': False,
+                'ssl_status': 'no_ssl'
+            })
+            if is_http_service:
+                # HTTPS가 없어도 80 포트의 응답/리다이렉트는 확인
+                async with self.scheduler.slot(target_ip):
+                    result.update(await self._analyze_http(target, None, deadline.stage_timeout('headers')))
+            return
+        
+        # 2. SSL 인증서 분석 (가이드의 openssl s_client 구현, 메일은 STARTTLS 후 핸드셰이크)
+        try:
+            async with self.scheduler.slot(target_ip):
+                cert_info = await self._analyze_certificate_real(
+                    target.host, target.port, target_ip, deadline.stage('handshake'), target.starttls
+                )
+        except StartTLSError as e:
+            result.update({
+                'ssl_grade': 'F',
+                'certificate_valid': False,
+                'ssl_status': 'no_ssl',
+                'starttls_supported': False,
+                'certificate_error': str(e)
+            })
+            return
+        result.update(cert_info)
+        if cert_info.get('spki_sha256'):
+            result.update(self.key_reuse_index.record(
+                target.host, LeafFingerprints(cert_info['spki_sha256'], cert_info['cert_sha256'])
+            ))
+        
+        # 3. 보안 헤더 + HTTP→HTTPS 리다이렉트 분석 (HTTP 서비스에만 해당)
+        if is_http_service:
+            if not url or urlparse(url).scheme != 'https':
+                url = f"https://{target.host}:{target.port}/"
+            async with self.scheduler.slot(target_ip):
+                headers_info = await self._analyze_http(target, url, deadline.stage_timeout('headers'))
+            result.update(headers_info)
+        else:
+            result['headers_applicable'] = False
+        
+        # 4. 전체 SSL 등급 계산 (활성 채점 규칙 버전 기준)
+        result['ssl_grade'] = load_ruleset().grade(result)
+    
+    async def analyze_services(self, domain: str, targets: List[ServiceTarget],
+                               deadline: Optional[Deadline] = None) -> Dict:
+        """도메인의 여러 TLS 서비스(HTTPS, SMTP STARTTLS, IMAPS 등)를 동시에 점검
+        
+        호스트별 DNS 조회는 한 번만 수행하고 신뢰 저장소(SSLContext)는 모든 서비스가 공유합니다.
+        """
+        deadline = deadline or Deadline()
+        hosts = sorted({target.host for target in targets})
+        resolve_timeout = deadline.stage_timeout('resolve')
+        # 요청한 도메인/하위 도메인/MX 호스트만 허용 (임의 호스트 포트 스캔 방지)
+        outside = [host for host in hosts if not in_scope(host, domain.lower(), [])]
+        if outside:
+            try:
+                mx_hosts = await self.dns_checker.mx_hosts(domain, resolve_timeout)
+            except Exception as e:
+                raise ValidationError(f"MX 호스트를 조회할 수 없어 도메인 외 호스트를 점검할 수 없습니다: {e}")
+            outside = [host for host in outside if host not in mx_hosts]
+            if outside:
+                raise ValidationError(
+                    f"요청한 도메인, 하위 도메인 또는 MX 호스트만 점검할 수 있습니다: {', '.join(outside)}"
+                )
+        addresses = dict(zip(hosts, await asyncio.gather(
+            *(self._resolve_target(host, 0, resolve_timeout) for host in hosts)
+        )))
+        # 조회된 주소가 내부망(루프백/사설/링크 로컬 등)이면 거부 - 조회 실패한 호스트는 점검하지 않음
+        internal = [host for host, address in addresses.items()
+                    if _is_ip(address) and not URLValidator.is_public_address(address)]
+        if internal:
+            raise ValidationError(f"내부 네트워크 주소는 점검할 수 없습니다: {', '.join(internal)}")
+        dns_tasks = {
+            host: self._start_dns_checks(host, sorted({t.port for t in targets if t.host == host}), deadline)
+            for host in hosts
+        }
+        
+        async def scan(target: ServiceTarget) -> Dict:
+            result = {
+                'domain': target.host,
+                'port': target.port,
+                'protocol': target.protocol,
+                'service': target.key,
+                'analyzed_at': datetime.now().isoformat(),
+                'target_ip': addresses[target.host]
+            }
+            if not _is_ip(addresses[target.host]):
+                result.update({'error': f"DNS 조회 실패: {target.host}", 'ssl_grade': 'F',
+                               'certificate_valid': False})
+                return result
+            # 서비스들이 동시에 실행되므로 각자 남은 예산 전체를 기준으로 단계를 나눔
+            service_deadline = Deadline(deadline.remaining())
+            try:
+                await asyncio.wait_for(
+                    self._probe_service(target, addresses[target.host], result, service_deadline),
+                    timeout=service_deadline.remaining()
+                )
+            except asyncio.TimeoutError:
+                result.update({
+                    'error': f"분석 시간 예산({deadline.budget:g}초) 초과",
+                    'deadline_exceeded': True,
+                    'timed_out_stage': service_deadline.current_stage,
+                    'ssl_grade': 'F',
+                    'certificate_valid': False
+                })
+            except Exception as e:
+                result.update({'error': str(e), 'ssl_grade': 'F', 'certificate_valid': False})
+            return result
+        
+        services = await asyncio.gather(*(scan(target) for target in targets))
+        dns_results = {}
+        for host, task in dns_tasks.items():
+            if task is None:
+                continue
+            try:
+                dns_results[host] = await asyncio.wait_for(task, timeout=max(deadline.remaining(), 0))
+            except asyncio.TimeoutError:
+                dns_results[host] = {'dns_checks_available': True, 'dns_errors': {'all': 'timeout'}}
+        return {
+            'domain': domain,
+            'analyzed_at': datetime.now().isoformat(),
+            'timeout_budget': deadline.budget,
+            'elapsed_seconds': round(deadline.elapsed(), 3),
+            'services': list(services),
+            'dns_checks': dns_results
+        }
+    
+    async def _resolve_target(self, domain: str, port: int, timeout: float = 5) -> str:
+        """도메인을 IP로 한 번만 조회 (실패 시 도메인 그대로 반환)"""
+        try:
+            infos = await asyncio.wait_for(
+                asyncio.get_running_loop().getaddrinfo(domain, port, type=socket.SOCK_STREAM),
+                timeout=timeout
+            )
+            return infos[0][4][0]
+        except (socket.gaierror, IndexError, asyncio.TimeoutError):
+            return domain
+    
+    async def _test_port_connection(self, address: str, port: int, timeout: float = 5) -> Dict:
+        """포트 연결 테스트 (가이드의 nc -z domain 443 구현)"""
+        def connect() -> int:
             # 소켓 연결 테스트 (nc -z와 동일한 기능)
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)  # 5초 타임아웃
-            result = sock.connect_ex((domain, port))
-            sock.close()
+            family = socket.AF_INET6 if ':' in address else socket.AF_INET
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                return sock.connect_ex((address, port))
+        
+        try:
+            # 블로킹 소켓은 스레드에서 실행하여 동시 스캔을 막지 않음
+            result = await asyncio.to_thread(connect)
             
             return {
-                'port_443_open': result == 0,
+                'port_open': result == 0,
+                'port_443_open': result == 0,  # 등급 계산 호환 키 (점검 대상 TLS 포트의 개방 여부)
                 'port_test_result': 'success' if result == 0 else 'connection_refused',
                 'port_error_code': result
             }
             
         except Exception as e:
             return {
+                'port_open': False,
                 'port_443_open': False,
                 'port_test_result': 'error',
                 'port_error': str(e)
             }
     
-    async def _analyze_certificate_real(self, domain: str, port: int) -> Dict:
+    async def _analyze_certificate_real(self, domain: str, port: int,
+                                        address: Optional[str] = None,
+                                        deadline: Optional[Deadline] = None,
+                                        starttls: Optional[str] = None) -> Dict:
         """실제 SSL 인증서 분석 (가이드의 openssl s_client 구현)"""
-        cert = None
-        ssl_verification_error = None
-        
-        # 첫 번째 시도: 정상 검증으로 인증서 정보 가져오기
-        try:
-            context = ssl.create_default_context()
-            with socket.create_connection((domain, port), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    cert = ssock.getpeercert()
-        except ssl.SSLError as e:
-            ssl_verification_error = str(e)
-            # 두 번째 시도: 검증 비활성화로 인증서 정보 가져오기
-            try:
-                context = ssl.create_default_context()
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-                with socket.create_connection((domain, port), timeout=10) as sock:
-                    with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                        cert = ssock.getpeercert()
-            except Exception:
-                pass
+        cert, ssl_verification_error, tls_info = await asyncio.to_thread(
+            self._fetch_certificate, domain, port, address or domain, deadline or Deadline(10), starttls
+        )
         
+        cert_info = self._parse_certificate(cert, ssl_verification_error)
+        cert_info.update(tls_info)
+        return cert_info
+    
+    def _parse_certificate(self, cert: Optional[Dict], ssl_verification_error: Optional[str]) -> Dict:
+        """getpeercert() 결과를 분석 결과 필드로 변환"""
         try:
             if not cert or 'notBefore' not in cert:
                 raise Exception(f"Unable to retrieve certificate info: {ssl_verification_error}")
@@ -147,18 +416,11 @@ class SSLAnalyzer:
             
             # SSL 상태 분류 (가이드 기준)
             if not is_valid:
-                if now > not_after:
-                    ssl_status = 'expired'
-                    analysis_result = 'SSL 인증서가 만료된 경우'
-                else:
-                    ssl_status = 'not_yet_valid'
-                    analysis_result = 'SSL 인증서가 아직 유효하지 않은 경우'
+                ssl_status = 'expired' if now > not_after else 'not_yet_valid'
             elif is_self_signed:
                 ssl_status = 'self_signed'
-                analysis_result = '자체 서명 인증서인 경우'
             else:
                 ssl_status = 'valid'
-                analysis_result = '정상적인 SSL 인증서'
             
             return {
                 'certificate_valid': is_valid,
@@ -170,9 +432,6 @@ class SSLAnalyzer:
                 'issuer_cn': issuer_cn,
                 'is_self_signed': is_self_signed,
                 'ssl_status': ssl_status,
-                'analysis_result': analysis_result,
-                'subject_dict': subject_dict,
-                'issuer_dict': issuer_dict,
                 'serial_number': cert.get('serialNumber', ''),
                 'version': cert.get('version', 0)
             }
@@ -183,63 +442,173 @@ class SSLAnalyzer:
             
             if 'certificate verify failed' in error_str:
                 ssl_status = 'verify_failed'
-                analysis_result = '인증서 검증 실패'
             elif 'certificate has expired' in error_str:
                 ssl_status = 'expired'
-                analysis_result = 'SSL 인증서가 만료된 경우'
             elif 'self signed certificate' in error_str:
                 ssl_status = 'self_signed'
-                analysis_result = '자체 서명 인증서인 경우'
             else:
                 ssl_status = 'connection_error'
-                analysis_result = 'SSL 연결 오류'
                 
             return {
                 'certificate_valid': False,
                 'certificate_error': str(e),
                 'ssl_status': ssl_status,
-                'analysis_result': analysis_result,
                 'days_until_expiry': 0
             }
     
     
-    async def _analyze_security_headers(self, url: str) -> Dict:
-        """보안 헤더 분석"""
+    def _fetch_certificate(self, domain: str, port: int, address: str, deadline: Deadline,
+                           starttls: Optional[str] = None):
+        """TLS 핸드셰이크로 인증서 조회 (블로킹 - 스레드에서 호출)
+        
+        두 번의 시도가 하나의 핸드셰이크 예산(deadline)을 나눠 씁니다.
+        starttls: 평문 연결 후 TLS로 전환할 프로토콜 ('smtp', 'imap')
+        """
+        cert = None
+        ssl_verification_error = None
+        tls_info: Dict = {}
+        verify_context, noverify_context = self.context_factory.contexts()
+        
+        # 첫 번째 시도: 정상 검증으로 인증서 정보 가져오기
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, ssl=False, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    headers = dict(response.headers)
-            
+            with socket.create_connection((address, port), timeout=deadline.remaining()) as sock:
+                negotiate_starttls(sock, starttls)
+                cert, tls_info = self._handshake(verify_context, sock, domain, port, starttls is None)
+        except ssl.SSLError as e:
+            ssl_verification_error = str(e)
+            # 두 번째 시도: 검증 비활성화로 인증서 정보 가져오기
+            try:
+                if deadline.expired:
+                    raise socket.timeout("handshake budget exhausted")
+                with socket.create_connection((address, port), timeout=deadline.remaining()) as sock:
+                    negotiate_starttls(sock, starttls)
+                    cert, tls_info = self._handshake(noverify_context, sock, domain, port, starttls is None)
+            except Exception:
+                pass
+        
+        return cert, ssl_verification_error, tls_info
+    
+    def _handshake(self, context: ssl.SSLContext, sock: socket.socket, domain: str, port: int,
+                   wait_for_ticket: bool = True):
+        """캐시된 세션이 있으면 재개를 시도하며 핸드셰이크 후 인증서 반환"""
+        offered = self.session_cache.get(domain, port, context)
+        started, started_cpu = time.perf_counter(), time.thread_time()
+        with context.wrap_socket(sock, server_hostname=domain,
+                                 session=offered.session if offered else None) as ssock:
+            seconds, cpu_seconds = time.perf_counter() - started, time.thread_time() - started_cpu
+            cert = ssock.getpeercert()
+            if wait_for_ticket:
+                # TLS 1.3 세션 티켓은 핸드셰이크 이후 전송되므로 잠시 수신하여 처리 (세션 캐시 사용 시에만)
+                self.session_cache.wait_for_ticket(ssock)
+            tls_info = self.session_cache.record_handshake(
+                domain, port, context, ssock, offered, seconds, cpu_seconds
+            )
+            chain = self._peer_chain(ssock)
+        # 핸드셰이크 이후 검사는 실패해도 인증서/핸드셰이크 결과를 유지
+        try:
+            tls_info.update(self.ct_validator.analyze(chain))
+        except Exception as e:
+            logger.error(f"CT validation failed for {domain}:{port}: {e}")
+            tls_info.update({'ct_status': 'error', 'ct_error': str(e) or type(e).__name__})
+        try:
+            fingerprints = leaf_fingerprints(chain[0]) if chain else None
+            if fingerprints:
+                tls_info.update(fingerprints._asdict())
+                tls_info.update(self.key_checker.inspect(chain[0], fingerprints.spki_sha256))
+        except Exception as e:
+            logger.error(f"Key checks failed for {domain}:{port}: {e}")
+            tls_info.update({'key_weaknesses': [], 'key_check_error': str(e) or type(e).__name__})
+        return cert, tls_info
+    
+    @staticmethod
+    def _peer_chain(ssock: ssl.SSLSocket) -> List[bytes]:
+        """서버가 보낸 인증서 체인 (DER, leaf 우선)
+        
+        세션 재개 시에는 체인이 없어 leaf만 반환합니다.
+        """
+        leaf = ssock.getpeercert(binary_form=True)
+        if not leaf:
+            return []
+        # Python 3.13+는 공개 API, 3.11/3.12는 내부 _sslobj에서 조회
+        if hasattr(ssock, 'get_unverified_chain'):
+            chain = ssock.get_unverified_chain() or []
+        else:
+            chain = [c.public_bytes(ssl._ssl.ENCODING_DER)
+                     for c in (ssock._sslobj.get_unverified_chain() or [])]
+        return chain if chain and chain[0] == leaf else [leaf] + chain
+    
+    async def _analyze_http(self, target: ServiceTarget, https_url: Optional[str],
+                            timeout: float = 10) -> Dict:
+        """http:// 및 https:// 리다이렉트 체인을 동시에 추적하고 최종 HTTPS 응답의 보안 헤더 분석
+        
+        https_url이 None이면 (443 미개방) http:// 체인만 확인합니다.
+        """
+        session = await self._get_http_session()
+        http_task = self.redirect_analyzer.follow(session, f"http://{target.host}/", timeout)
+        if https_url is None:
+            http_chain, _ = await http_task
+            return RedirectAnalyzer.summarize(http_chain, None)
+        
+        (http_chain, _), (https_chain, final_headers) = await asyncio.gather(
+            http_task, self.redirect_analyzer.follow(session, https_url, timeout)
+        )
+        info = RedirectAnalyzer.summarize(http_chain, https_chain)
+        if final_headers is None:
+            info.update({
+                'security_headers_error': https_chain['error'] or 'no response',
+                'missing_security_headers': self.security_headers,
+                'headers_score': 0
+            })
+        else:
+            info['response_headers'] = dict(final_headers)
+            info.update(self._analyze_security_headers(final_headers, https_chain['final_url']))
+            info.update(self._analyze_hsts_preload(target.host, info))
+        return info
+    
+    def _analyze_hsts_preload(self, domain: str, info: Dict) -> Dict:
+        """HSTS 프리로드 등록 여부 및 등록 요건 충족 여부"""
+        preloaded, preloaded_via = self.hsts_preload_index.lookup(domain)
+        missing = preload_eligibility(
+            info.get('hsts_max_age', 0),
+            info.get('hsts_include_subdomains', False),
+            info.get('hsts_preload', False),
+            info.get('http_redirects_to_https', False)
+        )
+        return {
+            'hsts_preloaded': preloaded,  # None: 프리로드 인덱스 없음
+            'hsts_preloaded_via': preloaded_via,
+            'hsts_preload_eligible': not missing,
+            'hsts_preload_missing_requirements': missing
+        }
+    
+    def _analyze_security_headers(self, headers, final_url: Optional[str] = None) -> Dict:
+        """보안 헤더 분석 (최종 응답 헤더 기준)"""
+        try:
+            # 대소문자 무시 헤더 인덱스를 한 번만 구성 (Set-Cookie 등 중복 헤더 유지)
+            index = HeaderIndex.from_headers(headers)
             present_headers = []
             missing_headers = []
             
             for header in self.security_headers:
-                if header.lower() in [h.lower() for h in headers.keys()]:
+                if header in index:
                     present_headers.append(header)
                 else:
                     missing_headers.append(header)
             
             # HSTS 특별 분석
-            hsts_header = headers.get('Strict-Transport-Security', '')
-            hsts_max_age = 0
-            hsts_include_subdomains = False
-            
-            if hsts_header:
-                parts = hsts_header.split(';')
-                for part in parts:
-                    part = part.strip()
-                    if part.startswith('max-age='):
-                        hsts_max_age = int(part.split('=')[1])
-                    elif part == 'includeSubDomains':
-                        hsts_include_subdomains = True
+            hsts_header = index.get('Strict-Transport-Security')
+            hsts = parse_hsts_header(hsts_header)
             
             return {
                 'security_headers_present': present_headers,
                 'missing_security_headers': missing_headers,
                 'hsts_enabled': bool(hsts_header),
-                'hsts_max_age': hsts_max_age,
-                'hsts_include_subdomains': hsts_include_subdomains,
-                'headers_score': len(present_headers) / len(self.security_headers) * 100
+                'hsts_max_age': hsts['max_age'],
+                'hsts_include_subdomains': hsts['include_subdomains'],
+                'hsts_preload': hsts['preload'],
+                'headers_score': len(present_headers) / len(self.security_headers) * 100,
+                # CSP/쿠키/Permissions-Policy/COOP/COEP 정책 내용 분석
+                **analyze_headers(index, is_https=urlparse(final_url or '').scheme != 'http')
             }
             
         except Exception as e:
@@ -249,71 +618,3 @@ class SSLAnalyzer:
                 'headers_score': 0
             }
     
-    
-    
-    def _calculate_ssl_grade_real(self, analysis_result: Dict) -> str:
-        """가이드 기준으로 SSL 등급 계산"""
-        
-        # 1. SSL 포트가 닫혀있는 경우 - F등급
-        if not analysis_result.get('port_443_open', False):
-            return 'F'
-        
-        # 2. SSL 상태별 기본 등급
-        ssl_status = analysis_result.get('ssl_status', 'connection_error')
-        
-        if ssl_status == 'no_ssl':
-            return 'F'  # SSL 인증서가 아예 없는 경우
-        elif ssl_status == 'expired':
-            return 'F'  # SSL 인증서가 만료된 경우  
-        elif ssl_status == 'self_signed':
-            return 'D'  # 자체 서명 인증서인 경우
-        elif ssl_status == 'verify_failed':
-            return 'D'  # 인증서 검증 실패
-        elif ssl_status == 'connection_error':
-            return 'F'  # 연결 오류
-        elif ssl_status == 'valid':
-            # 정상 인증서의 경우 추가 평가
-            base_grade = 'B'
-        else:
-            return 'F'
-        
-        # 3. 정상 인증서인 경우 추가 점수 계산
-        if ssl_status == 'valid':
-            score = 80  # B등급 기본 점수
-            
-            # 인증서 만료 임박도
-            days_until_expiry = analysis_result.get('days_until_expiry', 0)
-            if days_until_expiry > 90:
-                score += 10  # A- 가능
-            elif days_until_expiry > 30:
-                score += 5   # B+ 가능
-            elif days_until_expiry < 7:
-                score -= 20  # C등급으로 하락
-            
-            # 보안 헤더 점수
-            missing_headers = analysis_result.get('missing_security_headers', [])
-            if len(missing_headers) == 0:
-                score += 10  # 모든 헤더 완비
-            elif len(missing_headers) <= 2:
-                score += 5   # 일부 헤더 누락
-            else:
-                score -= 5   # 많은 헤더 누락
-            
-            # 등급 매핑 (가이드 기준)
-            if score >= 95:
-                return 'A+'
-            elif score >= 90:
-                return 'A'  
-            elif score >= 85:
-                return 'A-'
-            elif score >= 75:
-                return 'B'
-            elif score >= 65:
-                return 'C'
-            elif score >= 50:
-                return 'D'
-            else:
-                return 'F'
-        
-        return base_grade
-    
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+만료 알림 테스트 - 로컬 대역(webhook/Slack HTTP 서버, SMTP 서버)으로 다이제스트 생성,
+중복 제거, 재시도 백오프, 재시작 후 아웃박스 전송, iCal 피드를 확인
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+from aiohttp import web
+
+from alerts import FAILED, PENDING, SENT, AlertDispatcher, AlertStore, portfolio_calendar, validate_channel
+from analysis_model import AnalysisRecord, SSLGrade, StoredAnalysis
+from config import ALERT_CONFIG
+from error_handling import ValidationError
+from portfolios import PortfolioStore
+
+TODAY = date(2026, 3, 1)
+
+
+class StandIns:
+    """webhook / Slack / 항상 실패하는 엔드포인트와 최소 SMTP 서버"""
+
+    def __init__(self):
+        self.requests = {'hook': [], 'slack': [], 'broken': []}
+        self.mails = []
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        name = request.match_info['name']
+        self.requests[name].append(await request.json())
+        return web.Response(status=500 if name == 'broken' else 200)
+
+    async def _smtp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(b"220 stand-in\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith('DATA'):
+                writer.write(b"354 go\r\n")
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.mails.append(data.decode('utf-8', 'replace'))
+                writer.write(b"250 queued\r\n")
+            elif command.startswith('QUIT'):
+                writer.write(b"221 bye\r\n")
+                break
+            else:
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post('/{name}', self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self.smtp_server = await asyncio.start_server(self._smtp, '127.0.0.1', 0)
+        ALERT_CONFIG['smtp'].update(host='127.0.0.1', port=self.smtp_server.sockets[0].getsockname()[1],
+                                    username=None, starttls=False)
+
+    async def stop(self) -> None:
+        self.smtp_server.close()
+        await self.runner.cleanup()
+
+
+def analysis(n: int, domain: str, expires_on: date) -> StoredAnalysis:
+    return StoredAnalysis(
+        id=f"analysis-{n}", url=f"https://{domain}", created_at=datetime(2026, 3, 1, 0, n).isoformat(),
+        ssl_grade=SSLGrade.A, security_score=90, issue_codes=[], business_impact={'revenue_loss_annual': 0},
+        recommendation_codes=[], result=AnalysisRecord(domain=domain, not_after=expires_on.strftime('%b %d 00:00:00 %Y GMT'))
+    )
+
+
+async def run(tmp: str) -> None:
+    stand_ins = StandIns()
+    await stand_ins.start()
+    portfolios = PortfolioStore(os.path.join(tmp, 'portfolios.db'))
+    store = AlertStore(os.path.join(tmp, 'alerts.db'))
+    dispatcher = AlertDispatcher(store, portfolios)
+    try:
+        # 같은 테넌트의 두 포트폴리오에 겹치는 도메인 - 알림은 한 번만
+        p1 = portfolios.create("shop", ["soon.example.com", "later.example.com", "fine.example.com"], tenant="t1")
+        portfolios.create("blog", ["soon.example.com", "gone.example.com"], tenant="t1")
+        portfolios.create("other", ["soon.example.com"], tenant="t2")
+        portfolios.create("public", ["soon.example.com"])  # 테넌트 없음: 알림 대상 아님
+        expiries = {'soon.example.com': TODAY + timedelta(days=5), 'later.example.com': TODAY + timedelta(days=45),
+                    'fine.example.com': TODAY + timedelta(days=200), 'gone.example.com': TODAY - timedelta(days=2)}
+        for n, (domain, expires_on) in enumerate(expiries.items()):
+            portfolios.record_analysis(analysis(n, domain, expires_on))
+
+        # 내부 네트워크 대상은 등록 거부 (SSRF) - 대역 서버는 127.0.0.1이므로 테스트에서만 허용
+        for target in (f"{stand_ins.base_url}/hook", "http://169.254.169.254/latest/meta-data",
+                       "http://10.0.0.5/hook", "http://localhost/hook"):
+            try:
+                validate_channel("webhook", target)
+                raise AssertionError(f"internal target accepted: {target}")
+            except ValidationError:
+                pass
+        ALERT_CONFIG['allow_private_targets'] = True
+
+        store.add_channel("t1", "webhook", f"{stand_ins.base_url}/hook")
+        store.add_channel("t1", "slack", f"{stand_ins.base_url}/slack")
+        store.add_channel("t1", "email", "ops@example.com")
+        store.add_channel("t2", "webhook", f"{stand_ins.base_url}/broken")
+
+        now = 1_000_000.0
+        result = await dispatcher.run_once(TODAY, now)
+        assert result == {'alerts': 4, 'digests': 2, SENT: 3, 'retrying': 1, FAILED: 0}, result
+
+        digest = stand_ins.requests['hook'][0]
+        assert [(a['domain'], a['level']) for a in digest['alerts']] == [
+            ('gone.example.com', 'expired'), ('soon.example.com', 'critical'), ('later.example.com', 'renewal')
+        ], digest
+        assert 'soon.example.com' in stand_ins.requests['slack'][0]['text']
+        assert len(stand_ins.mails) == 1 and 'ops@example.com' in stand_ins.mails[0]
+
+        # 같은 상태로 다시 돌리면 새 알림/다이제스트 없음, 실패 건은 백오프 전까지 재시도하지 않음
+        result = await dispatcher.run_once(TODAY, now + 1)
+        assert result == {'alerts': 0, 'digests': 0, SENT: 0, 'retrying': 0, FAILED: 0}, result
+        retry = store.outbox(tenant="t2")[0]
+        assert retry['status'] == PENDING and retry['attempts'] == 1 and retry['next_attempt_at'] > now + 1
+
+        # 재시작: 새 저장소/디스패처가 같은 아웃박스를 이어서 전송하고, 최대 시도 후 실패 처리
+        await dispatcher.close()
+        store = AlertStore(os.path.join(tmp, 'alerts.db'))
+        dispatcher = AlertDispatcher(store, portfolios)
+        for _ in range(ALERT_CONFIG['max_attempts'] - 1):
+            now += ALERT_CONFIG['backoff_max'] * 2
+            await dispatcher.deliver(now)
+        failed = store.outbox(tenant="t2")[0]
+        assert failed['status'] == FAILED and failed['attempts'] == ALERT_CONFIG['max_attempts'], failed
+        assert len(stand_ins.requests['broken']) == ALERT_CONFIG['max_attempts']
+
+        # 25일 뒤: soon은 만료, later는 경고 단계로 넘어가 새 다이제스트 (gone은 이미 알림)
+        result = await dispatcher.run_once(TODAY + timedelta(days=25), now)
+        assert result['digests'] == 2, result
+        assert [(a['domain'], a['level']) for a in stand_ins.requests['hook'][-1]['alerts']] == [
+            ('soon.example.com', 'expired'), ('later.example.com', 'warning')
+        ]
+
+        # 전송 시에도 다시 확인: IP 주소 대상, 내부 주소로 조회되는 호스트 이름 모두 요청 없이 재시도 처리
+        ALERT_CONFIG['allow_private_targets'] = False
+        sent_before = len(stand_ins.requests['hook'])
+        port = stand_ins.base_url.rsplit(':', 1)[1]
+        for target in (f"{stand_ins.base_url}/hook", f"http://localhost:{port}/hook"):
+            outcome = await dispatcher._deliver_one(await dispatcher._get_session(),
+                                                    (0, 'webhook', target, '{"alerts": []}', 0), now)
+            assert outcome == 'retrying', (target, outcome)
+        assert len(stand_ins.requests['hook']) == sent_before
+        ALERT_CONFIG['allow_private_targets'] = True
+
+        calendar = portfolio_calendar(portfolios, p1['id'], "shop", TODAY)
+        assert calendar.count('BEGIN:VEVENT') == 3 and 'DTSTART;VALUE=DATE:20260306' in calendar
+        assert all(len(line.encode('utf-8')) <= 75 for line in calendar.split('\r\n'))
+    finally:
+        await dispatcher.close()
+        await stand_ins.stop()
+
+
+if __name__ == '__main__':
+    print("🧪 만료 알림 테스트 시작...")
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+    print("✅ 테스트 성공! 다이제스트, 중복 제거, 재시도, iCal 피드가 모두 정상입니다")
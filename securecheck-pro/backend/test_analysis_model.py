@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+분석 레코드 모델 테스트 - 저장된 v1/v2 msgpack 레코드(위치 기반 배열) 복원, 재패킹 왕복,
+v3 레코드의 문제점/권장사항 코드 저장과 읽을 때 채점 규칙으로 렌더링,
+변환 시 응답 헤더/리다이렉트 hop 헤더 제거를 확인
+"""
+
+import msgpack
+
+from analysis_model import SCHEMA_VERSION, AnalysisRecord, SSLGrade, SSLStatus, StoredAnalysis
+from rules_engine import load_ruleset
+
+# 저장소에 이미 기록된 형태 그대로의 결과 배열 (AnalysisRecord 필드 순서)
+STORED_RESULT = [
+    'example.com',                 # domain
+    443,                           # port
+    '2025-01-02T03:04:05',         # analyzed_at
+    'valid',                       # ssl_status
+    'A',                           # ssl_grade
+    True,                          # certificate_valid
+    45,                            # days_until_expiry
+    'Jan  1 00:00:00 2025 GMT',    # not_before
+    'Feb 16 00:00:00 2025 GMT',    # not_after
+    'example.com',                 # subject_cn
+    'R3',                          # issuer_cn
+    False,                         # is_self_signed
+    'TLSv1.3',                     # tls_version
+    0b101,                         # headers_mask
+    True,                          # hsts_enabled
+    '93.184.216.34',               # target_ip
+    {'ct_status': 'verified', 'spki_sha256': 'ab' * 32},  # details
+]
+ISSUES = [{'type': 'hsts', 'title': 'HSTS max-age 짧음'}]
+IMPACT = {'revenue_loss_annual': 0}
+
+# v1: 규칙 버전 필드 이전, v2: 마지막에 rules_version
+V1_BLOB = msgpack.packb([1, 'id-v1', 'https://example.com', '2025-01-02T03:04:05', 'A', 88,
+                         ISSUES, IMPACT, ['HSTS 설정'], STORED_RESULT], use_bin_type=True)
+V2_BLOB = msgpack.packb([2, 'id-v2', 'https://example.com', '2025-01-02T03:04:05', 'B', 77,
+                         ISSUES, IMPACT, ['HSTS 설정'], STORED_RESULT, 3], use_bin_type=True)
+
+
+def check_result(record: AnalysisRecord) -> None:
+    assert record.domain == 'example.com' and record.port == 443, record
+    assert record.ssl_status is SSLStatus.VALID and record.ssl_grade is SSLGrade.A
+    assert record.certificate_valid is True and record.days_until_expiry == 45
+    assert record.not_after == 'Feb 16 00:00:00 2025 GMT' and record.issuer_cn == 'R3'
+    assert record.tls_version == 'TLSv1.3' and record.headers_mask == 0b101 and record.hsts_enabled
+    assert record.target_ip == '93.184.216.34' and record.details['ct_status'] == 'verified'
+
+
+def test_stored_blobs() -> None:
+    v1 = StoredAnalysis.unpack(V1_BLOB)
+    assert (v1.id, v1.ssl_grade, v1.security_score, v1.rules_version) == ('id-v1', SSLGrade.A, 88, 1)
+    check_result(v1.result)
+
+    v2 = StoredAnalysis.unpack(V2_BLOB)
+    assert (v2.id, v2.ssl_grade, v2.security_score, v2.rules_version) == ('id-v2', SSLGrade.B, 77, 3)
+    assert v2.issues == ISSUES and v2.recommendations == ['HSTS 설정']
+    check_result(v2.result)
+
+    # 재패킹은 현재 스키마 버전으로, 같은 결과 배열을 그대로 유지
+    for stored in (v1, v2):
+        repacked = msgpack.unpackb(stored.pack(), raw=False)
+        assert repacked[0] == SCHEMA_VERSION and repacked[9] == STORED_RESULT, repacked
+        assert StoredAnalysis.unpack(stored.pack()) == stored
+
+
+def test_rule_codes() -> None:
+    # 분석기 순서의 누락 헤더(설정 순서와 다름), 헤더 점검 결과, 만료 임박 인증서
+    present = ['Strict-Transport-Security', 'X-Content-Type-Options']
+    result = {
+        'domain': 'example.com', 'ssl_status': 'valid', 'port_443_open': True, 'days_until_expiry': 12,
+        'security_headers_present': present,
+        'missing_security_headers': ['Referrer-Policy', 'X-Frame-Options', 'X-XSS-Protection', 'Content-Security-Policy'],
+        'header_findings': [
+            {'id': 'csp_unsafe_inline', 'header': 'Content-Security-Policy', 'severity': 'high', 'weight': 5,
+             'title': "CSP가 'unsafe-inline' 스크립트 허용", 'description': '인라인 스크립트가 허용됩니다.'},
+            {'id': 'cookie_samesite', 'header': 'Set-Cookie', 'severity': 'low', 'weight': 0,
+             'title': '가중치 없는 점검 결과', 'description': '점수에 반영되지 않습니다.'},
+        ],
+        'caa_present': False, 'key_weaknesses': ['rsa_too_small'],
+    }
+    ruleset = load_ruleset()
+    evaluation = ruleset.evaluate(result)
+    stored = StoredAnalysis(
+        id='id-v3', url='https://example.com', created_at='2025-01-02T03:04:05',
+        ssl_grade=SSLGrade(evaluation.ssl_grade), security_score=evaluation.security_score,
+        issue_codes=evaluation.issue_codes, business_impact=evaluation.business_impact,
+        recommendation_codes=evaluation.recommendation_codes,
+        result=AnalysisRecord.from_dict({**result, 'ssl_grade': evaluation.ssl_grade}),
+        rules_version=evaluation.rules_version
+    )
+    blob = stored.pack()
+    # 저장 레코드에는 규칙 코드만 - 문장은 싣지 않음
+    for text in ('헤더 누락', '만료 임박', 'CAA 레코드'):
+        assert text.encode() not in blob, text
+    assert all(isinstance(code, list) for code in msgpack.unpackb(blob, raw=False)[6])
+
+    restored = StoredAnalysis.unpack(blob)
+    assert restored == stored
+    assert restored.issues == evaluation.issues and restored.recommendations == evaluation.recommendations
+    response = restored.to_response()
+    assert response['issues'] == evaluation.issues and response['recommendations'] == evaluation.recommendations
+    titles = [issue['title'] for issue in response['issues']]
+    assert titles[:4] == [f"{header} 헤더 누락" for header in result['missing_security_headers']], titles
+    assert "CSP가 'unsafe-inline' 스크립트 허용" in titles and '가중치 없는 점검 결과' not in titles
+
+
+def test_from_dict_projection() -> None:
+    hop_headers = {'Set-Cookie': 'a=1', 'Content-Type': 'text/html'}
+    chain = {'chain': [
+        {'url': 'http://example.com/', 'status': 301, 'latency_ms': 12.5,
+         'location': 'https://example.com/', 'server': 'nginx', 'headers': hop_headers},
+        {'url': 'https://example.com/', 'status': 200, 'latency_ms': 20.0,
+         'location': None, 'server': 'nginx', 'headers': hop_headers},
+    ], 'redirect_count': 1, 'reaches_https': True}
+    record = AnalysisRecord.from_dict({
+        'domain': 'example.com', 'ssl_status': 'valid', 'ssl_grade': 'A',
+        'security_headers_present': ['Strict-Transport-Security'],
+        'response_headers': hop_headers, 'http_redirect_chain': chain, 'https_redirect_chain': None
+    })
+    assert 'response_headers' not in record.details
+    hops = record.details['http_redirect_chain']['chain']
+    assert [hop['status'] for hop in hops] == [301, 200] and all('headers' not in hop for hop in hops)
+    assert record.details['http_redirect_chain']['reaches_https'] is True
+    assert record.details['https_redirect_chain'] is None
+    assert 'headers' in chain['chain'][0]  # 입력 dict는 변경하지 않음
+    assert AnalysisRecord.from_list(record.to_list()) == record
+
+
+if __name__ == '__main__':
+    print("🧪 분석 레코드 모델 테스트 시작...")
+    test_stored_blobs()
+    test_rule_codes()
+    test_from_dict_projection()
+    print("✅ 테스트 성공! v1/v2 저장 레코드 복원, 규칙 코드 렌더링, 결과 축약이 모두 정상입니다")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""
+배치 채점 엔진 속성 테스트 - 무작위 분석 결과에 대해 채점 규칙의 스칼라 경로(기준 구현)와
+batch_scoring.score_batch 결과가 완전히 같은지 확인
+"""
+
+import random
+
+from analysis_model import AnalysisRecord, SSLGrade, StoredAnalysis
+from batch_scoring import extract_columns, score_batch
+from business_impact_service import BusinessImpactService
+from config import SECURITY_HEADERS
+from regrade import regrade_record, regrade_records
+from rules_engine import available_versions, load_ruleset
+from ssl_analysis_service import SSLAnalysisService
+
+STATUSES = ['valid', 'expired', 'not_yet_valid', 'self_signed', 'verify_failed',
+            'connection_error', 'no_ssl', 'something_else', None]
+# 등급/점수 경계값 근처를 집중적으로 생성
+DAYS = [-400, -1, 0, 6, 7, 8, 29, 30, 31, 89, 90, 91, 365]
+
+
+def random_result(rng: random.Random) -> dict:
+    result = {}
+    status = rng.choice(STATUSES)
+    if status is not None:
+        result['ssl_status'] = status
+    if rng.random() < 0.9:
+        result['port_443_open'] = rng.random() < 0.85
+    if rng.random() < 0.9:
+        result['days_until_expiry'] = rng.choice(DAYS) if rng.random() < 0.7 else rng.randint(-1000, 1000)
+    if rng.random() < 0.8:
+        result['missing_security_headers'] = rng.sample(SECURITY_HEADERS, rng.randint(0, len(SECURITY_HEADERS)))
+    if rng.random() < 0.2:
+        result['headers_applicable'] = False
+    if rng.random() < 0.5:
+        result['header_findings_penalty'] = rng.randint(0, 30)
+    for key in ('caa_present', 'dnssec_signed'):
+        if rng.random() < 0.7:
+            result[key] = rng.random() < 0.5
+    if rng.random() < 0.3:
+        weaknesses = ['debian_weak', 'compromised', 'rsa_too_small', 'weak_curve', 'weak_signature_hash', 'unrelated']
+        result['key_weaknesses'] = rng.sample(weaknesses, rng.randint(0, 3))
+    if rng.random() < 0.05:
+        result['error'] = 'timeout'
+    return result
+
+
+def test_batch_matches_scalar(samples: int = 20000, seed: int = 45) -> None:
+    rng = random.Random(seed)
+    results = [random_result(rng) for _ in range(samples)]
+    for version in available_versions():
+        ruleset = load_ruleset(version)
+        batch = score_batch(extract_columns(results, ruleset), ruleset)
+        grades = batch.grades()
+
+        for i, result in enumerate(results):
+            evaluation = ruleset.evaluate(result)
+            assert grades[i] == evaluation.ssl_grade, (version, result, grades[i], evaluation.ssl_grade)
+            assert int(batch.security_score[i]) == evaluation.security_score, \
+                (version, result, batch.security_score[i], evaluation.security_score)
+            assert batch.business_impact(i) == evaluation.business_impact, \
+                (version, result, batch.business_impact(i), evaluation.business_impact)
+
+
+def test_services_match_evaluate(samples: int = 2000, seed: int = 46) -> None:
+    """분석기/서비스 단계별 호출과 evaluate() 한 번의 결과가 같은지 확인"""
+    rng = random.Random(seed)
+    ruleset = load_ruleset()
+    for _ in range(samples):
+        result = random_result(rng)
+        evaluation = ruleset.evaluate(result)
+        result['ssl_grade'] = ruleset.grade(result)
+        score = SSLAnalysisService.calculate_security_score(result)
+        issues = SSLAnalysisService.extract_security_issues(result)
+        assert (result['ssl_grade'], score) == (evaluation.ssl_grade, evaluation.security_score), result
+        assert issues == evaluation.issues, result
+        assert BusinessImpactService.calculate_business_impact(score, result, issues) == evaluation.business_impact
+        assert BusinessImpactService.generate_business_recommendations(result, issues) == evaluation.recommendations
+
+
+def test_regrade_matches_scalar(samples: int = 3000, seed: int = 47) -> None:
+    """재채점 청크(배치 경로)와 레코드별 regrade_record(스칼라 경로) 결과가 같은지 확인"""
+    rng = random.Random(seed)
+    records = [
+        StoredAnalysis(id=str(i), url=f"https://d{i}.example.com", created_at='2026-01-01T00:00:00',
+                       ssl_grade=SSLGrade.F, security_score=0, issue_codes=[], business_impact={},
+                       recommendation_codes=[], result=AnalysisRecord.from_dict({'domain': f"d{i}.example.com",
+                                                                            **random_result(rng)}))
+        for i in range(samples)
+    ]
+    for version in available_versions():
+        ruleset = load_ruleset(version)
+        assert regrade_records(records, ruleset) == [regrade_record(record, ruleset) for record in records], version
+
+
+def test_empty_batch() -> None:
+    ruleset = load_ruleset()
+    batch = score_batch(extract_columns([], ruleset), ruleset)
+    assert batch.grades() == []
+
+
+if __name__ == '__main__':
+    print("🧪 배치 채점 속성 테스트 시작...")
+    test_empty_batch()
+    test_batch_matches_scalar()
+    test_services_match_evaluate()
+    test_regrade_matches_scalar()
+    print("✅ 테스트 성공! 스칼라 경로와 배치 결과가 모두 일치합니다")
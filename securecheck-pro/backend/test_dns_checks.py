@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+DNS 검사 테스트 - 로컬 대역 DNS 서버(UDP)로 CAA, DNSSEC(DS/AD 비트), TLSA(DANE) 결과를 확인
+"""
+
+import asyncio
+
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rrset
+
+from config import DNS_CHECK_CONFIG
+from dns_checks import DNSSecurityChecker
+
+# (이름, 타입) -> 레코드 (rdata 텍스트)
+ZONE = {
+    ('example.com', 'CAA'): ['0 issue "letsencrypt.org"', '0 iodef "mailto:security@example.com"'],
+    ('example.com', 'DS'): ['12345 13 2 ' + 'ab' * 32],
+    ('example.com', 'MX'): ['10 mx1.example.com.', '20 mx2.example.com.'],
+    ('www.example.com', 'A'): ['192.0.2.10'],
+    ('_443._tcp.www.example.com', 'TLSA'): ['3 1 1 ' + 'cd' * 32],
+    ('_25._tcp.mx1.example.com', 'TLSA'): ['3 1 1 ' + 'ef' * 32],
+    ('_25._tcp.mx2.example.com', 'TLSA'): ['3 1 1 ' + '01' * 32],
+    # 레지스트리 영역만 서명됨 - example.co.uk 자체는 서명되지 않음
+    ('co.uk', 'DS'): ['54321 8 2 ' + '23' * 32],
+    ('example.co.uk', 'A'): ['192.0.2.20'],
+}
+# 검증 리졸버가 AD 비트를 붙여 응답하는 이름
+VALIDATED = {'www.example.com'}
+
+
+class StubDNS(asyncio.DatagramProtocol):
+    """ZONE만 아는 최소 권한 서버 - 없는 이름은 NXDOMAIN, 다른 타입만 있으면 NODATA"""
+
+    def __init__(self):
+        self.queries = []
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        name = question.name.to_text().rstrip('.').lower()
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        self.queries.append((name, rdtype))
+
+        response = dns.message.make_response(query)
+        records = ZONE.get((name, rdtype))
+        if records:
+            response.answer.append(dns.rrset.from_text_list(question.name, 300, dns.rdataclass.IN, rdtype, records))
+            if name in VALIDATED:
+                response.flags |= dns.flags.AD
+        elif not any(known == name for known, _ in ZONE):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        self.transport.sendto(response.to_wire(), addr)
+
+
+async def run() -> None:
+    loop = asyncio.get_running_loop()
+    transport, stub = await loop.create_datagram_endpoint(StubDNS, local_addr=('127.0.0.1', 0))
+    # DNS_CHECK_NAMESERVERS / DNS_CHECK_PORT 환경 변수와 같은 설정 경로
+    DNS_CHECK_CONFIG.update(nameservers=['127.0.0.1'], port=transport.get_extra_info('sockname')[1])
+    try:
+        checker = DNSSecurityChecker()
+        result = await checker.check('www.example.com', ports=[443], timeout=2)
+        assert result['dns_checks_available'] and not result['dns_errors'], result
+
+        # CAA: 가장 가까운 상위 이름의 레코드 집합
+        assert result['caa_domain'] == 'example.com' and result['caa_issuers'] == ['letsencrypt.org'], result
+        assert result['caa_iodef'] is True
+
+        # DNSSEC: 등록 도메인의 DS + 리졸버 AD 비트
+        assert result['dnssec_signed'] is True and result['dnssec_zone'] == 'example.com', result
+        assert result['dnssec_validated'] is True
+
+        # TLSA: 서비스 포트와 MX 호스트(우선순위 순)의 SMTP
+        assert result['mx_hosts'] == ['mx1.example.com', 'mx2.example.com'], result
+        assert set(result['tlsa_records']) == {
+            '_443._tcp.www.example.com', '_25._tcp.mx1.example.com', '_25._tcp.mx2.example.com'
+        }
+        assert result['dane_mail'] is True
+
+        # 레지스트리(co.uk)의 DS는 그 아래 등록 도메인의 서명으로 보지 않음 (DS 조회도 하지 않음)
+        unsigned = await checker.check('example.co.uk', ports=[443], timeout=2)
+        assert unsigned['dnssec_signed'] is False and unsigned['dnssec_zone'] is None, unsigned
+        assert unsigned['dnssec_validated'] is False
+        assert unsigned['caa_present'] is False and unsigned['dane_mail'] is False
+        assert ('co.uk', 'DS') not in stub.queries
+
+        # 두 번째 검사는 공유 리졸버 캐시에서 응답
+        before = len(stub.queries)
+        await checker.check('www.example.com', ports=[443], timeout=2)
+        assert len(stub.queries) == before, stub.queries[before:]
+    finally:
+        transport.close()
+
+
+if __name__ == '__main__':
+    print("🧪 DNS 검사 테스트 시작...")
+    asyncio.run(run())
+    print("✅ 테스트 성공! CAA, DNSSEC, TLSA 검사가 모두 정상입니다")
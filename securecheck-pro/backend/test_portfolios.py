@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""
+포트폴리오 집계 테스트 - 무작위 분석 결과 도착(늦게 끝난 이전 분석 포함), 도메인 추가/삭제,
+재구성(rebuild, 스캔 중 새 분석 도착 포함) 후 증분 집계가 처음부터 다시 계산한 요약과 같은지 확인
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+from analysis_model import AnalysisRecord, SSLGrade, StoredAnalysis
+from config import CERTIFICATE_THRESHOLDS, PORTFOLIO_CONFIG, SECURITY_HEADERS
+from portfolios import GRADES, PortfolioStore, domain_state
+
+TODAY = date(2026, 3, 1)
+DOMAINS = [f"site{i}.example.com" for i in range(30)]
+
+
+class MemoryStore:
+    """AnalysisStore.iter_records 대역 - 스캔 도중 호출할 콜백 지원"""
+
+    def __init__(self, during_scan=None):
+        self.records = []
+        self.during_scan = during_scan
+
+    def iter_records(self):
+        ordered = sorted(self.records, key=lambda record: record.created_at)
+        yield ordered[:len(ordered) // 2]
+        if self.during_scan:
+            self.during_scan()
+        yield ordered[len(ordered) // 2:]
+
+
+def random_analysis(rng: random.Random, n: int, created_at: datetime) -> StoredAnalysis:
+    expires_on = TODAY + timedelta(days=rng.randint(-20, 90))
+    return StoredAnalysis(
+        id=f"analysis-{n}", url="", created_at=created_at.isoformat(),
+        ssl_grade=rng.choice(list(SSLGrade)), security_score=rng.randint(0, 100), issue_codes=[],
+        business_impact={'revenue_loss_annual': rng.randint(0, 5) * 1_000_000}, recommendation_codes=[],
+        result=AnalysisRecord(
+            domain=rng.choice(DOMAINS),
+            not_after=expires_on.strftime('%b %d 00:00:00 %Y GMT') if rng.random() < 0.9 else None,
+            headers_mask=rng.randint(0, 2 ** len(SECURITY_HEADERS) - 1) if rng.random() < 0.8 else None
+        )
+    )
+
+
+def recompute(members, latest, portfolio_id: str) -> dict:
+    """집계 테이블 없이 최신 분석 결과와 구성원만으로 요약 계산 (기준 구현)"""
+    grades = {grade: 0 for grade in GRADES}
+    missing = {}
+    expiries = []
+    revenue_loss = 0
+    analyzed = [latest[domain] for domain in members if domain in latest]
+    for record in analyzed:
+        grade, expires_on, headers_mask, loss = domain_state(record)
+        grades[grade] += 1
+        revenue_loss += loss
+        if expires_on:
+            expiries.append(expires_on)
+        if headers_mask is not None:
+            for i, header in enumerate(SECURITY_HEADERS):
+                if not headers_mask & (1 << i):
+                    missing[header] = missing.get(header, 0) + 1
+    today_iso = TODAY.isoformat()
+    expiring = {'expired': sum(1 for day in expiries if day < today_iso)}
+    for days in sorted({CERTIFICATE_THRESHOLDS[name] for name in
+                        ('critical_expiry_days', 'warning_expiry_days', 'renewal_recommendation_days')}):
+        until = (TODAY + timedelta(days=days)).isoformat()
+        expiring[f'within_{days}_days'] = sum(1 for day in expiries if today_iso <= day <= until)
+    return {
+        'portfolio_id': portfolio_id, 'domains': len(members), 'analyzed': len(analyzed),
+        'grade_distribution': grades, 'expiring_certificates': expiring, 'top_missing_headers': missing,
+        'revenue_loss_annual': revenue_loss, 'as_of': today_iso
+    }
+
+
+def check(store: PortfolioStore, portfolio_ids, members, latest) -> None:
+    for portfolio_id in portfolio_ids:
+        summary = store.summary(portfolio_id, TODAY)
+        # 동률 순서는 정해져 있지 않으므로 헤더별 개수로 비교
+        summary['top_missing_headers'] = {item['header']: item['domains'] for item in summary['top_missing_headers']}
+        expected = recompute(members[portfolio_id], latest, portfolio_id)
+        assert summary == expected, (summary, expected)
+
+
+def test_incremental_matches_recompute(steps: int = 3000, seed: int = 49) -> None:
+    rng = random.Random(seed)
+    PORTFOLIO_CONFIG['top_missing_headers'] = len(SECURITY_HEADERS)
+    store = PortfolioStore(':memory:')
+    analyses = MemoryStore()
+    members = {}
+    for name in ('shop', 'blog', 'ops'):
+        portfolio = store.create(name, rng.sample(DOMAINS, 8), tenant="tenant")
+        members[portfolio['id']] = set(store.domains(portfolio['id']))
+    latest = {}
+    clock = datetime(2026, 2, 1)
+
+    for n in range(steps):
+        roll = rng.random()
+        portfolio_id = rng.choice(list(members))
+        if roll < 0.1:
+            domains = rng.sample(DOMAINS, 3)
+            store.add_domains(portfolio_id, domains)
+            members[portfolio_id].update(domains)
+        elif roll < 0.2:
+            domains = rng.sample(DOMAINS, 3)
+            store.remove_domains(portfolio_id, domains)
+            members[portfolio_id].difference_update(domains)
+        else:
+            clock += timedelta(minutes=1)
+            # 가끔 이전 시각의 분석이 늦게 끝나 도착 (최신 상태를 바꾸지 않아야 함)
+            created_at = clock - timedelta(hours=rng.randint(1, 48), seconds=30) if rng.random() < 0.1 else clock
+            record = random_analysis(rng, n, created_at)
+            analyses.records.append(record)
+            store.record_analysis(record)
+            current = latest.get(record.result.domain)
+            if current is None or current.created_at <= record.created_at:
+                latest[record.result.domain] = record
+        if n % 250 == 0:
+            check(store, members, members, latest)
+    check(store, members, members, latest)
+
+    # 재구성: 결과가 같아야 하고, 스캔 도중 기록된 분석도 잃지 않아야 함
+    def land_during_scan():
+        clock_late = clock + timedelta(hours=1)
+        record = random_analysis(rng, steps, clock_late)
+        record.result.domain = next(iter(members[next(iter(members))]))
+        analyses.records.append(record)
+        store.record_analysis(record)
+        latest[record.result.domain] = record
+
+    analyses.during_scan = land_during_scan
+    store.rebuild(analyses)
+    check(store, members, members, latest)
+
+
+if __name__ == '__main__':
+    print("🧪 포트폴리오 집계 테스트 시작...")
+    test_incremental_matches_recompute()
+    print("✅ 테스트 성공! 증분 집계, 도메인 추가/삭제, 재구성 결과가 모두 재계산과 일치합니다")
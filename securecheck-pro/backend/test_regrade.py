@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""
+재채점 작업 테스트 - 첫 청크 후 중단, 체크포인트(last_rowid)부터 재개, 대상 버전으로 이미 채점된
+분석 건너뛰기, 모든 분석이 정확히 한 번씩 재채점되는지, 완료 후 재실행이 안전한지 확인
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+
+# 임시 규칙 디렉터리 (v1 + 같은 규칙의 v2) - spawn된 작업 프로세스(__mp_main__)는 RULES_DIR 환경 변수를 물려받음
+if __name__ == '__main__':
+    os.environ['RULES_DIR'] = tempfile.mkdtemp()
+RULES_DIR = os.environ['RULES_DIR']
+
+from analysis_model import AnalysisRecord, SSLGrade, StoredAnalysis
+from analysis_store import AnalysisStore
+from config import REGRADE_CONFIG
+from regrade import RegradeJob
+
+TARGET = 2
+CHUNK = 25
+
+
+class RecordingStore(AnalysisStore):
+    """save_regraded로 기록된 분석 ID를 모두 남기는 저장소"""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self.saved = []
+
+    def save_regraded(self, rules_version, rows, last_rowid) -> None:
+        self.saved.extend(analysis_id for analysis_id, _, _ in rows)
+        super().save_regraded(rules_version, rows, last_rowid)
+
+
+def write_rules() -> None:
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules', 'v1.json')
+    shutil.copy(source, os.path.join(RULES_DIR, 'v1.json'))
+    with open(source, encoding='utf-8') as f:
+        spec = json.load(f)
+    spec['version'] = TARGET
+    with open(os.path.join(RULES_DIR, f'v{TARGET}.json'), 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+
+
+def fill(store: AnalysisStore, count: int, seed: int = 47) -> set:
+    """분석 count건 저장, 대상 버전으로 이미 채점된 ID 집합 반환"""
+    rng = random.Random(seed)
+    graded = set()
+    for n in range(count):
+        version = TARGET if rng.random() < 0.2 else 1
+        record = StoredAnalysis(
+            id=f"analysis-{n:04d}", url=f"https://site{n}.example.com",
+            created_at=f"2026-01-01T{n // 60:02d}:{n % 60:02d}:00",
+            ssl_grade=SSLGrade.F, security_score=0, issue_codes=[], business_impact={}, recommendation_codes=[],
+            result=AnalysisRecord.from_dict({
+                'domain': f"site{n}.example.com", 'ssl_status': rng.choice(['valid', 'expired', 'self_signed']),
+                'days_until_expiry': rng.randint(-30, 365), 'port_443_open': True
+            }),
+            rules_version=version
+        )
+        store[record.id] = record
+        if version == TARGET:
+            graded.add(record.id)
+    return graded
+
+
+def test_resume_after_interruption(count: int = 200) -> None:
+    write_rules()
+    # 쓰기 전에 앞서 읽는 청크가 없어야 첫 청크 직후 정확히 멈춤
+    REGRADE_CONFIG['max_pending_chunks'] = 1
+    db_dir = tempfile.mkdtemp()
+    try:
+        store = RecordingStore(os.path.join(db_dir, 'analyses.db'))
+        graded = fill(store, count)
+        stale = [f"analysis-{n:04d}" for n in range(count) if f"analysis-{n:04d}" not in graded]
+        stale_rowids = [rowid for rowid, _ in store.stale_page(TARGET, 0, count)]
+
+        # 1) 첫 청크를 쓴 뒤 중단
+        job = RegradeJob(store, TARGET, workers=1, chunk_size=CHUNK)
+        state = job.run(progress=lambda _: job.stop())
+        assert state['finished_at'] is None and state['processed'] == CHUNK, state
+        assert store.saved == stale[:CHUNK], store.saved
+        assert state['last_rowid'] == stale_rowids[CHUNK - 1], state
+
+        # 2) 체크포인트부터 재개 - 남은 분석만, 대상 버전으로 채점된 분석은 건너뜀
+        state = RegradeJob(store, TARGET, workers=1, chunk_size=CHUNK).run()
+        assert state['finished_at'] and state['processed'] == len(stale), state
+        assert store.saved == stale, "각 분석은 정확히 한 번씩 재채점되어야 합니다"
+        assert not graded & set(store.saved)
+        for analysis_id in stale:
+            record = store.load(analysis_id)
+            assert record.rules_version == TARGET and record.security_score > 0, record
+        assert not store.stale_page(TARGET, 0, 1)
+
+        # 3) 완료 후 재실행은 아무것도 다시 쓰지 않음
+        state = RegradeJob(store, TARGET, workers=1, chunk_size=CHUNK).run()
+        assert state['finished_at'] and state['processed'] == len(stale), state
+        assert len(store.saved) == len(stale)
+    finally:
+        shutil.rmtree(db_dir)
+
+
+if __name__ == '__main__':
+    print("🧪 재채점 작업 테스트 시작...")
+    try:
+        test_resume_after_interruption()
+    finally:
+        shutil.rmtree(RULES_DIR)
+    print("✅ 테스트 성공! 중단 후 재개, 채점된 분석 건너뛰기, 재실행이 모두 정상입니다")
@@ -0,0 +1,104 @@
+"""
+TLS Context Factory - Shared SSLContexts built once from a configurable trust store
+"""
+
+import os
+import ssl
+import threading
+import time
+from typing import Optional, Tuple
+
+import certifi
+
+from config import TLS_CONFIG
+from error_handling import ConfigurationError, logger
+
+
+class TLSContextFactory:
+    """Builds the verifying and non-verifying contexts once and shares them.
+
+    ``trust_store`` is ``'certifi'``, ``'system'`` or a path to a PEM bundle.
+    The bundle file is re-checked at most every ``reload_check_interval``
+    seconds and the contexts are rebuilt when its mtime or size changes, so
+    a CA bundle update takes effect without restarting the workers.
+    """
+
+    def __init__(self, trust_store: Optional[str] = None,
+                 reload_check_interval: Optional[float] = None):
+        self.trust_store = trust_store or TLS_CONFIG['trust_store']
+        self.reload_check_interval = (
+            TLS_CONFIG['reload_check_interval'] if reload_check_interval is None
+            else reload_check_interval
+        )
+        self._lock = threading.Lock()
+        self._bundle_signature = None
+        self._checked_at = 0.0
+        self.loaded_at: Optional[float] = None
+        self._verifying, self._non_verifying = self._build()
+
+    @property
+    def bundle_path(self) -> Optional[str]:
+        """PEM file backing the trust store (None if the system store has no single file)"""
+        if self.trust_store == 'certifi':
+            return certifi.where()
+        if self.trust_store == 'system':
+            return ssl.get_default_verify_paths().cafile
+        return self.trust_store
+
+    def _signature(self) -> Optional[Tuple[float, int]]:
+        path = self.bundle_path
+        if not path:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _build(self) -> Tuple[ssl.SSLContext, ssl.SSLContext]:
+        if self.trust_store == 'system':
+            verifying = ssl.create_default_context()
+        else:
+            path = self.bundle_path
+            if not path or not os.path.exists(path):
+                raise ConfigurationError(f"Trust store bundle not found: {path}", "TRUST_STORE_MISSING")
+            verifying = ssl.create_default_context(cafile=path)
+
+        non_verifying = ssl.create_default_context()
+        non_verifying.check_hostname = False
+        non_verifying.verify_mode = ssl.CERT_NONE
+
+        self._bundle_signature = self._signature()
+        self._checked_at = time.monotonic()
+        self.loaded_at = time.time()
+        return verifying, non_verifying
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_check_interval:
+                return
+            self._checked_at = now
+            if self._signature() == self._bundle_signature:
+                return
+            try:
+                self._verifying, self._non_verifying = self._build()
+                logger.info(f"Trust store reloaded from {self.bundle_path}")
+            except (ConfigurationError, ssl.SSLError, OSError) as e:
+                # Keep serving the previous contexts if the new bundle is broken
+                logger.error(f"Trust store reload failed, keeping previous bundle: {e}")
+
+    def contexts(self) -> Tuple[ssl.SSLContext, ssl.SSLContext]:
+        """(verifying, non_verifying) contexts, reloaded if the bundle changed"""
+        self._maybe_reload()
+        return self._verifying, self._non_verifying
+
+    @property
+    def verifying(self) -> ssl.SSLContext:
+        return self.contexts()[0]
+
+    @property
+    def non_verifying(self) -> ssl.SSLContext:
+        return self.contexts()[1]
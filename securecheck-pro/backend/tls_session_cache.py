@@ -0,0 +1,107 @@
+"""
+TLS Session Cache - Per-host SSLSession reuse for repeat probes
+"""
+
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from config import TLS_SESSION_CONFIG
+from metrics import metrics
+
+
+class CachedSession(NamedTuple):
+    context: ssl.SSLContext
+    session: ssl.SSLSession
+    full_handshake_seconds: float
+    full_handshake_cpu: float
+
+
+class TLSSessionCache:
+    """LRU of the last full-handshake session per (host, port).
+
+    Sessions are bound to the SSLContext that created them, so a session is
+    only offered again on a handshake that uses the same context (a trust
+    store reload therefore starts from full handshakes).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, enabled: Optional[bool] = None):
+        self.max_entries = max_entries or TLS_SESSION_CONFIG['max_entries']
+        self.enabled = TLS_SESSION_CONFIG['enabled'] if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, int], CachedSession]' = OrderedDict()
+
+    def get(self, host: str, port: int, context: ssl.SSLContext) -> Optional[CachedSession]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry is None or entry.context is not context:
+                return None
+            self._entries.move_to_end((host, port))
+            return entry
+
+    def put(self, host: str, port: int, entry: CachedSession) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[(host, port)] = entry
+            self._entries.move_to_end((host, port))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_handshake(self, host: str, port: int, context: ssl.SSLContext,
+                         ssock: ssl.SSLSocket, offered: Optional[CachedSession],
+                         seconds: float, cpu_seconds: float) -> dict:
+        """Update the cache and metrics after a handshake; return resumption findings"""
+        reused = bool(offered) and ssock.session_reused
+        if reused:
+            metrics.increment('tls_handshakes_resumed')
+            metrics.increment('tls_handshake_seconds_resumed', seconds)
+            # Abbreviated handshakes skip certificate exchange and verification
+            metrics.increment('tls_handshake_seconds_saved', max(0.0, offered.full_handshake_seconds - seconds))
+            metrics.increment('tls_handshake_cpu_seconds_saved', max(0.0, offered.full_handshake_cpu - cpu_seconds))
+            if ssock.version() != 'TLSv1.3':
+                metrics.increment('tls_round_trips_saved')
+        else:
+            metrics.increment('tls_handshakes_full')
+            metrics.increment('tls_handshake_seconds_full', seconds)
+
+        session = ssock.session
+        if session is not None and (session.has_ticket or session.id):
+            full_seconds = offered.full_handshake_seconds if reused else seconds
+            full_cpu = offered.full_handshake_cpu if reused else cpu_seconds
+            self.put(host, port, CachedSession(context, session, full_seconds, full_cpu))
+
+        return {
+            'tls_version': ssock.version(),
+            'tls_session_resumed': reused,
+            # None: no cached session was offered, so support is still unknown
+            'session_resumption_supported': reused if offered else None
+        }
+
+    def wait_for_ticket(self, ssock: ssl.SSLSocket) -> None:
+        """Read briefly so a TLS 1.3 ticket sent after the handshake is processed and cached.
+
+        Skipped when the cache is off, the session was resumed, the protocol
+        sends tickets in the handshake (TLS 1.2) or a ticket already arrived.
+        """
+        if (not self.enabled or ssock.session_reused or ssock.version() != 'TLSv1.3'
+                or (ssock.session is not None and ssock.session.has_ticket)):
+            return
+        started = time.perf_counter()
+        ssock.settimeout(TLS_SESSION_CONFIG['ticket_wait'])
+        try:
+            ssock.recv(1)
+        except (socket.timeout, ssl.SSLError, OSError):
+            pass
+        metrics.increment('tls_ticket_waits')
+        metrics.increment('tls_ticket_wait_seconds', time.perf_counter() - started)
+        if ssock.session is not None and ssock.session.has_ticket:
+            metrics.increment('tls_tickets_received')
+
+    def __len__(self) -> int:
+        return len(self._entries)